@@ -1,26 +1,52 @@
 import streamlit as st
+
+import metrics
 from generate_menu import (
     generate_week_menu,
     replace_day,
-    generate_weekmenu_pdf,
+    replace_similar,
     build_shopping_list,
-    load_pantry,
-    save_pantry,
     get_all_ingredient_names,
-    DEFAULT_PANTRY,
+    get_recipe_titles,
     TARGET_SERVINGS,
 )
+from pantry import load_pantry, save_pantry, DEFAULT_PANTRY
+from ingredient_names import canonical_name
+from search import search_recipes
+from browse import list_recipes, recipe_details
+from ingredient_index import rank_by_on_hand
+from constraints import get_all_tag_names, unknown_ingredients
+from history import HISTORY_WEEKS, DEFAULT_PROFILE, save_menu, get_history, week_start
 
 DAYS = ["Maandag", "Dinsdag", "Woensdag", "Donderdag", "Vrijdag", "Zaterdag", "Zondag"]
 
 st.set_page_config(page_title="Slim Weekmenu", layout="centered")
 
+debug = st.sidebar.checkbox("🔬 Debug: timings & tellers", key="debug_metrics")
+if debug:
+    metrics.enable()
+else:
+    metrics.disable()
+
+profile = st.sidebar.text_input("👤 Profiel", value=DEFAULT_PROFILE, key="profile") or DEFAULT_PROFILE
+history_weeks = st.sidebar.number_input(
+    "Geen herhaling van de laatste N weken", min_value=0, max_value=52, value=HISTORY_WEEKS, key="history_weeks"
+)
+history = {"history_weeks": int(history_weeks), "profile": profile}
+selection = st.sidebar.radio(
+    "🎲 Selectie",
+    ["Dag per dag", "Zo divers mogelijk (DPP)"],
+    key="selection_mode",
+    help="DPP kiest de hele week in één keer: zo weinig mogelijk overlap tussen alle dagen.",
+)
+mode = "dpp" if selection.endswith("(DPP)") else "greedy"
+
 st.title("🍽️ Slim Weekmenu")
 st.caption(f"Menu voor {TARGET_SERVINGS} personen")
 
 if "menu" not in st.session_state:
     try:
-        st.session_state.menu = generate_week_menu()
+        st.session_state.menu = generate_week_menu(mode=mode, **history)
     except Exception:
         st.error("Niet genoeg recepten in de database (minimaal 7 nodig). Importeer eerst recepten.")
         st.stop()
@@ -28,14 +54,31 @@ if "menu" not in st.session_state:
 st.subheader("📅 Weekmenu")
 
 for i, recipe in enumerate(st.session_state.menu):
-    col1, col2, col3 = st.columns([6, 1, 1])
+    col1, col2, col_like, col_unlike, col3 = st.columns([5, 1, 1, 1, 1])
 
-    col1.markdown(f"**{DAYS[i]}**  \n{recipe['title']}")
+    col1.markdown(f"**{DAYS[i]}**  \n{recipe['title'] if recipe else '—'}")
 
     if col2.button("↻", key=f"regen_{i}"):
-        st.session_state.menu = replace_day(i, st.session_state.menu)
+        st.session_state.menu = replace_day(
+            i, st.session_state.menu, constraints=st.session_state.get("constraints"),
+            cache=st.session_state.setdefault("reroll_cache", {}), **history
+        )
         st.rerun()
 
+    # TF-IDF-index: per dag onthouden wat al voorbijkwam, zodat herhaald klikken doorschuift
+    for col, different, icon, tip in (
+        (col_like, False, "≈", "Meer zoals dit"),
+        (col_unlike, True, "⇄", "Iets helemaal anders"),
+    ):
+        if col.button(icon, key=f"{'unlike' if different else 'like'}_{i}", help=tip, disabled=recipe is None):
+            st.session_state.menu = replace_similar(
+                i, st.session_state.menu, different=different,
+                constraints=st.session_state.get("constraints"),
+                seen=st.session_state.setdefault("similar_seen", {}).setdefault(i, set()),
+                **history
+            )
+            st.rerun()
+
     if col3.button("✖", key=f"remove_{i}"):
         new_menu = st.session_state.menu.copy()
         new_menu[i] = None
@@ -44,23 +87,156 @@ for i, recipe in enumerate(st.session_state.menu):
 
 st.divider()
 
+on_hand_text = st.text_input(
+    "🧊 Wat heb je in huis? (komma-gescheiden, optioneel)",
+    key="on_hand",
+    placeholder="kipfilet, paprika, rijst",
+)
+on_hand = [item.strip() for item in on_hand_text.split(",") if item.strip()]
+
+if on_hand:
+    suggestions = rank_by_on_hand(on_hand, limit=5)
+    if suggestions:
+        titles = get_recipe_titles([hit["id"] for hit in suggestions])
+        st.caption("Beste match met wat je in huis hebt:")
+        for hit in suggestions:
+            st.write(
+                f"- {titles.get(hit['id'], hit['id'])} "
+                f"({hit['coverage']:.0%} gedekt, {hit['missing']} ontbrekend)"
+            )
+
+with st.expander("⚙️ Voorwaarden"):
+    all_tags = get_all_tag_names()
+    col1, col2 = st.columns(2)
+    include_tags = col1.multiselect("Met tags", all_tags, key="c_include_tags")
+    exclude_tags = col2.multiselect("Zonder tags", all_tags, key="c_exclude_tags")
+    vegetarian_days = st.multiselect("Vegetarische dagen", DAYS, key="c_veg_days")
+    max_ingredients = st.number_input(
+        "Maximum aantal ingrediënten (0 = geen limiet)", min_value=0, value=0, key="c_max_ing"
+    )
+    must_use = st.text_input("Moet gebruikt worden (komma-gescheiden)", key="c_must_use")
+    exclude_ingredients = st.text_input("Zonder ingrediënten (komma-gescheiden)", key="c_exclude_ing")
+    unknown = unknown_ingredients(
+        [x.strip() for x in f"{must_use},{exclude_ingredients}".split(",") if x.strip()]
+    )
+    if unknown:
+        st.warning(f"Onbekende ingrediënten (genegeerd): {', '.join(unknown)}")
+
+st.session_state.constraints = constraints = {
+    "include_tags": include_tags,
+    "exclude_tags": exclude_tags,
+    "vegetarian_days": [DAYS.index(d) for d in vegetarian_days],
+    "max_ingredients": int(max_ingredients),
+    "must_use": [x.strip() for x in must_use.split(",") if x.strip()],
+    "exclude_ingredients": [x.strip() for x in exclude_ingredients.split(",") if x.strip()],
+}
+
 if st.button("🔄 Volledig nieuw menu"):
     try:
-        st.session_state.menu = generate_week_menu()
+        st.session_state.menu = generate_week_menu(
+            on_hand=on_hand or None, constraints=constraints, mode=mode, **history
+        )
         st.rerun()
-    except Exception:
-        st.error("Niet genoeg recepten in de database (minimaal 7 nodig).")
+    except Exception as e:
+        st.error(str(e) or "Niet genoeg recepten in de database (minimaal 7 nodig).")
 
 if st.button("📄 Exporteer naar PDF"):
     if None in st.session_state.menu:
         st.warning("Menu bevat lege dagen")
     else:
         try:
+            from menu_pdf import generate_weekmenu_pdf  # reportlab pas laden bij export
+
             generate_weekmenu_pdf(st.session_state.menu)
             st.success("PDF gegenereerd!")
         except Exception as e:
             st.error(f"Fout bij PDF-generatie: {e}")
 
+# =========================
+# Menugeschiedenis
+# =========================
+with st.expander("🗓️ Geschiedenis"):
+    start = st.date_input("Week van", value=week_start(), key="history_start")
+    if st.button("💾 Bewaar dit menu", disabled=None in st.session_state.menu):
+        save_menu(st.session_state.menu, start=week_start(start), profile=profile)
+        # Bewaarde recepten vallen nu in het herhaalvenster: re-roll-lijsten opnieuw opbouwen
+        st.session_state.pop("reroll_cache", None)
+        st.success("Menu bewaard in de geschiedenis")
+
+    for past in get_history(profile, limit=5):
+        st.markdown(f"**Week van {past['start']}**")
+        for served_on, title in past["days"]:
+            st.write(f"- {served_on}: {title}")
+
+# =========================
+# Recept zoeken
+# =========================
+with st.expander("🔎 Recept zoeken"):
+    query = st.text_input("Zoek op titel, ingrediënt of bereiding", key="search_query")
+    if query:
+        hits = search_recipes(query, limit=10)
+        if not hits:
+            st.info("Geen recepten gevonden")
+        for hit in hits:
+            col1, col2, col3 = st.columns([5, 2, 1])
+            col1.markdown(hit["title"])
+            day = col2.selectbox(
+                "Dag", DAYS, key=f"pin_day_{hit['id']}", label_visibility="collapsed"
+            )
+            if col3.button("📌", key=f"pin_{hit['id']}", help="Zet op deze dag"):
+                new_menu = st.session_state.menu.copy()
+                new_menu[DAYS.index(day)] = {
+                    "id": hit["id"],
+                    "title": hit["title"],
+                    "servings": hit["servings"],
+                }
+                st.session_state.menu = new_menu
+                st.rerun()
+
+# =========================
+# Recepten doorbladeren
+# =========================
+with st.expander("📚 Alle recepten"):
+    col1, col2, col3 = st.columns([1, 2, 2])
+    sort = "title" if col1.radio("Sorteer op", ["titel", "nummer"], key="browse_sort") == "titel" else "id"
+    browse_tags = col2.multiselect("Met tags", get_all_tag_names(), key="browse_tags")
+    browse_ingredients = col3.multiselect("Met ingrediënten", get_all_ingredient_names(), key="browse_ingredients")
+
+    # Stapel cursors van de bezochte pagina's; opnieuw beginnen als sortering of filters wijzigen
+    browse_query = (sort, tuple(browse_tags), tuple(browse_ingredients))
+    if st.session_state.get("browse_query") != browse_query:
+        st.session_state.browse_query = browse_query
+        st.session_state.browse_cursors = [None]
+    cursors = st.session_state.browse_cursors
+
+    page, next_cursor = list_recipes(cursors[-1], sort, browse_tags, browse_ingredients)
+    if not page:
+        st.info("Geen recepten gevonden")
+    for row in page:
+        label = f"{row['title']} · {row['ingredient_count'] or '?'} ingrediënten"
+        if row["cooking_method"]:
+            label += f" · {row['cooking_method']}"
+        if row["vegetarian"]:
+            label += " · 🥕"
+        # Details pas ophalen als het recept opengeklapt is
+        if st.toggle(label, key=f"browse_open_{row['id']}"):
+            details = recipe_details(row["id"])
+            if details["tags"]:
+                st.caption(", ".join(details["tags"]))
+            for name, qty, unit in details["ingredients"]:
+                st.write(f"- {name}: {qty or ''} {unit or ''}".rstrip())
+            for number, text in details["steps"]:
+                st.write(f"{number}. {text}")
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    if col1.button("◀ Vorige", key="browse_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    col2.caption(f"Pagina {len(cursors)}")
+    if col3.button("Volgende ▶", key="browse_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
 # =========================
 # Boodschappenlijst
 # =========================
@@ -76,7 +252,8 @@ if None not in st.session_state.menu:
 # =========================
 with st.expander("🏠 Voorraadkast beheren"):
     all_names = get_all_ingredient_names()
-    current_pantry = sorted(load_pantry())
+    # Voorraadkast-items in canonieke vorm, zoals in de keuzelijst
+    current_pantry = sorted({canonical_name(item) for item in load_pantry()})
 
     selected = st.multiselect(
         "Ingrediënten in voorraad (worden uitgesloten van boodschappenlijst)",
@@ -93,4 +270,35 @@ with st.expander("🏠 Voorraadkast beheren"):
         save_pantry(DEFAULT_PANTRY)
         st.rerun()
 
+# =========================
+# Debug-paneel
+# =========================
+if debug:
+    with st.sidebar:
+        st.subheader("🔬 Metrics")
+        data = metrics.snapshot()
+        spans = sorted(data["spans"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        if spans:
+            st.dataframe(
+                [
+                    {
+                        "span": name,
+                        "aantal": s["count"],
+                        "totaal (ms)": round(s["total_ms"], 1),
+                        "gem. (ms)": round(s["mean_ms"], 3),
+                        "max (ms)": round(s["max_ms"], 1),
+                    }
+                    for name, s in spans
+                ],
+                hide_index=True,
+            )
+        for name, n in sorted(data["counters"].items()):
+            st.write(f"- {name}: {n}")
+
+        st.download_button("JSON", metrics.to_json(), file_name="metrics.json")
+        st.download_button("Prometheus", metrics.to_prometheus(), file_name="metrics.prom")
+        if st.button("Reset metrics"):
+            metrics.reset()
+            st.rerun()
+
 st.caption("👨‍🍳 Slimme menuplanning met servings-correctie")
@@ -0,0 +1,56 @@
+# scripts/autotag.py
+"""
+Backfill van de receptkenmerken en automatische tags (zie features.py).
+
+Nieuwe recepten krijgen hun kenmerken al bij import (db.insert_recipe);
+dit script herberekent ze voor de hele database, bv. na een aanpassing
+van de keyword-lijsten in features.py.
+
+    python autotag.py            # alle recepten
+    python autotag.py --missing  # enkel recepten zonder kenmerken
+"""
+import argparse
+import contextlib
+
+import metrics
+from db import get_connection, backfill_recipe_features
+from features import is_auto_tag
+from snapshot import refresh_snapshot
+
+
+def print_progress(done, total):
+    if done == total or done % 1000 == 0:
+        print(f"\r🏷️  {done}/{total} recepten", end="", flush=True)
+
+
+def tag_counts(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT t.name, count(*) FROM recipe_tags rt
+        JOIN tags t ON t.id = rt.tag_id
+        GROUP BY t.id
+        ORDER BY t.name
+    """)
+    return [(name, n) for name, n in cur.fetchall() if is_auto_tag(name)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Herbereken receptkenmerken en automatische tags")
+    parser.add_argument("--missing", action="store_true", help="enkel recepten zonder kenmerken")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    def run():
+        with contextlib.closing(get_connection()) as conn:
+            updated = backfill_recipe_features(conn, only_missing=args.missing, progress=print_progress)
+            print(f"\n✅ {updated} recepten bijgewerkt")
+            if updated:
+                refresh_snapshot()
+            for name, n in tag_counts(conn):
+                print(f"- {name}: {n}")
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# scripts/batch_export.py
+"""
+Batch-export van veel weekmenu's naar één ZIP-archief.
+
+Elke PDF wordt in een aparte worker-proces gerenderd. De workers lezen uit een
+read-only snapshot van de benodigde recepten (één keer opgebouwd in het
+hoofdproces), zodat ze zelf geen database openen. Resultaten worden in de ZIP
+geschreven zodra ze klaar zijn.
+
+Gebruik:
+    python batch_export.py menus.json -o weekmenus.zip
+    python batch_export.py --random 20 -o weekmenus.zip --workers 4
+
+menus.json bevat een lijst menu's; elk menu is een lijst van 7 recept-id's
+of {"name": "week-01", "recipes": [id, ...]}.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import metrics
+from db import reader
+from generate_menu import (
+    parse_servings,
+    pantry_name_ids,
+    generate_week_menu,
+    shopping_scales,
+    aggregate_shopping,
+)
+from menu_pdf import render_weekmenu_pdf
+
+# Read-only snapshot in elke worker (gezet door _init_worker)
+_SNAPSHOT = None
+
+
+# =========================
+# Snapshot
+# =========================
+def load_recipe_snapshot(recipe_ids):
+    """
+    Laadt alle recepten die in de menu's voorkomen met drie bulk-queries.
+    Resultaat: {"recipes": {id: full_recipe},
+                "shopping": {id: [(name_id, canonieke naam, quantity, unit)]},
+                "pantry": frozenset name_id's}
+    """
+    ids = sorted(set(recipe_ids))
+    placeholders = ",".join("?" for _ in ids)
+
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT id, title, servings FROM recipes WHERE id IN ({placeholders})", ids)
+        recipe_rows = cur.fetchall()
+
+        cur.execute(f"""
+            SELECT i.recipe_id, i.name, i.quantity, i.unit, i.name_id, n.name
+            FROM ingredients i
+            JOIN ingredient_names n ON n.id = i.name_id
+            WHERE i.recipe_id IN ({placeholders})
+        """, ids)
+        ingredient_rows = cur.fetchall()
+
+        cur.execute(f"""
+            SELECT recipe_id, step_number, text
+            FROM steps
+            WHERE recipe_id IN ({placeholders})
+            ORDER BY recipe_id, step_number
+        """, ids)
+        step_rows = cur.fetchall()
+
+    ingredients = defaultdict(list)
+    shopping = defaultdict(list)
+    for recipe_id, name, qty, unit, name_id, canonical in ingredient_rows:
+        ingredients[recipe_id].append((name, qty, unit))
+        shopping[recipe_id].append((name_id, canonical, qty, unit))
+
+    steps = defaultdict(list)
+    for recipe_id, nr, text in step_rows:
+        steps[recipe_id].append((nr, text))
+
+    recipes = {
+        recipe_id: {
+            "id": recipe_id,
+            "title": title,
+            "servings": parse_servings(servings),
+            "ingredients": ingredients[recipe_id],
+            "steps": steps[recipe_id],
+        }
+        for recipe_id, title, servings in recipe_rows
+    }
+
+    missing = set(ids) - set(recipes)
+    if missing:
+        raise ValueError(f"Onbekende recept-id's: {sorted(missing)}")
+
+    return {"recipes": recipes, "shopping": dict(shopping), "pantry": pantry_name_ids()}
+
+
+# =========================
+# Worker
+# =========================
+def _init_worker(snapshot):
+    global _SNAPSHOT
+    _SNAPSHOT = snapshot
+
+
+def render_menu_pdf(name, recipe_ids, snapshot=None):
+    """Rendert één menu naar PDF-bytes. Geeft (name, bytes, seconden) terug."""
+    snapshot = snapshot or _SNAPSHOT
+    start = time.perf_counter()
+
+    full_recipes = [snapshot["recipes"][rid] for rid in recipe_ids]
+    menu = [
+        {"id": r["id"], "title": r["title"], "servings": r["servings"]}
+        for r in full_recipes
+    ]
+
+    rows = [
+        (recipe_id, name_id, name, qty, unit)
+        for recipe_id in recipe_ids
+        for name_id, name, qty, unit in snapshot["shopping"].get(recipe_id, [])
+    ]
+    shopping = aggregate_shopping(rows, shopping_scales(menu), snapshot["pantry"])
+
+    buf = io.BytesIO()
+    render_weekmenu_pdf(menu, buf, full_recipes, shopping)
+    return name, buf.getvalue(), time.perf_counter() - start
+
+
+# =========================
+# Batch API
+# =========================
+def safe_entry_name(name):
+    """Eén veilige padcomponent voor de ZIP: geen "/", "\\" of "..", geen verborgen bestand"""
+    return re.sub(r"[^\w.\- ]+", "_", str(name)).strip(" ._")[:100]
+
+
+def normalize_menus(menus):
+    """
+    Zet menu-invoer om naar een lijst (name, [recipe_id, ...]).
+    Namen worden één veilige bestandsnaam; dubbele namen krijgen een
+    achtervoegsel (-2, -3, ...), zodat elk menu een eigen bestand in de ZIP
+    krijgt. Een lege dag (None) geeft een ValueError.
+    """
+    result = []
+    used = set()
+    for i, menu in enumerate(menus, start=1):
+        if isinstance(menu, dict):
+            name = safe_entry_name(menu.get("name") or "") or f"weekmenu-{i:03d}"
+            items = menu["recipes"]
+        else:
+            name = f"weekmenu-{i:03d}"
+            items = menu
+        empty = [day for day, item in enumerate(items, start=1) if item is None]
+        if empty:
+            raise ValueError(f"Menu '{name}' heeft lege dagen: {empty}")
+        ids = [item["id"] if isinstance(item, dict) else int(item) for item in items]
+        unique, n = name, 1
+        while unique in used:
+            n += 1
+            unique = f"{name}-{n}"
+        used.add(unique)
+        result.append((unique, ids))
+    return result
+
+
+def export_menus_zip(menus, zip_path, workers=None, progress=None):
+    """
+    Rendert alle menu's parallel en schrijft ze in één ZIP.
+    progress(done, total, name, seconds) wordt per document aangeroepen.
+    Geeft een lijst {"name", "seconds", "bytes"} per document terug.
+    """
+    jobs = normalize_menus(menus)
+    if not jobs:
+        return []
+
+    snapshot = load_recipe_snapshot(rid for _, ids in jobs for rid in ids)
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    timings = []
+
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(snapshot,),
+        ) as pool:
+            futures = [pool.submit(render_menu_pdf, name, ids) for name, ids in jobs]
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                name, data, seconds = future.result()
+                zf.writestr(f"{name}.pdf", data)
+                timings.append({"name": name, "seconds": seconds, "bytes": len(data)})
+                if progress:
+                    progress(done, len(jobs), name, seconds)
+
+        zf.writestr("timings.json", json.dumps(timings, indent=2))
+
+    return timings
+
+
+def print_progress(done, total, name, seconds):
+    print(f"📄 [{done}/{total}] {name}.pdf ({seconds * 1000:.0f} ms)")
+
+
+# =========================
+# Main
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="Exporteer veel weekmenu's naar één ZIP")
+    parser.add_argument("menus", nargs="?", help="JSON-bestand met menu's")
+    parser.add_argument("--random", type=int, default=0, help="genereer N willekeurige menu's")
+    parser.add_argument("-o", "--output", default="weekmenus.zip")
+    parser.add_argument("--workers", type=int, default=None)
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    if args.menus:
+        with open(args.menus, "r", encoding="utf-8") as f:
+            menus = json.load(f)
+    elif args.random:
+        with contextlib.redirect_stdout(io.StringIO()):
+            menus = [generate_week_menu() for _ in range(args.random)]
+    else:
+        parser.error("geef een menubestand of --random N")
+
+    try:
+        normalize_menus(menus)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def run():
+        start = time.perf_counter()
+        timings = export_menus_zip(menus, args.output, workers=args.workers, progress=print_progress)
+        total = time.perf_counter() - start
+
+        if timings:
+            slowest = max(timings, key=lambda t: t["seconds"])
+            print(f"\n🎉 {len(timings)} PDF's in {total:.1f} s → {args.output}")
+            print(f"⏱️  Traagste: {slowest['name']} ({slowest['seconds'] * 1000:.0f} ms)")
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,159 @@
 # scripts/batch_ocr.py
 import json
 from pathlib import Path
-from gemini_extract import extract_recipe_from_image
+
+import metrics
+from extract_cache import MAX_MB, get_cache, report as report_cache
+from gemini_batch import MAX_IMAGES, MAX_TOKENS, make_page, report
+from gemini_extract import extract_recipes_from_scans
+from image_prep import MAX_SIDE, JPEG_QUALITY, MAX_DISTANCE, NearDuplicateIndex, prepare_image
+from recipe_schema import report_stats
 
 SCANS_DIR = Path("../scans")
 OUTPUT_DIR = Path("../ocr")
-OUTPUT_DIR.mkdir(exist_ok=True)
+# scan-naam → pHash (hex) van eerder verwerkte scans; niet in OUTPUT_DIR,
+# want import_json leest elk .json-bestand daar als recept
+PHASH_INDEX = Path(__file__).parent / "_cache" / "ocr_phash.json"
+
+
+def load_phash_index(max_distance=MAX_DISTANCE):
+    """Bekende scans met een bestaand OCR-resultaat, als NearDuplicateIndex + ruwe dict"""
+    known = {}
+    if PHASH_INDEX.exists():
+        known = json.loads(PHASH_INDEX.read_text(encoding="utf-8"))
+
+    index = NearDuplicateIndex(max_distance)
+    for stem, phash in known.items():
+        if (OUTPUT_DIR / f"{stem}.json").exists():
+            index.add(int(phash, 16), stem)
+    return index, known
 
-def process_all_scans():
+
+def process_all_scans(max_side=MAX_SIDE, quality=JPEG_QUALITY, crop=False,
+                      max_distance=MAX_DISTANCE, force=False,
+                      max_images=MAX_IMAGES, max_tokens=MAX_TOKENS, cache_mb=MAX_MB):
+    """
+    Verkleint elke scan vóór de upload en slaat Gemini over voor scans die al
+    een resultaat hebben of (bijna) gelijk zijn aan een al verwerkte scan; dan
+    wordt dat resultaat gekopieerd. force=True: alles opnieuw extraheren.
+    De overige scans gaan in batches van max_images (1 = één per request);
+    scans in de extractiecache (max. cache_mb) gaan niet naar Gemini.
+    """
+    get_cache(cache_mb)
+    OUTPUT_DIR.mkdir(exist_ok=True)
     images = sorted(SCANS_DIR.glob("*.jpeg")) + sorted(SCANS_DIR.glob("*.jpg"))
+    index, known = load_phash_index(max_distance)
+    if force:
+        index = NearDuplicateIndex(max_distance)
+
+    stats = {"scans": 0, "calls": 0, "calls_avoided": 0, "original_bytes": 0, "sent_bytes": 0}
+    pending = []
+    # scan in de wachtrij → later gevonden duplicaten die zijn resultaat krijgen
+    copies = {}
+
+    def output_path(stem):
+        return OUTPUT_DIR / f"{stem}.json"
+
+    def save_index():
+        PHASH_INDEX.parent.mkdir(exist_ok=True)
+        PHASH_INDEX.write_text(json.dumps(known, indent=2, sort_keys=True), encoding="utf-8")
 
     for img in images:
         print(f"🔄 Verwerken: {img.name}")
+        stats["scans"] += 1
 
-        recipe = extract_recipe_from_image(str(img))
+        if not force and output_path(img.stem).exists() and img.stem in known:
+            # Al verwerkt en gehasht: niet eens opnieuw decoderen
+            stats["calls_avoided"] += 1
+            metrics.count("ocr.calls_avoided")
+            print("🔁 Al verwerkt")
+            continue
 
-        output_path = OUTPUT_DIR / f"{img.stem}.json"
-        output_path.write_text(
-            json.dumps(recipe, indent=2, ensure_ascii=False),
-            encoding="utf-8"
+        with metrics.span("ocr.prepare_image"):
+            prepared = prepare_image(img, max_side=max_side, quality=quality, crop=crop)
+
+        if not force and output_path(img.stem).exists():
+            match = (0, img.stem)
+        else:
+            match = index.find(prepared["phash"])
+
+        index.add(prepared["phash"], img.stem)
+        phash = f"{prepared['phash']:064x}"
+
+        if match:
+            distance, source = match
+            stats["calls_avoided"] += 1
+            metrics.count("ocr.calls_avoided")
+            known[img.stem] = phash
+            if source in copies:
+                # Duplicaat van een scan die nog in de wachtrij staat
+                copies[source].append(img.stem)
+            elif source != img.stem:
+                output_path(img.stem).write_text(
+                    output_path(source).read_text(encoding="utf-8"),
+                    encoding="utf-8"
+                )
+            print(f"🔁 Uit cache: {source} (afstand {distance})")
+            continue
+
+        stats["original_bytes"] += prepared["original_bytes"]
+        stats["sent_bytes"] += prepared["bytes"]
+        copies[img.stem] = []
+        pending.append((make_page(img.stem, prepared["data"], prepared["mime_type"], prepared["size"]), phash))
+
+    save_index()
+    phashes = {page["key"]: phash for page, phash in pending}
+
+    def on_result(stem, recipe):
+        text = json.dumps(recipe, indent=2, ensure_ascii=False)
+        for target in [stem] + copies[stem]:
+            output_path(target).write_text(text, encoding="utf-8")
+        known[stem] = phashes[stem]
+        save_index()
+        print(f"✅ Klaar: {stem}.json")
+
+    if pending:
+        batch_stats = extract_recipes_from_scans(
+            [page for page, _ in pending], on_result, max_images, max_tokens
         )
+        stats["calls"] = batch_stats["requests"]
+        stats["calls_avoided"] += batch_stats["cached"]
+        report(batch_stats)
+        report_stats()
+        report_cache()
 
-        print(f"✅ Klaar: {output_path.name}")
+    saved = stats["original_bytes"] - stats["sent_bytes"]
+    metrics.count("ocr.bytes_saved", saved)
+    print(
+        f"\n📉 {stats['scans']} scans, {stats['calls']} Gemini-calls, "
+        f"{stats['calls_avoided']} vermeden (duplicaat of al verwerkt)"
+    )
+    print(
+        f"📦 Geüpload: {stats['sent_bytes'] / 2**20:.1f} MB i.p.v. "
+        f"{stats['original_bytes'] / 2**20:.1f} MB ({saved / 2**20:.1f} MB bespaard)"
+    )
+    return stats
 
 if __name__ == "__main__":
-    process_all_scans()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OCR van gescande receptkaarten via Gemini")
+    parser.add_argument("--max-side", type=int, default=MAX_SIDE,
+                        help=f"langste zijde in pixels vóór upload (standaard {MAX_SIDE}, 0 = niet verkleinen)")
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY, help="JPEG-kwaliteit (1-95)")
+    parser.add_argument("--crop", action="store_true", help="egale randen wegknippen")
+    parser.add_argument("--max-distance", type=int, default=MAX_DISTANCE,
+                        help="max. pHash-afstand (van 256 bits) om een scan als duplicaat te zien")
+    parser.add_argument("--force", action="store_true", help="alle scans opnieuw extraheren")
+    parser.add_argument("--batch-images", type=int, default=MAX_IMAGES,
+                        help=f"max. scans per Gemini-request (standaard {MAX_IMAGES}, 1 = geen batching)")
+    parser.add_argument("--batch-tokens", type=int, default=MAX_TOKENS,
+                        help=f"max. geschatte beeld-tokens per request (standaard {MAX_TOKENS})")
+    parser.add_argument("--cache-mb", type=float, default=MAX_MB,
+                        help=f"max. grootte van de extractiecache (standaard {MAX_MB} MB, LRU)")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+    metrics.run_cli(lambda: process_all_scans(
+        args.max_side, args.quality, args.crop, args.max_distance, args.force,
+        args.batch_images, args.batch_tokens, args.cache_mb,
+    ), args)
@@ -0,0 +1,126 @@
+# scripts/bench_pdf.py
+"""
+Benchmark voor de PDF-layout: rendert een paar honderd recepten naar één PDF
+in het geheugen en vergelijkt met de oude (kwadratische) regelafbreking.
+
+Gebruik:
+    python bench_pdf.py                 # 300 synthetische recepten
+    python bench_pdf.py --recipes 500
+    python bench_pdf.py --db            # alle recepten uit recipes.db
+"""
+import argparse
+import io
+import random
+import time
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+import metrics
+from pdf_layout import layout_section, draw_pages, word_width
+from generate_menu import get_full_recipe, get_all_recipes
+from menu_pdf import recipe_blocks, PDF_MARGIN
+
+WORDS = (
+    "snijd de ui fijn en fruit deze in een koekenpan met wat olijfolie "
+    "voeg de knoflook toe en bak kort mee kook de pasta volgens de "
+    "aanwijzingen op de verpakking verwarm de oven voor op 200 graden "
+    "meng de kipfilet met de kruiden en laat even marineren rasp de "
+    "citroen en pers het sap uit breng op smaak met peper en zout"
+).split()
+
+INGREDIENTS = [
+    "ui", "knoflook", "kipfilet", "paprika", "courgette", "tomaten",
+    "spinazie", "rundergehakt", "pasta", "room", "citroen", "peterselie",
+]
+
+
+def synthetic_recipe(rng):
+    return {
+        "title": " ".join(rng.choices(WORDS, k=rng.randint(3, 8))).capitalize(),
+        "servings": rng.choice([2, 3, 4]),
+        "ingredients": [
+            (rng.choice(INGREDIENTS), str(rng.randint(1, 500)), rng.choice(["g", "ml", "st"]))
+            for _ in range(rng.randint(5, 15))
+        ],
+        "steps": [
+            (nr, " ".join(rng.choices(WORDS, k=rng.randint(20, 120))))
+            for nr in range(1, rng.randint(4, 9))
+        ],
+    }
+
+
+def legacy_wrap(text, max_width, font="Helvetica", font_size=11):
+    """De oorspronkelijke regelafbreking: meet telkens de volledige regel opnieuw."""
+    lines = []
+    line = ""
+    for word in text.split(" "):
+        test_line = line + word + " "
+        if stringWidth(test_line, font, font_size) <= max_width:
+            line = test_line
+        else:
+            lines.append(line)
+            line = word + " "
+    if line:
+        lines.append(line)
+    return lines
+
+
+def bench_layout(recipes):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+
+    start = time.perf_counter()
+    pages = 0
+    for full in recipes:
+        laid_out = layout_section(recipe_blocks(full), A4, PDF_MARGIN, PDF_MARGIN)
+        pages += len(laid_out)
+        draw_pages(c, laid_out)
+    layout_time = time.perf_counter() - start
+
+    c.save()
+    return layout_time, pages, len(buf.getvalue())
+
+
+def bench_legacy_wrap(recipes):
+    max_width = A4[0] - 2 * PDF_MARGIN
+    start = time.perf_counter()
+    for full in recipes:
+        for text, font, font_size, _, _ in recipe_blocks(full):
+            legacy_wrap(text, max_width, font, font_size)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF-layout")
+    parser.add_argument("--recipes", type=int, default=300, help="aantal synthetische recepten")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", action="store_true", help="gebruik recepten uit recipes.db")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+    metrics.run_cli(lambda: run(args), args)
+
+
+def run(args):
+    if args.db:
+        recipes = [get_full_recipe(r["id"]) for r in get_all_recipes()]
+    else:
+        rng = random.Random(args.seed)
+        recipes = [synthetic_recipe(rng) for _ in range(args.recipes)]
+
+    word_width.cache_clear()
+    cold, pages, size = bench_layout(recipes)
+    warm, _, _ = bench_layout(recipes)
+    legacy = bench_legacy_wrap(recipes)
+    info = word_width.cache_info()
+
+    print(f"📄 {len(recipes)} recepten, {pages} pagina's, {size / 1024:.0f} KiB")
+    print(f"⏱️  Layout + tekenen (koud):  {cold * 1000:.1f} ms ({cold * 1000 / len(recipes):.2f} ms/recept)")
+    print(f"⏱️  Layout + tekenen (warm):  {warm * 1000:.1f} ms ({warm * 1000 / len(recipes):.2f} ms/recept)")
+    print(f"🐢 Oude regelafbreking (enkel meten): {legacy * 1000:.1f} ms")
+    print(f"🧮 Breedte-cache: {info.hits} hits, {info.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
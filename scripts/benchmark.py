@@ -0,0 +1,455 @@
+# scripts/benchmark.py
+"""
+Herhaalbare benchmark-suite voor de menu-engine en de importers.
+
+Draait elk entry point tegen synthetische databases (zie synth_corpus.py) en
+rapporteert latency (min/mediaan/gemiddelde) en throughput. Resultaten worden
+als JSON bewaard in benchmarks/results/ en vergeleken met de vorige run, zodat
+regressies opvallen. Benchmarks met een vast doel (TARGETS_MS) worden daar
+ook tegen getoetst.
+
+Gebruik:
+    python benchmark.py                         # 1k recepten
+    python benchmark.py --sizes 1000,10000,100000
+    python benchmark.py --only similarity_score,build_shopping_list
+    python benchmark.py --fail-on-regression    # exit 1 bij regressie of gemist doel
+    python benchmark.py --sizes 100000 --only search_recipes,search_recipes_broad
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import db
+import extract_cache
+import metrics
+import generate_menu
+import menu_pdf
+import import_json
+import search
+import snapshot
+from synth_corpus import build_database, write_json_corpus, synthetic_recipe
+
+BENCH_DIR = generate_menu.PROJECT_ROOT / "benchmarks"
+CORPUS_DIR = BENCH_DIR / "corpora"
+RESULTS_DIR = BENCH_DIR / "results"
+
+REGRESSION_THRESHOLD = 0.20  # 20% trager dan vorige run = regressie
+
+# Vaste doelen: mediaan in ms per operatie, bij elke corpusgrootte (ook 100k)
+TARGETS_MS = {
+    "search_recipes": 10.0,
+    "search_recipes_broad": 10.0,
+}
+
+
+# =========================
+# Fake Gemini
+# =========================
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGemini:
+    """
+    Vervangt zowel genai.Client (gemini_extract) als GenerativeModel (import_pdfs).
+    Antwoordt met een synthetisch recept na een vaste (gesimuleerde) latency.
+    """
+
+    def __init__(self, latency=0.0, seed=0):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.models = self
+
+    def _respond(self, wrap, images=1):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if images > 1:
+            # Batch-prompt (gemini_batch): één element per afbeelding
+            pages = [
+                {"page": i, "recipes": [synthetic_recipe(self.rng)]}
+                for i in range(1, images + 1)
+            ]
+            return FakeResponse(json.dumps({"pages": pages}, ensure_ascii=False))
+        recipe = synthetic_recipe(self.rng)
+        return FakeResponse(json.dumps({"recipes": [recipe]} if wrap else recipe, ensure_ascii=False))
+
+    def generate_content(self, contents=None, model=None, **kwargs):
+        # GenerativeModel.generate_content(parts, ...) vs client.models.generate_content(model=..., contents=...)
+        images = sum(1 for part in contents or [] if isinstance(part, dict))
+        return self._respond(wrap=model is None, images=images)
+
+
+# =========================
+# Meten
+# =========================
+def measure(fn, ops=1, max_repeat=5, budget=10.0):
+    """
+    Roept fn herhaald aan tot max_repeat of tot het tijdsbudget op is.
+    ops: aantal operaties per aanroep (voor throughput).
+    """
+    times = []
+    total_start = time.perf_counter()
+    while len(times) < max_repeat:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        times.append(time.perf_counter() - start)
+        if time.perf_counter() - total_start > budget:
+            break
+
+    median = statistics.median(times)
+    return {
+        "repeat": len(times),
+        "min_ms": min(times) * 1000 / ops,
+        "median_ms": median * 1000 / ops,
+        "mean_ms": statistics.mean(times) * 1000 / ops,
+        "ops_per_sec": ops / median if median else float("inf"),
+    }
+
+
+# Tijdelijke bestanden van één benchmark; run() ruimt ze na elke benchmark op
+_scratch = contextlib.ExitStack()
+
+
+def scratch_dir(prefix):
+    return Path(_scratch.enter_context(tempfile.TemporaryDirectory(prefix=prefix)))
+
+
+def fresh_extract_cache():
+    """Lege extractiecache in een scratch-map (CACHE_PATH wordt daarna hersteld)"""
+    _scratch.callback(setattr, extract_cache, "CACHE_PATH", extract_cache.CACHE_PATH)
+    extract_cache.CACHE_PATH = scratch_dir("bench_cache_") / "extract.db"
+    _scratch.callback(extract_cache.close_cache)
+
+
+def use_database(path):
+    db.DB_PATH = Path(path)
+    snapshot.refresh_snapshot()
+
+
+def corpus_path(size, seed):
+    path = CORPUS_DIR / f"synth_{size}_{seed}.db"
+    if not path.exists():
+        print(f"🏗️  Synthetische database bouwen: {size} recepten...")
+        build_database(path, size, seed=seed)
+    return path
+
+
+def random_menu(recipes, rng):
+    return rng.sample(recipes, 7)
+
+
+# =========================
+# Benchmarks
+# =========================
+def bench_similarity_score(size, rng):
+    recipes = rng.sample(generate_menu.get_all_recipes(), min(200, size))
+    ingredients = [generate_menu.get_scaled_ingredients(r) for r in recipes]
+    pairs = [
+        (rng.randrange(len(recipes)), rng.randrange(len(recipes)))
+        for _ in range(200)
+    ]
+
+    def run():
+        for a, b in pairs:
+            generate_menu.similarity_score(
+                ingredients[a], ingredients[b],
+                recipes[a]["title"], recipes[b]["title"],
+            )
+
+    return run, len(pairs)
+
+
+def bench_generate_week_menu(size, rng):
+    return generate_menu.generate_week_menu, 1
+
+
+def bench_generate_week_menu_dpp(size, rng):
+    # Kernel vooraf opbouwen (één keer per corpusversie); gemeten wordt de selectie
+    import dpp
+    dpp.get_kernel()
+    return (lambda: generate_menu.generate_week_menu(mode="dpp")), 1
+
+
+def bench_replace_day(size, rng):
+    recipes = generate_menu.get_all_recipes()
+    menu = random_menu(recipes, rng)
+    return (lambda: generate_menu.replace_day(rng.randrange(7), menu)), 1
+
+
+def bench_build_shopping_list(size, rng):
+    recipes = generate_menu.get_all_recipes()
+    menus = [random_menu(recipes, rng) for _ in range(20)]
+
+    def run():
+        for menu in menus:
+            generate_menu.build_shopping_list(menu)
+
+    return run, len(menus)
+
+
+def bench_generate_weekmenu_pdf(size, rng):
+    recipes = generate_menu.get_all_recipes()
+    menu = random_menu(recipes, rng)
+    target = scratch_dir("bench_pdf_") / "weekmenu.pdf"
+    return (lambda: menu_pdf.generate_weekmenu_pdf(menu, str(target))), 1
+
+
+def bench_search_recipes(size, rng):
+    queries = ["kip", "curry", "spinazie feta", "oven", "zalm broccoli", "pasta room", "ui", "xyz"]
+
+    def run():
+        for q in queries:
+            search.search_recipes(q)
+
+    return run, len(queries)
+
+
+def bench_search_recipes_broad(size, rng):
+    # Slechtste geval apart: "oven" staat in ~80% van de recepten
+    return (lambda: search.search_recipes("oven")), 1
+
+
+def bench_import_json(size, rng):
+    n_files = 100
+    json_dir = scratch_dir("bench_json_")
+    write_json_corpus(json_dir, n_files, seed=rng.randrange(1 << 30))
+
+    def run():
+        # Lege database per ronde; snapshot en TF-IDF-index komen in dezelfde scratch-map
+        previous = db.DB_PATH
+        db.DB_PATH = scratch_dir("bench_db_") / "recipes.db"
+        import_json.JSON_DIR = str(json_dir)
+        try:
+            import_json.process_all_jsons()
+        finally:
+            db.DB_PATH = previous
+
+    return run, n_files
+
+
+def bench_gemini_extract(size, rng):
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    import gemini_extract
+
+    gemini_extract.client = FakeGemini()
+    image = scratch_dir("bench_scan_") / "scan.jpeg"
+    image.write_bytes(os.urandom(64 * 1024))
+    n_images = 50
+
+    def run():
+        # Lege extractiecache per ronde: 1 miss + 49 hits op dezelfde scan
+        fresh_extract_cache()
+        for _ in range(n_images):
+            gemini_extract.extract_recipe_from_image(str(image))
+
+    return run, n_images
+
+
+def bench_import_pdfs_extract(size, rng):
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    import import_pdfs
+
+    import_pdfs.MODEL = FakeGemini()
+    folder = scratch_dir("bench_pages_")
+    images = []
+    for i in range(50):
+        image = folder / f"page_{i}.png"
+        image.write_bytes(os.urandom(64 * 1024))
+        images.append(str(image))
+
+    def run():
+        # Elke ronde een lege cache, anders meten de herhalingen enkel cache hits
+        fresh_extract_cache()
+        for path in images:
+            import_pdfs.extract_recipes_from_image(path)
+
+    return run, len(images)
+
+
+def bench_import_pdfs_batched(size, rng):
+    """Zelfde als import_pdfs_extract, maar gebundeld; 20 ms gesimuleerde latency per request."""
+    from PIL import Image
+    import import_pdfs
+
+    fake = FakeGemini(latency=0.02)
+    import_pdfs.MODEL = fake
+    folder = scratch_dir("bench_pages_")
+    images = []
+    for i in range(48):
+        path = str(folder / f"page_{i}.png")
+        Image.new("RGB", (1654, 2339), (i, rng.randrange(256), 0)).save(path)
+        images.append(path)
+
+    def run():
+        # Elke ronde een lege cache, anders meet alleen de eerste ronde iets
+        fresh_extract_cache()
+        import_pdfs.extract_recipes_from_images(images)
+
+    return run, len(images)
+
+
+BENCHMARKS = {
+    "similarity_score": bench_similarity_score,
+    "generate_week_menu": bench_generate_week_menu,
+    "generate_week_menu_dpp": bench_generate_week_menu_dpp,
+    "replace_day": bench_replace_day,
+    "build_shopping_list": bench_build_shopping_list,
+    "generate_weekmenu_pdf": bench_generate_weekmenu_pdf,
+    "search_recipes": bench_search_recipes,
+    "search_recipes_broad": bench_search_recipes_broad,
+    "import_json": bench_import_json,
+    "gemini_extract": bench_gemini_extract,
+    "import_pdfs_extract": bench_import_pdfs_extract,
+    "import_pdfs_batched": bench_import_pdfs_batched,
+}
+
+
+# =========================
+# Resultaten
+# =========================
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=BENCH_DIR.parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_result():
+    if not RESULTS_DIR.exists():
+        return None
+    files = sorted(RESULTS_DIR.glob("*.json"))
+    if not files:
+        return None
+    with open(files[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_result(results, sizes):
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    data = {
+        "timestamp": stamp,
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "results": results,
+    }
+    path = RESULTS_DIR / f"{stamp}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def find_regressions(results, previous, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    if not previous:
+        return regressions
+    for key, stats in results.items():
+        old = previous.get("results", {}).get(key)
+        if not old or "median_ms" not in old or "median_ms" not in stats:
+            continue
+        if stats["median_ms"] > old["median_ms"] * (1 + threshold):
+            regressions.append((key, old["median_ms"], stats["median_ms"]))
+    return regressions
+
+
+def find_missed_targets(results, targets=TARGETS_MS):
+    missed = []
+    for key, stats in results.items():
+        target = targets.get(key.split("[")[0])
+        if target is not None and stats.get("median_ms", 0) > target:
+            missed.append((key, target, stats["median_ms"]))
+    return missed
+
+
+# =========================
+# Main
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de menu-engine")
+    parser.add_argument("--sizes", default="1000", help="corpusgroottes, bv. 1000,10000,100000")
+    parser.add_argument("--only", help="komma-gescheiden lijst benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="maximaal aantal herhalingen")
+    parser.add_argument("--budget", type=float, default=10.0, help="tijdsbudget per benchmark (s)")
+    parser.add_argument("--no-save", action="store_true", help="resultaten niet bewaren")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"onbekende benchmarks: {', '.join(sorted(unknown))}")
+
+    metrics.run_cli(lambda: run(args, names), args)
+
+
+def run(args, names):
+    sizes = [int(s) for s in args.sizes.split(",")]
+    previous = latest_result()
+    results = {}
+
+    for size in sizes:
+        use_database(corpus_path(size, args.seed))
+        print(f"\n📊 Corpus: {size} recepten")
+        print(f"{'benchmark':<26}{'median':>12}{'min':>12}{'ops/s':>12}{'n':>4}")
+
+        for name in names:
+            rng = random.Random(args.seed)
+            key = f"{name}[{size}]"
+            try:
+                with _scratch:
+                    fn, ops = BENCHMARKS[name](size, rng)
+                    stats = measure(fn, ops=ops, max_repeat=args.repeat, budget=args.budget)
+            except ImportError as e:
+                results[key] = {"skipped": str(e)}
+                print(f"{name:<26}{'overgeslagen':>12}  ({e})")
+                continue
+
+            results[key] = stats
+            print(
+                f"{name:<26}{stats['median_ms']:>10.3f}ms{stats['min_ms']:>10.3f}ms"
+                f"{stats['ops_per_sec']:>12.1f}{stats['repeat']:>4}"
+            )
+
+    regressions = find_regressions(results, previous)
+    if regressions:
+        print("\n🐢 Regressies t.o.v. vorige run:")
+        for key, old, new in regressions:
+            print(f"- {key}: {old:.3f} ms → {new:.3f} ms ({(new / old - 1) * 100:+.0f}%)")
+    elif previous:
+        print("\n✅ Geen regressies t.o.v. vorige run")
+
+    missed = find_missed_targets(results)
+    for key, target, median in missed:
+        print(f"🎯 Doel gemist: {key}: {median:.3f} ms (doel < {target:.0f} ms)")
+
+    if not args.no_save:
+        print(f"💾 Resultaten: {save_result(results, sizes)}")
+
+    if (regressions or missed) and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
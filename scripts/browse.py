@@ -0,0 +1,186 @@
+# scripts/browse.py
+"""
+Recepten doorbladeren met keyset-paginering.
+
+Een pagina is één query op de lijstkolommen van recipes, gesorteerd op id
+of op titel (idx_recipes_title), die verdergaat na de laatste rij van de
+vorige pagina (de cursor) i.p.v. met OFFSET: elke pagina kost evenveel,
+ook op pagina 5000 van 100k recepten. Filters op tags en ingrediënten
+(canonieke namen) zijn IN-subqueries op de geïndexeerde koppeltabellen.
+
+Ingrediënten en stappen komen pas bij het openklappen van een recept
+(recipe_details), met een kleine LRU-cache per corpusversie.
+
+    python browse.py [--sort title] [--tag vegetarisch] [--ingredient spinazie] [--pages 3]
+"""
+from functools import lru_cache
+
+import db
+import metrics
+from db import reader, lookup_name_ids
+from generate_menu import parse_servings
+
+PAGE_SIZE = 20
+SORT_KEYS = ("id", "title")
+DETAIL_CACHE = 64  # opengeklapte recepten
+
+
+def _filters_sql(cur, tags, ingredients):
+    """
+    (sql, params) met één IN-subquery per tag en per ingrediënt (allemaal
+    verplicht), of None als een ingrediënt niet bestaat (lege lijst).
+    """
+    clauses, params = [], []
+    for tag in tags or ():
+        clauses.append("""
+            r.id IN (SELECT rt.recipe_id FROM recipe_tags rt
+                     JOIN tags t ON t.id = rt.tag_id WHERE t.name = ?)
+        """)
+        params.append(tag)
+    for name in ingredients or ():
+        name_ids = lookup_name_ids(cur, [name])
+        if not name_ids:
+            return None
+        clauses.append(f"""
+            r.id IN (SELECT recipe_id FROM ingredients
+                     WHERE name_id IN ({",".join("?" for _ in name_ids)}))
+        """)
+        params.extend(sorted(name_ids))
+    return "".join(f" AND {c.strip()}" for c in clauses), params
+
+
+@metrics.timed("browse.page")
+def list_recipes(after=None, sort="id", tags=None, ingredients=None, limit=PAGE_SIZE):
+    """
+    Eén pagina lijstrijen {"id", "title", "servings", "cooking_method",
+    "ingredient_count", "vegetarian"} + de cursor voor de volgende pagina
+    (None op de laatste pagina).
+    after: cursor van de vorige pagina (id, of (titel, id) bij sort="title").
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"onbekende sortering: {sort}")
+
+    with reader() as conn:
+        cur = conn.cursor()
+        filters = _filters_sql(cur, tags, ingredients)
+        if filters is None:
+            return [], None
+        filter_sql, params = filters
+
+        if sort == "id":
+            where, order = "r.id > ?", "r.id"
+            cursor_params = [after if after is not None else 0]
+        else:
+            title, last_id = after if after is not None else ("", 0)
+            # De >= vooraan laat SQLite zoeken in de index i.p.v. hem te scannen
+            where = "r.title >= ? COLLATE NOCASE AND (r.title > ? COLLATE NOCASE OR r.id > ?)"
+            order = "r.title COLLATE NOCASE, r.id"
+            cursor_params = [title, title, last_id]
+
+        # Eén rij extra: zo is zonder count(*) bekend of er nog een pagina volgt
+        cur.execute(f"""
+            SELECT r.id, r.title, r.servings, r.cooking_method, r.ingredient_count, r.vegetarian
+            FROM recipes r
+            WHERE {where}{filter_sql}
+            ORDER BY {order}
+            LIMIT ?
+        """, cursor_params + params + [limit + 1])
+        rows = cur.fetchall()
+
+    page = [
+        {
+            "id": recipe_id,
+            "title": title,
+            "servings": parse_servings(servings),
+            "cooking_method": method,
+            "ingredient_count": count,
+            "vegetarian": bool(vegetarian),
+        }
+        for recipe_id, title, servings, method, count, vegetarian in rows[:limit]
+    ]
+    if len(rows) <= limit:
+        return page, None
+    last = page[-1]
+    return page, last["id"] if sort == "id" else (last["title"], last["id"])
+
+
+# =========================
+# Details (lazy)
+# =========================
+@lru_cache(maxsize=DETAIL_CACHE)
+def _details(db_path, version, recipe_id):
+    metrics.count("browse.detail_misses")
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT n.name, i.quantity, i.unit
+            FROM ingredients i
+            JOIN ingredient_names n ON n.id = i.name_id
+            WHERE i.recipe_id = ?
+            ORDER BY i.id
+        """, (recipe_id,))
+        ingredients = cur.fetchall()
+
+        cur.execute("""
+            SELECT step_number, text FROM steps
+            WHERE recipe_id = ?
+            ORDER BY step_number
+        """, (recipe_id,))
+        steps = cur.fetchall()
+
+        cur.execute("""
+            SELECT t.name FROM recipe_tags rt
+            JOIN tags t ON t.id = rt.tag_id
+            WHERE rt.recipe_id = ?
+            ORDER BY t.name
+        """, (recipe_id,))
+        tags = [row[0] for row in cur.fetchall()]
+
+    return {"ingredients": ingredients, "steps": steps, "tags": tags}
+
+
+def recipe_details(recipe_id):
+    """
+    Ingrediënten (canonieke naam, hoeveelheid, eenheid), stappen en tags van
+    één recept. Gecachet (LRU, DETAIL_CACHE recepten) per database en
+    corpusversie: na een import worden details opnieuw gelezen.
+    """
+    with reader() as conn:
+        version = db.corpus_version(conn)
+    return _details(str(db.DB_PATH), version, recipe_id)
+
+
+def detail_cache_info():
+    return _details.cache_info()
+
+
+# =========================
+# CLI
+# =========================
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recepten doorbladeren")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="id")
+    parser.add_argument("--tag", action="append", default=[], help="alleen recepten met deze tag")
+    parser.add_argument("--ingredient", action="append", default=[], help="alleen recepten met dit ingrediënt")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=PAGE_SIZE)
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    def run():
+        cursor = None
+        for number in range(1, args.pages + 1):
+            page, cursor = list_recipes(cursor, args.sort, args.tag, args.ingredient, args.limit)
+            print(f"📖 Pagina {number}")
+            for row in page:
+                print(f"{row['id']:>6}  {row['title']}")
+            if cursor is None:
+                break
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# scripts/check_features.py
+"""
+Regressiegevallen voor hoofdeiwit, koolhydraat en vegetarisch
+(features.recipe_features), uit echte recepten in data/recipes.db die ooit
+verkeerd geclassificeerd werden. Faalt (exit 1) bij een afwijking.
+
+    python check_features.py
+"""
+import sys
+
+from features import recipe_features
+
+# (omschrijving, ingrediënten, verwachte kenmerken)
+CASES = [
+    ("hamburgerbol is brood, geen ham (recept 189)",
+     ["Portobello", "Hamburgerbol", "Vrije-uitloopei", "Geraspte belegen kaas"],
+     {"main_protein": "ei", "vegetarian": True}),
+    ("hamburger is gehakt, geen ham (recept 204)",
+     ["Bruin rozenbroodje", "Gekruide hamburger", "Piccalilly"],
+     {"main_protein": "gehakt", "vegetarian": False}),
+    ("sperziebonen zijn groente (recept 173)",
+     ["Feta", "Sperziebonen", "Quinoa", "Groentebouillon"],
+     {"main_protein": "kaas", "vegetarian": True}),
+    ("snijbonen zijn groente (recept 222)",
+     ["Snijbonen", "Noedels", "Vrije-uitloopei", "Sojasas"],
+     {"main_protein": "ei", "carb_type": "noedels", "vegetarian": True}),
+    ("kidneybonen zijn wel peulvruchten",
+     ["Kidneybonen", "Rijst", "Paprika"],
+     {"main_protein": "peulvruchten", "carb_type": "rijst", "vegetarian": True}),
+    ("vissaus is niet vegetarisch (recept 153)",
+     ["Komkommer", "Pinda's", "Limoen", "Vissaus"],
+     {"main_protein": None, "vegetarian": False}),
+    ("kippenbouillon is geen hoofdeiwit, wel vlees",
+     ["Risottorijst", "Kippenbouillonblokje", "Parmezaanse kaas"],
+     {"main_protein": None, "carb_type": "rijst", "vegetarian": False}),
+    ("groentebouillon en sojasaus zijn vegetarisch",
+     ["Tofu", "Zoutarm groentebouillonblokje", "Sojasaus"],
+     {"main_protein": "tofu", "vegetarian": True}),
+    ("paneermeel is geen paneer",
+     ["Paneermeel", "Courgette", "Aardappelen"],
+     {"main_protein": None, "carb_type": "aardappel", "vegetarian": True}),
+    ("achterham blijft varken",
+     ["Achterham", "Pitabroodje"],
+     {"main_protein": "varken", "carb_type": "brood", "vegetarian": False}),
+    ("prei is geen ei",
+     ["Prei", "Aardappelen"],
+     {"main_protein": None, "vegetarian": True}),
+]
+
+
+def main():
+    failures = 0
+    for label, ingredients, expected in CASES:
+        features = recipe_features("", ingredients)
+        wrong = {k: features[k] for k, v in expected.items() if features[k] != v}
+        if wrong:
+            failures += 1
+            print(f"❌ {label}: verwacht {expected}, kreeg {wrong}")
+    print(f"{'❌' if failures else '✅'} {len(CASES) - failures}/{len(CASES)} kenmerkgevallen in orde")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# scripts/check_startup.py
+"""
+Opstartbudget: importeert de menu-engine in een verse interpreter met
+`python -X importtime` en faalt (exit 1) als daarbij reportlab, PyMuPDF, Pillow of
+een Gemini-SDK geladen wordt, of als de import langer duurt dan het budget.
+
+Die zware modules horen enkel geladen te worden door wie ze echt gebruikt
+(menu_pdf bij PDF-export, gemini_extract/import_pdfs bij de eerste call).
+
+    python check_startup.py
+    python check_startup.py --budget-ms 150 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+
+# Modules die de app en de CLI's bij het opstarten laden
+ENGINE_MODULES = [
+    "generate_menu",
+    "search",
+    "constraints",
+    "history",
+    "ingredient_index",
+    "pantry",
+    "scoring",
+    "image_prep",
+    # Moeten zonder SDK en zonder GEMINI_API_KEY importeerbaar zijn
+    "gemini_extract",
+    "import_pdfs",
+    "batch_ocr",
+]
+
+FORBIDDEN = ["reportlab", "google.genai", "google.generativeai", "fitz", "PIL"]
+
+DEFAULT_BUDGET_MS = 250
+
+
+def import_times(modules):
+    """
+    Importeert `modules` in een subprocess met -X importtime.
+    Resultaat: (totale importtijd in ms, lijst (module, self_us, cumulative_us)).
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {', '.join(modules)}; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SCRIPT_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import mislukt:\n{result.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return float(result.stdout), rows
+
+
+def forbidden_imports(rows):
+    return sorted({
+        name for name, _, _ in rows
+        if any(name == f or name.startswith(f + ".") for f in FORBIDDEN)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Controleer de importkost van de menu-engine")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"maximale totale importtijd (standaard {DEFAULT_BUDGET_MS} ms)")
+    parser.add_argument("--top", type=int, default=10, help="toon de N traagste imports")
+    args = parser.parse_args()
+
+    try:
+        total_ms, rows = import_times(ENGINE_MODULES)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"⏱️  Importtijd menu-engine: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"- {name}: {self_us / 1000:.1f} ms ({cumulative_us / 1000:.1f} ms cumulatief)")
+
+    failed = False
+    heavy = forbidden_imports(rows)
+    if heavy:
+        print(f"❌ Zware modules geladen bij opstart: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Over budget: {total_ms:.1f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Geen reportlab/Gemini-SDK bij opstart, binnen budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# scripts/constraints.py
+"""
+Voorwaarden voor menugeneratie, vertaald naar kandidaat-id-sets in SQL
+vóór er iets gescoord wordt.
+
+constraints is een dict met (allemaal optioneel):
+    include_tags:        ["snel", ...]      recept moet al deze tags hebben
+    exclude_tags:        ["pikant", ...]    recept mag geen van deze tags hebben
+    vegetarian_days:     [0, 3]             dag-indexen die vegetarisch moeten zijn
+    max_ingredients:     12                 maximum aantal ingrediënten
+    must_use:            ["spinazie", ...]  moet ergens in de week gebruikt worden
+    exclude_ingredients: ["koriander", ...] komt in geen enkel recept voor
+
+Tags lopen via de (geïndexeerde) recipe_tags-tabel, ingrediënten via hun
+canonieke naam (lookup_name_ids, zoals browse.py): "ui" is dus niet ook
+"uitloopei", en "rode ui" niet "rode paprika" + "ui". Vegetarisch en het aantal ingrediënten komen uit
+de bij import berekende kenmerken (auto-tag "vegetarisch", kolom
+recipes.ingredient_count). Elke voorwaarde levert één id-set op; die worden
+met set-doorsnedes gecombineerd vóór er een recept geladen of gescoord wordt.
+"""
+import metrics
+from db import reader, lookup_name_ids
+from features import AUTO_TAG_VEGETARIAN
+
+
+def has_constraints(constraints):
+    return bool(constraints) and any(constraints.values())
+
+
+def get_all_tag_names():
+    """Tags die aan minstens één recept hangen, alfabetisch"""
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT t.name FROM tags t
+            WHERE EXISTS (SELECT 1 FROM recipe_tags rt WHERE rt.tag_id = t.id)
+            ORDER BY t.name
+        """)
+        return [row[0] for row in cur.fetchall()]
+
+
+# =========================
+# SQL-bouwstenen
+# =========================
+def _tags_all_sql(tags):
+    placeholders = ",".join("?" for _ in tags)
+    sql = f"""
+        SELECT rt.recipe_id FROM recipe_tags rt
+        JOIN tags t ON t.id = rt.tag_id
+        WHERE t.name IN ({placeholders})
+        GROUP BY rt.recipe_id
+        HAVING count(DISTINCT rt.tag_id) = ?
+    """
+    return sql, list(tags) + [len(set(tags))]
+
+
+def _tags_any_sql(tags):
+    placeholders = ",".join("?" for _ in tags)
+    sql = f"""
+        SELECT rt.recipe_id FROM recipe_tags rt
+        JOIN tags t ON t.id = rt.tag_id
+        WHERE t.name IN ({placeholders})
+    """
+    return sql, list(tags)
+
+
+def _ingredients_sql(name_ids):
+    placeholders = ",".join("?" for _ in name_ids)
+    sql = f"SELECT recipe_id FROM ingredients WHERE name_id IN ({placeholders})"
+    return sql, sorted(name_ids)
+
+
+def _ids(cur, sql, params):
+    cur.execute(sql, params)
+    return {row[0] for row in cur.fetchall()}
+
+
+# =========================
+# Resolve
+# =========================
+@metrics.timed("constraints.resolve")
+def resolve_constraints(constraints):
+    """
+    Elke voorwaarde wordt één geïndexeerde query die een id-set oplevert;
+    die sets worden daarna met set-operaties gecombineerd.
+
+    Resultaat: dict met
+      base:       set recept-id's die aan de week-brede voorwaarden voldoen
+      vegetarian: set vegetarische id's binnen base (of None als niet gevraagd)
+      must_use:   {ingrediënt: set id's binnen base die het bevatten}
+      unmatched:  must-use ingrediënten zonder enig recept binnen base
+                  (onbekende naam of weggefilterd door de andere voorwaarden)
+    """
+    constraints = constraints or {}
+    with reader() as conn:
+        cur = conn.cursor()
+
+        positives = []
+        include_tags = constraints.get("include_tags")
+        if include_tags:
+            positives.append(_ids(cur, *_tags_all_sql(include_tags)))
+
+        max_ingredients = constraints.get("max_ingredients")
+        if max_ingredients:
+            positives.append(_ids(
+                cur,
+                "SELECT id FROM recipes WHERE ingredient_count <= ?",
+                (int(max_ingredients),),
+            ))
+
+        if positives:
+            positives.sort(key=len)
+            base = positives[0].intersection(*positives[1:])
+        else:
+            base = _ids(cur, "SELECT id FROM recipes", ())
+
+        exclude_tags = constraints.get("exclude_tags")
+        if exclude_tags and base:
+            base -= _ids(cur, *_tags_any_sql(exclude_tags))
+
+        exclude_ingredients = constraints.get("exclude_ingredients")
+        if exclude_ingredients and base:
+            name_ids = lookup_name_ids(cur, exclude_ingredients)
+            if name_ids:
+                base -= _ids(cur, *_ingredients_sql(name_ids))
+
+        vegetarian = None
+        if constraints.get("vegetarian_days"):
+            vegetarian = base & _ids(cur, *_tags_any_sql([AUTO_TAG_VEGETARIAN]))
+
+        must_use = {}
+        for name in constraints.get("must_use") or []:
+            name_ids = lookup_name_ids(cur, [name])
+            must_use[name] = base & _ids(cur, *_ingredients_sql(name_ids)) if name_ids else set()
+
+    unmatched = [name for name, ids in must_use.items() if not ids]
+    return {"base": base, "vegetarian": vegetarian, "must_use": must_use, "unmatched": unmatched}
+
+
+def unknown_ingredients(names):
+    """Ingrediënten uit vrije invoer die geen enkele canonieke naam kennen"""
+    with reader() as conn:
+        cur = conn.cursor()
+        return [name for name in names if not lookup_name_ids(cur, [name])]
+
+
+def day_candidates(pools, constraints, day_index, remaining, unmet_must_use=()):
+    """
+    Filtert de resterende recepten voor één dag:
+    vegetarische dag → enkel vegetarisch; onvervulde must-use ingrediënten
+    → bij voorkeur een recept dat er één bevat.
+    """
+    candidates = remaining
+    if pools["vegetarian"] is not None and day_index in (constraints.get("vegetarian_days") or []):
+        candidates = [r for r in candidates if r["id"] in pools["vegetarian"]]
+
+    if unmet_must_use:
+        wanted = set().union(*(pools["must_use"][name] for name in unmet_must_use))
+        preferred = [r for r in candidates if r["id"] in wanted]
+        if preferred:
+            candidates = preferred
+
+    return candidates
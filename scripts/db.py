@@ -1,17 +1,152 @@
 # scripts/db.py
+import os
 import sqlite3
 import hashlib
+import threading
+import contextlib
 from pathlib import Path
 
+import metrics
+from features import recipe_features, feature_tags, is_auto_tag
+from ingredient_names import alias_key, canonical_name
+
 # Get script directory and build paths from there
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 DB_PATH = PROJECT_ROOT / "data" / "recipes.db"
 
 
+# =========================
+# Connection manager
+# =========================
+# Alle modules halen hun verbinding hier:
+#   with reader() as conn:       gedeelde read-only verbinding per thread
+#   with transaction() as conn:  gedeelde schrijfverbinding per thread, commit/rollback
+#   get_connection()             eigen verbinding (importers), zelf sluiten
+STATEMENT_CACHE = 512  # sqlite3-standaard is 128
+
+PRAGMAS = (
+    ("synchronous", "NORMAL"),
+    ("cache_size", -65536),       # 64 MiB page cache (negatief = KiB)
+    ("mmap_size", 268435456),     # 256 MiB memory-mapped I/O
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+_local = threading.local()
+
+
+def _count_query(statement):
+    metrics.count("db.queries")
+
+
+def _trace(conn, enabled):
+    """Query-teller enkel met metrics aan: een trace callback kost ~30% per statement"""
+    conn.set_trace_callback(_count_query if enabled else None)
+
+
+def connect(path=None, readonly=False, autocommit=False):
+    """
+    Nieuwe verbinding met de standaard-pragma's en een grotere statement cache.
+    readonly: query_only=ON (schrijven faalt).
+    autocommit: geen impliciete transacties (gebruikt door reader/transaction).
+    """
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(exist_ok=True)
+    metrics.count("db.connections")
+    conn = sqlite3.connect(
+        path,
+        cached_statements=STATEMENT_CACHE,
+        isolation_level=None if autocommit else "",
+    )
+    _trace(conn, metrics.is_enabled())
+    if not readonly:
+        conn.execute("PRAGMA journal_mode = WAL")
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
 def get_connection():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    """Eigen schrijfverbinding (voor importers en scripts); de aanroeper sluit hem."""
+    conn = connect()
+    ensure_schema(conn, DB_PATH)
+    return conn
+
+
+def ensure_schema(conn, path):
+    """Voert de migraties (tabellen, indexen, kenmerk-kolommen) één keer per database uit."""
+    key = str(path)
+    if key in _schema_ready:
+        return
+    with _schema_lock:
+        if key not in _schema_ready:
+            ensure_tables_exist(conn)
+            _schema_ready.add(key)
+
+
+def _pooled(readonly):
+    """Eén verbinding per thread, per database en per modus (lezen/schrijven)."""
+    pid = os.getpid()
+    if getattr(_local, "pid", None) != pid:
+        # Nieuwe thread, of een geforkt proces: nooit verbindingen van de ouder hergebruiken
+        _local.pid = pid
+        _local.pool = {}
+        _local.traced = {}
+
+    key = (str(DB_PATH), readonly)
+    conn = _local.pool.get(key)
+    if conn is None:
+        if key[0] not in _schema_ready:
+            with contextlib.closing(connect()) as migrate:
+                ensure_schema(migrate, DB_PATH)
+        conn = _local.pool[key] = connect(readonly=readonly, autocommit=True)
+        _local.traced[key] = metrics.is_enabled()
+    # metrics kan na het openen aan- of uitgezet zijn
+    enabled = metrics.is_enabled()
+    if _local.traced[key] != enabled:
+        _trace(conn, enabled)
+        _local.traced[key] = enabled
+    return conn
+
+
+@contextlib.contextmanager
+def reader():
+    """Gedeelde read-only verbinding van deze thread (niet sluiten)."""
+    yield _pooled(readonly=True)
+
+
+@contextlib.contextmanager
+def transaction():
+    """
+    Schrijfverbinding van deze thread binnen één transactie: commit bij
+    succes, rollback bij een exception. Geneste transaction()-blokken
+    worden deel van de buitenste.
+    """
+    conn = _pooled(readonly=False)
+    if conn.in_transaction:
+        yield conn
+        return
+
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def close_pooled():
+    """Sluit de gedeelde verbindingen van deze thread (bv. na het wisselen van DB_PATH)."""
+    for conn in getattr(_local, "pool", {}).values():
+        conn.close()
+    _local.pool = {}
+    _local.traced = {}
 
 
 def ensure_tables_exist(conn):
@@ -33,6 +168,12 @@ def ensure_tables_exist(conn):
         ON recipes(fingerprint)
     """)
 
+    # Keyset-paginering op titel (browse.py); de rowid zit impliciet in de index
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipes_title
+        ON recipes(title COLLATE NOCASE)
+    """)
+
     cur.execute("""
         CREATE TABLE IF NOT EXISTS ingredients (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -44,6 +185,11 @@ def ensure_tables_exist(conn):
         )
     """)
 
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ingredients_recipe
+        ON ingredients(recipe_id)
+    """)
+
     cur.execute("""
         CREATE TABLE IF NOT EXISTS steps (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -54,6 +200,11 @@ def ensure_tables_exist(conn):
         )
     """)
 
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_steps_recipe
+        ON steps(recipe_id, step_number)
+    """)
+
     cur.execute("""
         CREATE TABLE IF NOT EXISTS tags (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -70,7 +221,408 @@ def ensure_tables_exist(conn):
         )
     """)
 
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipe_tags_tag
+        ON recipe_tags(tag_id, recipe_id)
+    """)
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipe_tags_recipe
+        ON recipe_tags(recipe_id, tag_id)
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS menu_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            menu_id INTEGER NOT NULL,
+            profile TEXT NOT NULL DEFAULT 'default',
+            served_on TEXT NOT NULL,
+            day_index INTEGER NOT NULL,
+            recipe_id INTEGER NOT NULL,
+            FOREIGN KEY(recipe_id) REFERENCES recipes(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_menu_history_date
+        ON menu_history(profile, served_on, recipe_id)
+    """)
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_menu_history_recipe
+        ON menu_history(recipe_id, served_on)
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ingredient_names (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ingredient_aliases (
+            alias TEXT PRIMARY KEY,
+            name_id INTEGER NOT NULL,
+            FOREIGN KEY(name_id) REFERENCES ingredient_names(id)
+        ) WITHOUT ROWID
+    """)
+
+    # Geïmporteerde bronbestanden (import_json): ongewijzigde bestanden worden overgeslagen
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS import_manifest (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            sha256 TEXT NOT NULL,
+            recipes INTEGER NOT NULL DEFAULT 0,
+            imported INTEGER NOT NULL DEFAULT 0,
+            imported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+
+    # Corpusstatistiek per canoniek ingrediënt (ingredient_weights.py), versie in meta
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ingredient_weights (
+            name_id INTEGER PRIMARY KEY,
+            df INTEGER NOT NULL,
+            idf REAL NOT NULL,
+            corpus_weight REAL NOT NULL,
+            category_weight REAL NOT NULL,
+            weight REAL NOT NULL,
+            FOREIGN KEY(name_id) REFERENCES ingredient_names(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ingredient_pairs (
+            a INTEGER NOT NULL,
+            b INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            npmi REAL NOT NULL,
+            PRIMARY KEY (a, b)
+        ) WITHOUT ROWID
+    """)
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ingredient_pairs_b ON ingredient_pairs(b)")
+
+    ensure_search_index(conn)
+    ensure_feature_columns(conn)
+    ensure_ingredient_name_column(conn)
+
+    conn.commit()
+
+
+# =========================
+# Full-text search (FTS5)
+# =========================
+# Prefix-indexen: "oven"* of "peper"* hoeft dan niet alle termen samen te voegen
+SEARCH_PREFIXES = "2 3 4 5"
+
+
+def ensure_search_index(conn):
+    """
+    Maakt de FTS5-tabel recipe_search aan (rowid = recipes.id).
+    Bij een bestaande database zonder index (of met andere prefix-indexen)
+    wordt hij meteen (opnieuw) gevuld.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT sql FROM sqlite_master WHERE name = 'recipe_search'")
+    row = cur.fetchone()
+    if row:
+        if f"prefix = '{SEARCH_PREFIXES}'" in row[0]:
+            return
+        cur.execute("DROP TABLE recipe_search")
+
+    cur.execute(f"""
+        CREATE VIRTUAL TABLE recipe_search USING fts5(
+            title, subtitle, ingredients, steps,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '{SEARCH_PREFIXES}'
+        )
+    """)
+    rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Vult recipe_search opnieuw vanuit recipes, ingredients en steps."""
+    cur = conn.cursor()
+    cur.execute("DELETE FROM recipe_search")
+    cur.execute("""
+        INSERT INTO recipe_search (rowid, title, subtitle, ingredients, steps)
+        SELECT r.id, r.title, r.subtitle,
+               (SELECT group_concat(i.name, ' ') FROM ingredients i WHERE i.recipe_id = r.id),
+               (SELECT group_concat(s.text, ' ') FROM steps s WHERE s.recipe_id = r.id)
+        FROM recipes r
+    """)
+    conn.commit()
+
+
+def index_recipe_for_search(cur, recipe_id, recipe: dict):
+    cur.execute("""
+        INSERT INTO recipe_search (rowid, title, subtitle, ingredients, steps)
+        VALUES (?,?,?,?,?)
+    """, (
+        recipe_id,
+        recipe["title"],
+        recipe.get("subtitle"),
+        " ".join(ing.get("name") or "" for ing in recipe.get("ingredients", [])),
+        " ".join(step or "" for step in recipe.get("steps", [])),
+    ))
+
+
+# =========================
+# Receptkenmerken (auto-tags)
+# =========================
+FEATURE_COLUMNS = {
+    "cooking_method": "TEXT",
+    "main_protein": "TEXT",
+    "carb_type": "TEXT",
+    "pasta_count": "INTEGER",
+    "vegetable_ratio": "REAL",
+    "ingredient_count": "INTEGER",
+    "complexity": "INTEGER",
+    "vegetarian": "INTEGER",
+}
+
+
+def ensure_feature_columns(conn):
+    """
+    Voegt de kenmerk-kolommen toe aan recipes.
+    Bij een bestaande database worden ze meteen ingevuld (backfill).
+    """
+    cur = conn.cursor()
+    cur.execute("PRAGMA table_info(recipes)")
+    existing = {row[1] for row in cur.fetchall()}
+    missing = [col for col in FEATURE_COLUMNS if col not in existing]
+    for col in missing:
+        cur.execute(f"ALTER TABLE recipes ADD COLUMN {col} {FEATURE_COLUMNS[col]}")
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipes_ingredient_count
+        ON recipes(ingredient_count)
+    """)
+
+    if missing:
+        backfill_recipe_features(conn)
+
+
+def save_recipe_features(cur, recipe_id, features):
+    """Schrijft de kenmerken weg als kolommen en vervangt de automatische tags (geen commit)."""
+    cur.execute(f"""
+        UPDATE recipes
+        SET {", ".join(f"{col} = ?" for col in FEATURE_COLUMNS)}
+        WHERE id = ?
+    """, [features[col] for col in FEATURE_COLUMNS] + [recipe_id])
+
+    cur.execute("""
+        SELECT t.id, t.name FROM recipe_tags rt
+        JOIN tags t ON t.id = rt.tag_id
+        WHERE rt.recipe_id = ?
+    """, (recipe_id,))
+    stale = [tag_id for tag_id, name in cur.fetchall() if is_auto_tag(name)]
+    if stale:
+        cur.executemany(
+            "DELETE FROM recipe_tags WHERE recipe_id = ? AND tag_id = ?",
+            [(recipe_id, tag_id) for tag_id in stale],
+        )
+
+    for name in feature_tags(features):
+        cur.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,))
+        cur.execute("""
+            INSERT INTO recipe_tags (recipe_id, tag_id)
+            SELECT ?, id FROM tags WHERE name = ?
+        """, (recipe_id, name))
+
+
+@metrics.timed("db.backfill_features")
+def backfill_recipe_features(conn, only_missing=False, progress=None):
+    """
+    (Her)berekent de kenmerken van alle recepten met twee bulk-queries
+    en schrijft ze weg in één transactie.
+    only_missing: enkel recepten waarvan de kenmerken nog leeg zijn.
+    Resultaat: aantal bijgewerkte recepten.
+    """
+    cur = conn.cursor()
+    where = "WHERE r.ingredient_count IS NULL" if only_missing else ""
+    cur.execute(f"""
+        SELECT r.id, r.title,
+               (SELECT count(*) FROM steps s WHERE s.recipe_id = r.id)
+        FROM recipes r
+        {where}
+    """)
+    recipes = cur.fetchall()
+    if not recipes:
+        return 0
+
+    cur.execute("SELECT recipe_id, name FROM ingredients ORDER BY recipe_id, id")
+    names = {}
+    for recipe_id, name in cur.fetchall():
+        names.setdefault(recipe_id, []).append(name)
+
+    for done, (recipe_id, title, step_count) in enumerate(recipes, start=1):
+        features = recipe_features(title, names.get(recipe_id, []), step_count)
+        save_recipe_features(cur, recipe_id, features)
+        if progress:
+            progress(done, len(recipes))
+
+    bump_corpus_version(cur)
+    conn.commit()
+    return len(recipes)
+
+
+# =========================
+# Canonieke ingrediëntnamen (zie ingredient_names.py)
+# =========================
+def ensure_ingredient_name_column(conn):
+    """
+    Voegt ingredients.name_id toe (→ ingredient_names.id).
+    Bij een bestaande database worden alle rijen meteen gekoppeld (backfill),
+    net als rijen die nog geen name_id hebben (lege namen in oudere databases).
+    """
+    cur = conn.cursor()
+    cur.execute("PRAGMA table_info(ingredients)")
+    added = "name_id" not in {row[1] for row in cur.fetchall()}
+    if added:
+        cur.execute("ALTER TABLE ingredients ADD COLUMN name_id INTEGER REFERENCES ingredient_names(id)")
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ingredients_name
+        ON ingredients(name_id, recipe_id)
+    """)
+
+    if added:
+        backfill_ingredient_names(conn)
+    else:
+        cur.execute("SELECT 1 FROM ingredients WHERE name_id IS NULL LIMIT 1")
+        if cur.fetchone():
+            backfill_ingredient_names(conn, only_missing=True)
+
+
+def resolve_name_id(cur, raw, cache=None):
+    """
+    id van de canonieke naam voor een ruwe ingrediëntnaam; maakt naam en
+    alias aan als ze nog niet bestaan (geen commit). Elke rij krijgt een id:
+    een lege naam wordt de canonieke naam "", zodat de rij overal zichtbaar blijft.
+    cache: optionele dict alias_key → id voor bulk-werk.
+    """
+    key = alias_key(raw)
+    if cache is not None and key in cache:
+        return cache[key]
+
+    cur.execute("SELECT name_id FROM ingredient_aliases WHERE alias = ?", (key,))
+    row = cur.fetchone()
+    if row:
+        name_id = row[0]
+    else:
+        name = canonical_name(raw)
+        cur.execute("INSERT OR IGNORE INTO ingredient_names (name) VALUES (?)", (name,))
+        cur.execute("SELECT id FROM ingredient_names WHERE name = ?", (name,))
+        name_id = cur.fetchone()[0]
+        cur.execute("INSERT INTO ingredient_aliases (alias, name_id) VALUES (?, ?)", (key, name_id))
+
+    if cache is not None:
+        cache[key] = name_id
+    return name_id
+
+
+def lookup_name_ids(cur, names):
+    """
+    Read-only: set van canonieke id's voor vrije invoer (voorraadkast, zoekveld).
+    Eerst de alias-tabel, anders de canonieke vorm; onbekende namen vallen weg.
+    """
+    ids = set()
+    for raw in names:
+        cur.execute("""
+            SELECT name_id FROM ingredient_aliases WHERE alias = ?
+            UNION
+            SELECT id FROM ingredient_names WHERE name = ?
+        """, (alias_key(raw), canonical_name(raw)))
+        ids.update(row[0] for row in cur.fetchall())
+    return ids
+
+
+@metrics.timed("db.backfill_ingredient_names")
+def backfill_ingredient_names(conn, only_missing=False):
+    """
+    Koppelt ingrediëntrijen aan hun canonieke naam, per distincte ruwe naam
+    één UPDATE. only_missing: enkel rijen zonder name_id.
+    Resultaat: aantal bijgewerkte rijen.
+    """
+    cur = conn.cursor()
+    where = "WHERE name_id IS NULL" if only_missing else ""
+    cur.execute(f"SELECT DISTINCT name FROM ingredients {where}")
+    raw_names = [row[0] for row in cur.fetchall()]
+
+    cache = {}
+    updated = 0
+    for raw in raw_names:
+        name_id = resolve_name_id(cur, raw, cache)
+        cur.execute(f"""
+            UPDATE ingredients SET name_id = ?
+            WHERE name = ? {"AND name_id IS NULL" if only_missing else ""}
+        """, (name_id, raw))
+        updated += cur.rowcount
+
+    bump_corpus_version(cur)
     conn.commit()
+    return updated
+
+
+def add_ingredient_alias(conn, raw, canonical):
+    """
+    Laat een ruwe naam (en de ingrediëntrijen die hem gebruiken) voortaan naar
+    `canonical` wijzen. Resultaat: aantal omgezette ingrediëntrijen.
+    """
+    cur = conn.cursor()
+    name = canonical_name(canonical)
+    cur.execute("INSERT OR IGNORE INTO ingredient_names (name) VALUES (?)", (name,))
+    cur.execute("SELECT id FROM ingredient_names WHERE name = ?", (name,))
+    name_id = cur.fetchone()[0]
+
+    key = alias_key(raw)
+    cur.execute("""
+        INSERT INTO ingredient_aliases (alias, name_id) VALUES (?, ?)
+        ON CONFLICT(alias) DO UPDATE SET name_id = excluded.name_id
+    """, (key, name_id))
+
+    cur.execute("SELECT DISTINCT name FROM ingredients")
+    matching = [(name_id, n) for (n,) in cur.fetchall() if alias_key(n) == key]
+    cur.executemany("UPDATE ingredients SET name_id = ? WHERE name = ?", matching)
+    changed = cur.rowcount
+
+    bump_corpus_version(cur)
+    conn.commit()
+    return changed
+
+
+# =========================
+# Corpusversie (voor snapshot.py)
+# =========================
+def bump_corpus_version(cur):
+    """Verhoogt de corpusversie na elke wijziging aan recepten, ingrediënten of kenmerken."""
+    cur.execute("""
+        INSERT INTO meta (key, value) VALUES ('corpus_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    """)
+
+
+def corpus_version(conn):
+    """(versie, aantal recepten, hoogste recept-id): verandert bij elke import of backfill"""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT (SELECT value FROM meta WHERE key = 'corpus_version'),
+               (SELECT count(*) FROM recipes),
+               (SELECT max(id) FROM recipes)
+    """)
+    return tuple(v or 0 for v in cur.fetchone())
 
 
 def init_db():
@@ -102,6 +654,7 @@ def recipe_fingerprint(recipe: dict) -> str:
 # =========================
 # Insert helpers
 # =========================
+@metrics.timed("db.insert_recipe")
 def insert_recipe(conn: sqlite3.Connection, recipe: dict, source: str = "unknown"):
     cur = conn.cursor()
     fp = recipe_fingerprint(recipe)
@@ -126,13 +679,14 @@ def insert_recipe(conn: sqlite3.Connection, recipe: dict, source: str = "unknown
     for ing in recipe.get("ingredients", []):
         cur.execute("""
             INSERT INTO ingredients
-            (recipe_id, name, quantity, unit)
-            VALUES (?,?,?,?)
+            (recipe_id, name, quantity, unit, name_id)
+            VALUES (?,?,?,?,?)
         """, (
             recipe_id,
             ing.get("name"),
             ing.get("quantity"),
-            ing.get("unit")
+            ing.get("unit"),
+            resolve_name_id(cur, ing.get("name"))
         ))
 
     for i, step in enumerate(recipe.get("steps", []), start=1):
@@ -142,6 +696,14 @@ def insert_recipe(conn: sqlite3.Connection, recipe: dict, source: str = "unknown
             VALUES (?,?,?)
         """, (recipe_id, i, step))
 
+    index_recipe_for_search(cur, recipe_id, recipe)
+    save_recipe_features(cur, recipe_id, recipe_features(
+        recipe["title"],
+        [ing.get("name") for ing in recipe.get("ingredients", [])],
+        len(recipe.get("steps", [])),
+    ))
+    bump_corpus_version(cur)
+
     conn.commit()
     return recipe_id
 
@@ -0,0 +1,402 @@
+# scripts/dpp.py
+"""
+Weekmenu als determinantal point process (DPP): in plaats van dag per dag
+het beste recept tegen de vorige dag te kiezen, worden 7 recepten gekozen
+die samen zo verschillend mogelijk zijn, gewogen met een kwaliteitsscore.
+
+- Kernel: elk recept is een ijle, genormaliseerde kenmerkvector (canonieke
+  ingrediënten met hun categoriegewicht, kookmethode, hoofdeiwit,
+  koolhydraatbron en titelwoorden); S = F·Fᵀ is dus cosinus-gelijkenis en
+  altijd positief semidefiniet. L = diag(q)·S·diag(q).
+- Selectie: greedy MAP met incrementele Cholesky (Chen et al., 2018). Per
+  stap één kernelrij (via de kolom-index van F) en één O(k·n)-update, dus
+  7 uit 100k recepten kost enkele milliseconden; de kernel zelf wordt één
+  keer per corpusversie opgebouwd.
+- Volgorde: de 7 gekozen recepten worden over de dagen verdeeld zodat
+  opeenvolgende dagen zo weinig mogelijk op elkaar lijken (alle 5040
+  permutaties, vegetarische dagen blijven vegetarisch).
+
+NumPy wordt pas bij gebruik geladen.
+
+    python dpp.py --weeks 20     # vergelijk met de standaard-generator
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import math
+import random
+import time
+
+import db
+import metrics
+import snapshot
+from db import reader
+from features import get_ingredient_weight
+from ingredient_weights import apply_learned_weights
+from scoring import DUTCH_STOPWORDS
+
+WEEK = 7
+
+METHOD_WEIGHT = 3.0    # zelfde kookmethode
+PROTEIN_WEIGHT = 3.0   # zelfde hoofdeiwit
+CARB_WEIGHT = 2.0      # zelfde koolhydraatbron
+TITLE_WEIGHT = 1.0     # per gedeeld titelwoord
+
+QUALITY_WEIGHT = 1.0   # log q = QUALITY_WEIGHT · (groenteaandeel + dekking met wat je hebt)
+JITTER = 0.3           # Gumbel-ruis op log q, zodat niet elke week hetzelfde menu geeft
+EPSILON = 1e-3         # regularisatie op de diagonaal (recepten zonder kenmerken)
+
+_kernel_cache = {}
+
+
+# =========================
+# Kernel
+# =========================
+def title_tokens(title):
+    return {w for w in (title or "").lower().split() if w not in DUTCH_STOPWORDS and len(w) > 2}
+
+
+class SimilarityKernel:
+    """
+    Ijle kenmerkmatrix F (n recepten × d kenmerken), rijen L2-genormaliseerd.
+    Opgeslagen als CSR (kenmerken per recept) én CSC (recepten per kenmerk),
+    zodat één rij van S = F·Fᵀ een bincount over enkele posting-lijsten is.
+    """
+
+    def __init__(self, ids, rows, cols, values, vegetable_ratio):
+        import numpy as np
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.n = len(self.ids)
+        self.vegetable_ratio = np.asarray(vegetable_ratio, dtype=np.float64)
+        self._order = np.argsort(self.ids, kind="stable")
+        self._sorted_ids = self.ids[self._order]
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=self.n))
+        self.has_features = norms > 0
+        values = values / np.where(norms > 0, norms, 1.0)[rows]
+
+        order = np.lexsort((cols, rows))
+        self.row_ptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.n), out=self.row_ptr[1:])
+        self.row_cols = cols[order]
+        self.row_vals = values[order]
+
+        n_cols = int(cols.max()) + 1 if len(cols) else 0
+        order = np.argsort(cols, kind="stable")
+        self.col_ptr = np.zeros(n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n_cols), out=self.col_ptr[1:])
+        self.col_rows = rows[order]
+        self.col_vals = values[order]
+
+    def __len__(self):
+        return self.n
+
+    def rows_of(self, recipe_ids):
+        """Kernel-rijen voor een lijst recept-id's (-1 = niet in de kernel), via searchsorted"""
+        import numpy as np
+
+        ids = np.asarray(recipe_ids, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_ids, ids).clip(0, max(self.n - 1, 0))
+        found = self._sorted_ids[pos] == ids if self.n else np.zeros(len(ids), dtype=bool)
+        return np.where(found, self._order[pos] if self.n else -1, -1)
+
+    def similarities(self, row):
+        """S[row, :] voor alle recepten (cosinus, 0..1)"""
+        import numpy as np
+
+        start, end = self.row_ptr[row], self.row_ptr[row + 1]
+        segments, weights = [], []
+        for col, value in zip(self.row_cols[start:end].tolist(), self.row_vals[start:end].tolist()):
+            lo, hi = self.col_ptr[col], self.col_ptr[col + 1]
+            segments.append(self.col_rows[lo:hi])
+            weights.append(self.col_vals[lo:hi] * value)
+        if not segments:
+            return np.zeros(self.n)
+        return np.bincount(np.concatenate(segments), weights=np.concatenate(weights), minlength=self.n)
+
+    def submatrix(self, rows):
+        """Dichte S voor een handvol rijen (bv. het gekozen menu)"""
+        import numpy as np
+
+        rows = list(rows)
+        return np.array([self.similarities(r)[rows] for r in rows])
+
+
+def _kernel_from_snapshot(snap):
+    """Gevectoriseerd uit de CSR-arrays van de snapshot"""
+    import numpy as np
+
+    n = len(snap)
+    names = snap.names
+    name_weights = np.array([get_ingredient_weight(name) for name in names], dtype=np.float64)
+    counts = np.diff(snap.ingredient_offsets)
+
+    rows = [np.repeat(np.arange(n), counts)]
+    cols = [np.asarray(snap.ingredient_ids, dtype=np.int64)]
+    vals = [name_weights[snap.ingredient_ids]]
+    offset = len(names)
+
+    for column, weight in (("cooking_method", METHOD_WEIGHT),
+                           ("main_protein", PROTEIN_WEIGHT),
+                           ("carb_type", CARB_WEIGHT)):
+        codes = np.asarray(getattr(snap, column), dtype=np.int64)
+        present = np.flatnonzero(codes >= 0)
+        rows.append(present)
+        cols.append(codes[present] + offset)
+        vals.append(np.full(len(present), weight))
+        offset += len(snap.labels[column])
+
+    token_ids = {}
+    token_rows, token_cols = [], []
+    for row, title in enumerate(snap.titles):
+        for token in title_tokens(title):
+            token_rows.append(row)
+            token_cols.append(offset + token_ids.setdefault(token, len(token_ids)))
+    rows.append(np.array(token_rows, dtype=np.int64))
+    cols.append(np.array(token_cols, dtype=np.int64))
+    vals.append(np.full(len(token_rows), TITLE_WEIGHT))
+
+    return SimilarityKernel(
+        snap.ids, np.concatenate(rows), np.concatenate(cols), np.concatenate(vals),
+        snap.vegetable_ratio,
+    )
+
+
+def _kernel_from_db():
+    """Zonder snapshot: bulk-queries via generate_menu"""
+    from generate_menu import get_all_recipes, get_ingredients_for_recipes
+
+    recipes = get_all_recipes()
+    ingredients = get_ingredients_for_recipes([r["id"] for r in recipes])
+    columns = {}
+    rows, cols, vals = [], [], []
+
+    def add(row, key, weight):
+        rows.append(row)
+        cols.append(columns.setdefault(key, len(columns)))
+        vals.append(weight)
+
+    for row, recipe in enumerate(recipes):
+        for name in ingredients.get(recipe["id"], {}):
+            add(row, ("ingrediënt", name), get_ingredient_weight(name))
+        features = recipe.get("features") or {}
+        for key, weight in (("cooking_method", METHOD_WEIGHT),
+                            ("main_protein", PROTEIN_WEIGHT),
+                            ("carb_type", CARB_WEIGHT)):
+            if features.get(key):
+                add(row, (key, features[key]), weight)
+        for token in title_tokens(recipe["title"]):
+            add(row, ("titel", token), TITLE_WEIGHT)
+
+    return SimilarityKernel(
+        [r["id"] for r in recipes], rows, cols, vals,
+        [(r.get("features") or {}).get("vegetable_ratio") or 0.0 for r in recipes],
+    )
+
+
+@metrics.timed("dpp.kernel")
+def get_kernel():
+    """Kernel over het hele corpus, gecachet per database, corpus- en gewichtenversie."""
+    with reader() as conn:
+        key = (str(db.DB_PATH), db.corpus_version(conn), apply_learned_weights())
+    kernel = _kernel_cache.get(key)
+    if kernel is None:
+        snap = snapshot.current()
+        kernel = _kernel_from_snapshot(snap) if snap is not None else _kernel_from_db()
+        _kernel_cache.clear()
+        _kernel_cache[key] = kernel
+    return kernel
+
+
+# =========================
+# Greedy MAP (incrementele Cholesky)
+# =========================
+@metrics.timed("dpp.greedy_map")
+def greedy_map(kernel, rows, quality, k=WEEK, allowed=None):
+    """
+    Kiest tot k van de kandidaat-rijen die log det(L_Y) greedy maximaliseren.
+    rows: kernel-rijen van de kandidaten; quality: q per kandidaat.
+    allowed(stap, gekozen posities) → optioneel bool-masker over de kandidaten
+    (voor vegetarische dagen / must-use); leeg masker = geen beperking.
+    Resultaat: posities in `rows`, in volgorde van keuze.
+    """
+    import numpy as np
+
+    rows = np.asarray(rows, dtype=np.int64)
+    quality = np.asarray(quality, dtype=np.float64)
+    m = len(rows)
+    k = min(k, m)
+
+    # d²_i = L_ii: residu van kandidaat i na projectie op de gekozen recepten
+    d2 = quality ** 2 * (kernel.has_features[rows] + EPSILON)
+    chol = np.zeros((k, m))
+    selected = []
+    available = np.ones(m, dtype=bool)
+
+    for step in range(k):
+        mask = available
+        if allowed is not None:
+            extra = allowed(step, selected)
+            if extra is not None and (extra & available).any():
+                mask = extra & available
+        scores = np.where(mask, d2, -np.inf)
+        j = int(np.argmax(scores))
+        if not np.isfinite(scores[j]) or scores[j] <= 0:
+            break
+        selected.append(j)
+        available[j] = False
+        if step == k - 1:
+            break
+
+        # L[j, :] = q_j · q · S[j, :] (+ ε op de diagonaal)
+        l_row = quality[j] * quality * kernel.similarities(rows[j])[rows]
+        l_row[j] += quality[j] ** 2 * EPSILON
+        e = (l_row - chol[:step, j] @ chol[:step]) / math.sqrt(d2[j])
+        chol[step] = e
+        d2 = np.maximum(d2 - e ** 2, 0.0)
+
+    return selected
+
+
+# =========================
+# Volgorde
+# =========================
+def order_for_contrast(similarity, fixed=None):
+    """
+    Permutatie van de gekozen recepten met de kleinste som van gelijkenis
+    tussen opeenvolgende dagen. fixed: {dag: set toegelaten posities}
+    (bv. vegetarische dagen). Brute force over n! (5040 voor een week).
+    """
+    import numpy as np
+
+    n = len(similarity)
+    perms = np.array(list(itertools.permutations(range(n))), dtype=np.int64)
+    if fixed:
+        keep = np.ones(len(perms), dtype=bool)
+        for day, positions in fixed.items():
+            if day < n and positions:
+                keep &= np.isin(perms[:, day], list(positions))
+        if keep.any():
+            perms = perms[keep]
+    cost = similarity[perms[:, :-1], perms[:, 1:]].sum(axis=1)
+    return perms[int(np.argmin(cost))].tolist()
+
+
+# =========================
+# Weekmenu
+# =========================
+@metrics.timed("menu.select_dpp")
+def select_week(candidates, coverage=None, pools=None, constraints=None, rng=random):
+    """
+    candidates: recept-dicts (na voorwaarden en geschiedenis).
+    coverage: {recipe_id: (dekking, ontbrekend)} uit ingredient_index.
+    pools/constraints: zie constraints.py; vegetarische dagen krijgen een
+    vegetarisch recept, must-use ingrediënten krijgen voorrang.
+    Resultaat: 7 recept-dicts in dagvolgorde.
+    """
+    import numpy as np
+
+    kernel = get_kernel()
+    coverage = coverage or {}
+    constraints = constraints or {}
+
+    rows = kernel.rows_of([r["id"] for r in candidates])
+    if (rows < 0).any():
+        candidates = [r for r, row in zip(candidates, rows.tolist()) if row >= 0]
+        rows = rows[rows >= 0]
+    if len(candidates) < WEEK:
+        raise Exception("❗ Minder dan 7 recepten beschikbaar")
+
+    ids = [r["id"] for r in candidates]
+    bonus = np.zeros(len(ids))
+    if coverage:
+        bonus = np.array([coverage.get(rid, (0.0, 0))[0] for rid in ids])
+    # Ruis via `rng` (standaard de random-module), zodat random.seed() reproduceerbaar blijft
+    gumbel = np.random.default_rng(rng.getrandbits(64)).gumbel(size=len(ids))
+    quality = np.exp(QUALITY_WEIGHT * (kernel.vegetable_ratio[rows] + bonus) + JITTER * gumbel)
+
+    veg_days = [d for d in constraints.get("vegetarian_days") or [] if d < WEEK]
+    vegetarian = None
+    if pools and pools.get("vegetarian") is not None and veg_days:
+        vegetarian = np.array([rid in pools["vegetarian"] for rid in ids])
+    must_use = {
+        name: np.array([rid in wanted for rid in ids])
+        for name, wanted in ((pools or {}).get("must_use") or {}).items() if wanted
+    }
+
+    def allowed(step, selected):
+        left = WEEK - step
+        if vegetarian is not None:
+            missing = len(veg_days) - int(vegetarian[selected].sum())
+            if missing >= left:
+                return vegetarian
+        unmet = [mask for mask in must_use.values() if not mask[selected].any()]
+        if unmet:
+            return np.logical_or.reduce(unmet)
+        return None
+
+    picked = greedy_map(kernel, rows, quality, WEEK, allowed)
+    if len(picked) < WEEK:
+        # Meer dan 7 identieke recepten nodig: aanvullen met de beste overblijvers
+        rest = [i for i in np.argsort(-quality).tolist() if i not in picked]
+        picked += rest[:WEEK - len(picked)]
+
+    fixed = None
+    if vegetarian is not None:
+        veg_positions = {p for p, i in enumerate(picked) if vegetarian[i]}
+        fixed = {day: veg_positions for day in veg_days}
+    order = order_for_contrast(kernel.submatrix(rows[picked].tolist()), fixed)
+    return [candidates[picked[p]] for p in order]
+
+
+# =========================
+# Vergelijking
+# =========================
+def week_stats(kernel, menu):
+    """(gem. gelijkenis over alle paren, max. gelijkenis tussen opeenvolgende dagen)"""
+    import numpy as np
+
+    sim = kernel.submatrix(kernel.rows_of([r["id"] for r in menu]).tolist())
+    pairs = sim[np.triu_indices(len(menu), k=1)]
+    adjacent = np.diag(sim, k=1)
+    return float(pairs.mean()), float(adjacent.max())
+
+
+def main():
+    from generate_menu import count_unique_vegetables, generate_week_menu
+
+    parser = argparse.ArgumentParser(description="Vergelijk DPP-selectie met de standaard-generator")
+    parser.add_argument("--weeks", type=int, default=10, help="aantal menu's per modus")
+    parser.add_argument("--seed", type=int, default=42)
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    def run():
+        kernel = get_kernel()
+        print(f"🧮 Kernel: {len(kernel)} recepten, {len(kernel.row_cols)} kenmerken")
+        for mode in ("greedy", "dpp"):
+            random.seed(args.seed)
+            stats, seconds = [], []
+            for _ in range(args.weeks):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    menu = generate_week_menu(history_weeks=0, mode=mode)
+                seconds.append(time.perf_counter() - start)
+                stats.append((*week_stats(kernel, menu), count_unique_vegetables(menu)[0]))
+            mean_pair, max_adjacent, vegetables = (sum(col) / len(stats) for col in zip(*stats))
+            print(
+                f"- {mode:<6} gem. gelijkenis {mean_pair:.3f}, max. buren {max_adjacent:.3f}, "
+                f"{vegetables:.1f} groenten, {sorted(seconds)[len(seconds) // 2] * 1000:.0f} ms/menu"
+            )
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
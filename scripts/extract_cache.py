@@ -0,0 +1,225 @@
+# scripts/extract_cache.py
+"""
+Gedeelde, content-adresseerbare cache voor Gemini-extracties
+(import_pdfs, gemini_extract/batch_ocr).
+
+Sleutel = sha256(invoerbytes) + promptversie + modelnaam. De promptversie is
+een hash van de prompttekst: past iemand een prompt aan, dan missen precies
+de entries van die prompt; de rest blijft geldig. Entries zijn
+zlib-gecomprimeerde JSON in één SQLite-bestand (_cache/extract.db) met een
+last_used-tijdstip: boven max_bytes (gecomprimeerd) verdwijnen de langst niet
+gebruikte entries eerst.
+
+    python extract_cache.py                # inhoud per model en promptversie
+    python extract_cache.py --max-mb 32    # nu inkrimpen tot 32 MB
+    python extract_cache.py --prune        # entries van oude prompts verwijderen
+    python extract_cache.py --clear
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+import metrics
+
+CACHE_PATH = Path(__file__).parent / "_cache" / "extract.db"
+MAX_MB = 256
+COMPRESS_LEVEL = 6
+
+_shared = {}
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def prompt_version(prompt: str) -> str:
+    """Korte hash van de prompttekst (witruimte aan de randen telt niet mee)"""
+    return hashlib.sha256(prompt.strip().encode("utf-8")).hexdigest()[:16]
+
+
+class ExtractionCache:
+    """get/put op (invoer-hash, promptversie, model) met LRU-eviction boven max_bytes"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_MB * 2**20):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                input_hash TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_lru ON entries(last_used)")
+
+    @staticmethod
+    def key(input_hash, version, model):
+        return content_hash(f"{input_hash}\0{version}\0{model}".encode("utf-8"))
+
+    def get(self, input_hash, version, model):
+        """Gecachet resultaat of None; een treffer wordt de meest recent gebruikte entry"""
+        key = self.key(input_hash, version, model)
+        row = self.conn.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            metrics.count("extract_cache.misses")
+            return None
+        self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.stats["hits"] += 1
+        metrics.count("extract_cache.hits")
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, input_hash, version, model, value):
+        data = zlib.compress(
+            json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            COMPRESS_LEVEL,
+        )
+        now = time.time()
+        self.conn.execute("""
+            INSERT OR REPLACE INTO entries
+            (key, input_hash, prompt_version, model, size, data, created, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (self.key(input_hash, version, model), input_hash, version, model, len(data), data, now, now))
+        self.stats["stores"] += 1
+        metrics.count("extract_cache.stores")
+        self.evict()
+
+    def total_bytes(self):
+        return self.conn.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self, max_bytes=None):
+        """Verwijdert de langst niet gebruikte entries tot de cache onder max_bytes zit"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        excess = self.total_bytes() - limit
+        if excess <= 0:
+            return 0
+
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.stats["evictions"] += len(doomed)
+        metrics.count("extract_cache.evictions", len(doomed))
+        return len(doomed)
+
+    def prune(self, current):
+        """Verwijdert entries waarvan (promptversie, model) niet in current zit"""
+        stale = [
+            (version, model)
+            for version, model in self.conn.execute(
+                "SELECT DISTINCT prompt_version, model FROM entries"
+            ).fetchall()
+            if (version, model) not in current
+        ]
+        removed = 0
+        for version, model in stale:
+            removed += self.conn.execute(
+                "DELETE FROM entries WHERE prompt_version = ? AND model = ?", (version, model)
+            ).rowcount
+        return removed
+
+    def clear(self):
+        self.conn.execute("DELETE FROM entries")
+        self.conn.execute("VACUUM")
+
+    def summary(self):
+        """[(model, promptversie, entries, bytes)], grootste eerst"""
+        return self.conn.execute("""
+            SELECT model, prompt_version, count(*), sum(size)
+            FROM entries
+            GROUP BY model, prompt_version
+            ORDER BY sum(size) DESC
+        """).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def get_cache(max_mb=None):
+    """
+    Gedeelde cache voor CACHE_PATH (opnieuw geopend als dat pad wijzigt).
+    max_mb: nieuwe limiet, meteen toegepast.
+    """
+    cache = _shared.get(str(CACHE_PATH))
+    if cache is None:
+        close_cache()
+        cache = _shared[str(CACHE_PATH)] = ExtractionCache(CACHE_PATH)
+    if max_mb is not None:
+        cache.max_bytes = int(max_mb * 2**20)
+        cache.evict()
+    return cache
+
+
+def close_cache():
+    """Sluit de gedeelde cache (bv. voor zijn map verwijderd wordt)"""
+    for cache in _shared.values():
+        cache.close()
+    _shared.clear()
+
+
+def report(cache=None):
+    cache = cache or get_cache()
+    s = cache.stats
+    print(
+        f"🗄️  Extractiecache: {s['hits']} hits, {s['misses']} misses, {s['stores']} opgeslagen, "
+        f"{s['evictions']} verwijderd (LRU); {cache.total_bytes() / 2**20:.1f} van "
+        f"{cache.max_bytes / 2**20:.1f} MB"
+    )
+
+
+# =========================
+# CLI
+# =========================
+def current_prompts():
+    """(promptversie, model) van de extractors in deze versie van de code"""
+    import gemini_extract
+    import import_pdfs
+
+    return {
+        (prompt_version(import_pdfs.PROMPT), gemini_extract.MODEL_NAME),
+        (prompt_version(gemini_extract.HELLOFRESH_PROMPT), gemini_extract.MODEL_NAME),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gedeelde cache van Gemini-extracties")
+    parser.add_argument("--max-mb", type=float, help="inkrimpen tot deze grootte (LRU)")
+    parser.add_argument("--prune", action="store_true", help="entries van gewijzigde prompts/modellen verwijderen")
+    parser.add_argument("--clear", action="store_true", help="alles verwijderen")
+    args = parser.parse_args()
+
+    cache = get_cache(args.max_mb)
+    if args.clear:
+        cache.clear()
+        print("🧹 Cache leeggemaakt")
+    if args.prune:
+        print(f"🧹 {cache.prune(current_prompts())} entries van oude prompts verwijderd")
+
+    current = current_prompts()
+    for model, version, count, size in cache.summary():
+        state = "actueel" if (version, model) in current else "oude prompt"
+        print(f"- {model} / {version} ({state}): {count} entries, {size / 2**20:.2f} MB")
+    report(cache)
+
+
+if __name__ == "__main__":
+    main()
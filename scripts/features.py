@@ -0,0 +1,286 @@
+# scripts/features.py
+"""
+Receptkenmerken: ingrediëntcategorieën, kookmethode, hoofdeiwit,
+koolhydraatbron, groenteaandeel en complexiteit.
+
+Worden bij import eenmalig per recept berekend (zie db.save_recipe_features)
+en als kolommen + tags opgeslagen, zodat scoring ze niet telkens opnieuw
+uit titels en ingrediëntnamen hoeft af te leiden.
+"""
+import re
+
+# =========================
+# Ingredient categories
+# =========================
+INGREDIENT_CATEGORIES = {
+    # Proteins (5x weight)
+    "kip": 5.0, "kipfilet": 5.0, "kippendij": 5.0, "kippenbouten": 5.0,
+    "rund": 5.0, "rundvlees": 5.0, "rundergehakt": 5.0, "biefstuk": 5.0,
+    "varken": 5.0, "varkenshaas": 5.0, "spek": 5.0, "bacon": 5.0,
+    "vis": 5.0, "zalm": 5.0, "tonijn": 5.0, "kabeljauw": 5.0,
+    "garnalen": 5.0, "garnaal": 5.0, "ei": 5.0, "eieren": 5.0,
+
+    # Vegetables (3x weight)
+    "tomaat": 3.0, "tomaten": 3.0, "ui": 3.0, "uien": 3.0,
+    "paprika": 3.0, "courgette": 3.0, "aubergine": 3.0,
+    "wortel": 3.0, "wortelen": 3.0, "broccoli": 3.0, "bloemkool": 3.0,
+    "prei": 3.0, "champignons": 3.0, "champignon": 3.0,
+    "spinazie": 3.0, "sla": 3.0, "kool": 3.0,
+
+    # Spices/pantry (0.5x weight)
+    "zout": 0.5, "peper": 0.5, "zwarte peper": 0.5,
+    "olijfolie": 0.5, "olie": 0.5, "boter": 0.5, "water": 0.5,
+    "knoflook": 0.5, "knoflookteen": 0.5,
+}
+
+# Gewichten uit de corpusstatistiek (ingredient_weights.py), {naam: gewicht};
+# leeg = enkel de vaste categorieën hierboven.
+_learned_weights = {}
+
+
+def use_learned_weights(weights):
+    """Vervangt de geladen corpusgewichten ({} schakelt ze uit)"""
+    _learned_weights.clear()
+    _learned_weights.update((name.lower(), weight) for name, weight in weights.items())
+
+
+def get_category_weight(ingredient_name):
+    """Get category weight for an ingredient (default 1.0)"""
+    name_lower = ingredient_name.lower()
+    for key, weight in INGREDIENT_CATEGORIES.items():
+        if key in name_lower:
+            return weight
+    return 1.0
+
+
+def get_ingredient_weight(ingredient_name):
+    """Gewicht uit de corpusstatistiek als die geladen is, anders de categorie"""
+    weight = _learned_weights.get(ingredient_name.lower())
+    if weight is None:
+        return get_category_weight(ingredient_name)
+    return weight
+
+
+def is_vegetable(ingredient_name):
+    """Check if an ingredient is a vegetable (weight = 3.0)"""
+    weight = get_category_weight(ingredient_name)
+    return weight == 3.0
+
+
+def calculate_vegetable_ratio(ingredients):
+    """
+    Calculate vegetable ratio for a recipe.
+    ingredients: dict of {name: quantity} or list of names
+    Returns: float between 0.0 and 1.0
+    """
+    if isinstance(ingredients, dict):
+        ingredient_names = list(ingredients.keys())
+    else:
+        ingredient_names = ingredients
+
+    if not ingredient_names:
+        return 0.0
+
+    vegetable_count = sum(1 for name in ingredient_names if is_vegetable(name))
+    return vegetable_count / len(ingredient_names)
+
+
+COOKING_METHODS = {
+    "curry": ["curry", "kerrie"],
+    "pasta": ["pasta", "spaghetti", "fusilli", "penne", "tagliatelle"],
+    "stir_fry": ["wok", "roerbak"],
+    "oven": ["oven", "ovenschotel"],
+    "grill": ["grill", "bbq", "barbecue"],
+    "soup": ["soep"],
+    "salad": ["salade"],
+    "risotto": ["risotto"],
+    "burger": ["burger"],
+}
+
+def detect_cooking_method(title):
+    """Detect cooking method from recipe title"""
+    title_lower = title.lower()
+    for method, keywords in COOKING_METHODS.items():
+        if any(kw in title_lower for kw in keywords):
+            return method
+    return None
+
+
+def calculate_complexity(ingredient_count, step_count=0):
+    """Calculate recipe complexity score"""
+    return ingredient_count + step_count
+
+
+# =========================
+# Hoofdeiwit en koolhydraten
+# =========================
+# Volgorde = prioriteit: het eerste label dat matcht is het hoofdeiwit.
+# Keywords matchen op het begin van een woord in de ingrediëntnaam (het
+# langste keyword wint: "hamburger" is gehakt, geen ham) en, voor eiwitten
+# van 3+ letters, ook achteraan een samenstelling ("achterham").
+PROTEIN_TYPES = {
+    "kip": ["kip", "kippen", "kippendij", "chicken"],
+    "gevogelte": ["kalkoen", "eend", "parelhoen"],
+    "rund": ["rund", "runder", "biefstuk", "entrecote", "rosbief", "steak", "beef"],
+    "varken": ["varken", "varkens", "spek", "bacon", "ham", "pancetta", "chorizo",
+               "worst", "salami", "gyros", "shoarma", "coppa", "prosciutto", "pork"],
+    "lam": ["lam", "lams"],
+    "gehakt": ["gehakt", "gehaktbal", "boerengehakt", "hamburger"],
+    "vis": ["vis", "zalm", "tonijn", "kabeljauw", "koolvis", "pangasius", "makreel", "ansjovis",
+            "forel", "dorade", "zeebaars", "heek", "schol", "sardine", "fish"],
+    "schaaldieren": ["garnaal", "garnalen", "mossel", "scampi", "inktvis", "oester"],
+    "ei": ["ei", "eieren", "eidooier", "uitloopei", "scharrelei"],
+    "tofu": ["tofu", "tempeh", "seitan"],
+    "peulvruchten": ["kikkererwt", "linzen", "bonen", "kidneybonen", "edamame"],
+    "kaas": ["halloumi", "feta", "geitenkaas", "mozzarella", "paneer", "ricotta"],
+}
+
+MEAT_PROTEINS = {"kip", "gevogelte", "rund", "varken", "lam", "gehakt", "vis", "schaaldieren"}
+
+CARB_TYPES = {
+    "pasta": ["pasta", "spaghetti", "penne", "fusilli", "tagliatelle", "macaroni",
+              "lasagne", "rigatoni", "orzo", "linguine", "fettuccine", "farfalle"],
+    "rijst": ["rijst", "basmati", "jasmijnrijst", "risotto"],
+    "aardappel": ["aardappel", "krieltjes", "kriel", "puree", "friet", "wedges", "gnocchi"],
+    "brood": ["brood", "tortilla", "wrap", "naan", "pita", "focaccia", "ciabatta"],
+    "noedels": ["noedel", "mie", "udon", "ramen"],
+    "granen": ["couscous", "bulgur", "quinoa", "parelcouscous", "parelgort", "freekeh"],
+}
+
+# Woorden met deze delen zijn smaakmakers, geen eiwitbron ("kippenbouillon")
+NON_PROTEIN_PARTS = ("bouillon", "fond", "saus", "kruiden")
+# ...of eindigen op iets dat geen eiwit is ("hamburgerbol", "paneermeel")
+NON_PROTEIN_ENDINGS = ("bol", "bollen", "broodje", "broodjes", "brood", "meel")
+# Groene bonen zijn groente, geen peulvrucht
+NON_PROTEIN_WORDS = {"sperziebonen", "snijbonen", "prinsessenbonen", "pronkbonen"}
+# Smaakmakers van vlees of vis ("vissaus", "kippenbouillon") maken een recept
+# niet vegetarisch, ook al zijn ze geen hoofdeiwit
+ANIMAL_FLAVOR_PARTS = ("bouillon", "fond", "saus")
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _words(names):
+    return [w for name in names for w in _WORD_RE.findall(name.lower())]
+
+
+def _is_flavoring(word):
+    return any(part in word for part in NON_PROTEIN_PARTS)
+
+
+def _is_protein_word(word):
+    return not (_is_flavoring(word) or word.endswith(NON_PROTEIN_ENDINGS) or word in NON_PROTEIN_WORDS)
+
+
+def _word_labels(word, table, compounds=False):
+    """
+    Labels van één woord: het langste keyword waarmee het begint, plus
+    (compounds) keywords van 3+ letters waarop het eindigt.
+    """
+    labels = set()
+    prefix, prefix_len = None, 0
+    for label, keywords in table.items():
+        for kw in keywords:
+            if len(kw) > prefix_len and word.startswith(kw):
+                prefix, prefix_len = label, len(kw)
+            if compounds and len(kw) >= 3 and word != kw and word.endswith(kw):
+                labels.add(label)
+    if prefix:
+        labels.add(prefix)
+    return labels
+
+
+def _first_match(words, table, compounds=False):
+    labels = set()
+    for word in words:
+        labels |= _word_labels(word, table, compounds)
+    for label in table:
+        if label in labels:
+            return label
+    return None
+
+
+def detect_main_protein(ingredient_names):
+    words = [w for w in _words(ingredient_names) if _is_protein_word(w)]
+    return _first_match(words, PROTEIN_TYPES, compounds=True)
+
+
+def has_animal_flavoring(ingredient_names):
+    """Vissaus, kippenbouillon, ...: geen hoofdeiwit, maar wel van vlees of vis"""
+    return any(
+        _word_labels(w, PROTEIN_TYPES) & MEAT_PROTEINS
+        for w in _words(ingredient_names)
+        if any(part in w for part in ANIMAL_FLAVOR_PARTS)
+    )
+
+
+def detect_carb_type(ingredient_names):
+    words = [w for w in _words(ingredient_names) if not _is_flavoring(w)]
+    return _first_match(words, CARB_TYPES)
+
+
+# Exacte ingrediëntnamen voor de pasta-penalty in similarity_score
+PASTA_NAMES = ("pasta", "spaghetti", "fusilli", "tagliatelle")
+
+
+def count_pasta(ingredient_names):
+    """Aantal PASTA_NAMES dat letterlijk als ingrediënt voorkomt"""
+    return sum(1 for name in PASTA_NAMES if name in ingredient_names)
+
+
+# =========================
+# Kenmerken per recept
+# =========================
+AUTO_TAG_VEGETARIAN = "vegetarisch"
+AUTO_TAG_VEGGIE_RICH = "groenterijk"
+AUTO_TAG_PREFIXES = ("complexiteit:", "methode:", "eiwit:", "koolhydraat:")
+
+
+def is_auto_tag(name):
+    return name in (AUTO_TAG_VEGETARIAN, AUTO_TAG_VEGGIE_RICH) or name.startswith(AUTO_TAG_PREFIXES)
+
+
+def complexity_label(complexity):
+    if complexity < 12:
+        return "eenvoudig"
+    if complexity <= 20:
+        return "gemiddeld"
+    return "uitgebreid"
+
+
+def recipe_features(title, ingredient_names, step_count=0):
+    """
+    Alle materialiseerbare kenmerken van één recept.
+    ingredient_names: lijst ruwe ingrediëntnamen
+    """
+    names = list(dict.fromkeys(
+        (name or "").lower().strip() for name in ingredient_names if name
+    ))
+    main_protein = detect_main_protein(names)
+
+    return {
+        "cooking_method": detect_cooking_method(title or ""),
+        "main_protein": main_protein,
+        "carb_type": detect_carb_type(names),
+        "pasta_count": count_pasta(names),
+        "vegetable_ratio": calculate_vegetable_ratio(names),
+        "ingredient_count": len(names),
+        "complexity": calculate_complexity(len(names), step_count),
+        "vegetarian": main_protein not in MEAT_PROTEINS and not has_animal_flavoring(names),
+    }
+
+
+def feature_tags(features):
+    """Automatische tags voor de kenmerken van een recept"""
+    tags = [f"complexiteit:{complexity_label(features['complexity'])}"]
+    if features["cooking_method"]:
+        tags.append(f"methode:{features['cooking_method']}")
+    if features["main_protein"]:
+        tags.append(f"eiwit:{features['main_protein']}")
+    if features["carb_type"]:
+        tags.append(f"koolhydraat:{features['carb_type']}")
+    if features["vegetarian"]:
+        tags.append(AUTO_TAG_VEGETARIAN)
+    if features["vegetable_ratio"] >= 0.4:
+        tags.append(AUTO_TAG_VEGGIE_RICH)
+    return tags
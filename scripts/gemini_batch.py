@@ -0,0 +1,179 @@
+# scripts/gemini_batch.py
+"""
+Meerdere pagina's/scans in één Gemini-request.
+
+Pagina's worden in volgorde gegroepeerd tot MAX_IMAGES afbeeldingen of
+MAX_TOKENS (geschatte) beeld-tokens per request. Het model antwoordt met
+{"pages": [{"page": 1, ...}, ...]}; elk resultaat gaat via het paginanummer
+terug naar zijn bron. Is het antwoord kapot of afgekapt, dan worden de
+ontbrekende pagina's opnieuw gestuurd in twee kleinere batches, tot op één
+pagina (dan met de gewone prompt voor één afbeelding).
+
+De aanroeper levert de SDK-specifieke calls (send_batch/send_single) en een
+on_result-callback die per pagina cachet, zodat een gedeeltelijk mislukte
+batch de geslaagde pagina's niet opnieuw verstuurt.
+"""
+import math
+from collections import deque
+
+import metrics
+from recipe_schema import repair_json, record
+
+MAX_IMAGES = 8           # afbeeldingen per request
+MAX_TOKENS = 16_000      # geschatte beeld-tokens per request
+TOKENS_PER_TILE = 258    # Gemini: 258 tokens per tegel van 768×768
+TILE_SIZE = 768
+
+
+def estimate_image_tokens(width, height):
+    if width <= 384 and height <= 384:
+        return TOKENS_PER_TILE
+    return math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE) * TOKENS_PER_TILE
+
+
+def make_page(key, data, mime_type, size):
+    """Eén te versturen afbeelding; key identificeert de bron (pad, scan-naam)."""
+    return {
+        "key": key,
+        "data": data,
+        "mime_type": mime_type,
+        "tokens": estimate_image_tokens(*size),
+    }
+
+
+def plan_batches(pages, max_images=MAX_IMAGES, max_tokens=MAX_TOKENS):
+    """Groepeert pagina's in volgorde; een pagina boven het tokenbudget gaat alleen."""
+    batches = []
+    batch, tokens = [], 0
+    for page in pages:
+        if batch and (len(batch) >= max_images or tokens + page["tokens"] > max_tokens):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(page)
+        tokens += page["tokens"]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# =========================
+# Prompt + antwoord
+# =========================
+def batch_prompt(prompt, n, item_key):
+    """
+    Verpakt de prompt voor één afbeelding tot een prompt voor n afbeeldingen;
+    per pagina staat het gewone resultaat onder item_key.
+    """
+    return f"""
+Je krijgt {n} afbeeldingen, in volgorde genummerd van 1 tot {n}
+(elke afbeelding wordt voorafgegaan door "Afbeelding <nummer>:").
+
+Verwerk ELKE afbeelding afzonderlijk volgens deze instructies:
+{prompt}
+
+Geef het resultaat EXCLUSIEF terug als geldig JSON in exact dit schema,
+met precies één element per afbeelding:
+
+{{
+  "pages": [
+    {{ "page": 1, "{item_key}": <resultaat voor afbeelding 1 volgens het schema hierboven> }}
+  ]
+}}
+"""
+
+
+def image_label(number):
+    return f"Afbeelding {number}:"
+
+
+def parse_batch(raw, n, item_key):
+    """
+    ({index (0-based): resultaat}, reparaties) voor de pagina's die in het
+    antwoord staan; ontbrekende pagina's ontbreken in de dict.
+    Gooit ValueError als het antwoord geen bruikbare JSON is.
+    """
+    data, repairs = repair_json(raw)
+    if not isinstance(data, dict) or not isinstance(data.get("pages"), list):
+        raise ValueError("geen 'pages'-lijst in het antwoord")
+
+    results = {}
+    for entry in data["pages"]:
+        if not isinstance(entry, dict):
+            continue
+        number = entry.get("page")
+        if isinstance(number, str) and number.isdigit():
+            number = int(number)
+        if isinstance(number, int) and 1 <= number <= n and item_key in entry:
+            results.setdefault(number - 1, entry[item_key])
+
+    if "afgekapt" in repairs and results:
+        # De laatste pagina van een afgekapt antwoord is vermoedelijk onvolledig
+        del results[max(results)]
+    return results, repairs
+
+
+# =========================
+# Uitvoeren
+# =========================
+def run_batches(pages, send_batch, send_single, on_result, item_key, clean,
+                max_images=MAX_IMAGES, max_tokens=MAX_TOKENS):
+    """
+    send_batch(pages) → ruwe tekst; send_single(page) → resultaat of None;
+    on_result(key, resultaat) per geslaagde pagina (voor de cache).
+    clean(resultaat) → (resultaat, reparaties, fouten) (recipe_schema): pagina's
+    met fouten gaan opnieuw, in een kleinere batch.
+    Resultaat: stats {"pages", "requests", "batches", "fallbacks", "failed"}.
+    """
+    stats = {"pages": len(pages), "requests": 0, "batches": 0, "fallbacks": 0, "failed": 0}
+    queue = deque(plan_batches(pages, max_images, max_tokens))
+
+    while queue:
+        batch = queue.popleft()
+        stats["requests"] += 1
+
+        if len(batch) == 1:
+            page = batch[0]
+            result = send_single(page)
+            if result is None:
+                stats["failed"] += 1
+            else:
+                on_result(page["key"], result)
+            continue
+
+        stats["batches"] += 1
+        metrics.count("gemini.batch.pages", len(batch))
+        try:
+            results, repairs = parse_batch(send_batch(batch), len(batch), item_key)
+        except Exception as e:
+            print(f"⚠️ Batch van {len(batch)} pagina's mislukt ({e}); kleiner opnieuw")
+            results, repairs = {}, []
+
+        missing = []
+        for i, page in enumerate(batch):
+            if i not in results:
+                missing.append(page)
+                continue
+            result, fixed, errors = clean(results[i])
+            if errors:
+                missing.append(page)
+                continue
+            record("repaired" if repairs or fixed else "clean")
+            on_result(page["key"], result)
+
+        if missing:
+            stats["fallbacks"] += 1
+            metrics.count("gemini.batch.fallbacks")
+            half = (len(missing) + 1) // 2
+            for part in reversed([missing[:half], missing[half:]]):
+                if part:
+                    queue.appendleft(part)
+
+    return stats
+
+
+def report(stats):
+    print(
+        f"📨 {stats['pages']} pagina's in {stats['requests']} requests "
+        f"({stats['batches']} batches, {stats['fallbacks']} keer gesplitst, "
+        f"{stats['failed']} mislukt)"
+    )
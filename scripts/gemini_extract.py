@@ -1,14 +1,34 @@
 # scripts/gemini_extract.py
 import os
-from google import genai
-from google.genai import types
-import json
 
-_api_key = os.environ.get("GEMINI_API_KEY")
-if not _api_key:
-    raise RuntimeError("GEMINI_API_KEY omgevingsvariabele is niet gezet. Gebruik: export GEMINI_API_KEY='...'")
+import metrics
+from extract_cache import content_hash, get_cache, prompt_version
+from gemini_batch import MAX_IMAGES, MAX_TOKENS, batch_prompt, image_label, run_batches
+from image_prep import MAX_SIDE, prepare_image
+from recipe_schema import clean_recipe, extract_with_retry, parse_recipe
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# genai.Client wordt pas bij de eerste extractie aangemaakt (zie get_client);
+# importeren kan dus zonder SDK of API key.
+client = None
+
+
+def require_api_key() -> str:
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY omgevingsvariabele is niet gezet. Gebruik: export GEMINI_API_KEY='...'")
+    return api_key
+
+
+def get_client():
+    global client
+    if client is None:
+        from google import genai
+
+        client = genai.Client(api_key=require_api_key())
+    return client
 
-client = genai.Client(api_key=_api_key)
 
 HELLOFRESH_PROMPT = """
 Je krijgt een foto van een HelloFresh receptkaart (Nederlands).
@@ -29,23 +49,106 @@ Extraheer de info en geef ALLEEN geldige JSON terug in deze structuur:
 
 GEEN tekst buiten de JSON. GEEN uitleg.
 """
+PROMPT_VERSION = prompt_version(HELLOFRESH_PROMPT)
+
+
+def extract_recipe_from_bytes(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
+    """
+    Recept volgens het schema (recipe_schema); kleine fouten in het antwoord
+    worden lokaal hersteld, de rest één keer gericht opnieuw gevraagd.
+    Gooit ValueError als ook dat geen geldig recept oplevert.
+    Geldige recepten gaan naar de extractiecache (sleutel: hash van de bytes).
+    """
+    input_hash = content_hash(image_bytes)
+    cached = get_cache().get(input_hash, PROMPT_VERSION, MODEL_NAME)
+    if cached is not None:
+        return cached
+
+    recipe = _extract_uncached(image_bytes, mime_type)
+    get_cache().put(input_hash, PROMPT_VERSION, MODEL_NAME, recipe)
+    return recipe
+
+
+def _extract_uncached(image_bytes: bytes, mime_type: str) -> dict:
+    from google.genai import types
+
+    image = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+
+    def send(prompt):
+        metrics.count("gemini.calls")
+        with metrics.span("gemini.generate_content"):
+            response = get_client().models.generate_content(
+                model=MODEL_NAME,
+                contents=[image, prompt],
+            )
+        return response.text
+
+    recipe, errors = extract_with_retry(send, parse_recipe, HELLOFRESH_PROMPT)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return recipe
+
+
+def extract_recipe_from_image(image_path: str, max_side: int = MAX_SIDE, crop: bool = False) -> dict:
+    """
+    Verkleint de scan eerst (image_prep); lukt dat niet (geen Pillow, onbekend
+    formaat), dan gaat het origineel mee.
+    """
+    try:
+        prepared = prepare_image(image_path, max_side=max_side, crop=crop)
+    except (ImportError, OSError):
+        metrics.count("image_prep.skipped")
+        with open(image_path, "rb") as f:
+            return extract_recipe_from_bytes(f.read())
+
+    metrics.count("image_prep.bytes_saved", prepared["original_bytes"] - prepared["bytes"])
+    return extract_recipe_from_bytes(prepared["data"], prepared["mime_type"])
+
+
+def extract_recipes_from_scans(pages, on_result, max_images=MAX_IMAGES, max_tokens=MAX_TOKENS):
+    """
+    Meerdere scans per request. pages: gemini_batch.make_page(...) met
+    voorbereide beelden; on_result(key, recept) per geslaagde scan.
+    Scans in de extractiecache gaan niet mee naar Gemini.
+    Resultaat: batch-statistieken (gemini_batch.run_batches).
+    """
+    cache = get_cache()
+    hashes = {}
+    pending = []
+    for page in pages:
+        hashes[page["key"]] = content_hash(page["data"])
+        cached = cache.get(hashes[page["key"]], PROMPT_VERSION, MODEL_NAME)
+        if cached is None:
+            pending.append(page)
+        else:
+            on_result(page["key"], cached)
 
-def extract_recipe_from_image(image_path: str) -> dict:
-    with open(image_path, "rb") as f:
-        image_bytes = f.read()
+    def store(key, recipe):
+        cache.put(hashes[key], PROMPT_VERSION, MODEL_NAME, recipe)
+        on_result(key, recipe)
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[
-            types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"),
-            HELLOFRESH_PROMPT,
-        ],
-    )
+    def send_batch(batch):
+        from google.genai import types
 
-    raw = response.text.strip()
+        contents = [batch_prompt(HELLOFRESH_PROMPT, len(batch), "recipe")]
+        for number, page in enumerate(batch, start=1):
+            contents += [
+                image_label(number),
+                types.Part.from_bytes(data=page["data"], mime_type=page["mime_type"]),
+            ]
+        metrics.count("gemini.calls")
+        with metrics.span("gemini.generate_content"):
+            response = get_client().models.generate_content(model=MODEL_NAME, contents=contents)
+        return response.text
 
-    if raw.startswith("```"):
-        raw = raw.strip("`")
-        raw = raw.replace("json", "", 1).strip()
+    def send_single(page):
+        try:
+            return _extract_uncached(page["data"], page["mime_type"])
+        except Exception as e:
+            print(f"❌ Gemini fout ({page['key']}): {e}")
+            return None
 
-    return json.loads(raw)
+    stats = run_batches(pending, send_batch, send_single, store, "recipe", clean_recipe,
+                        max_images, max_tokens)
+    stats["cached"] = len(pages) - len(pending)
+    return stats
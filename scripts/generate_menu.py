@@ -1,28 +1,38 @@
 # scripts/generate_menu.py
 
-import sqlite3
 import random
 import re
 import json
-import contextlib
+import heapq
+import threading
 
+from datetime import date
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+
+import db
+import metrics
+import snapshot
+from db import reader, lookup_name_ids
+from constraints import has_constraints, resolve_constraints, day_candidates
+from ingredient_weights import apply_learned_weights
+from history import (
+    HISTORY_WEEKS, DEFAULT_PROFILE, recent_recipe_ids, exclude_recent, save_menu, history_version,
+)
+from pantry import PANTRY_PATH, DEFAULT_PANTRY, load_pantry, save_pantry
+from scoring import similarity_score, is_similar_title, title_similarity
+from tfidf_index import get_tfidf_index
+from variety import (
+    MIN_VEGETABLE_VARIETY, popcount, get_vegetable_masks,
+    variety_bonus, feasible, repair_variety,
+)
 
-from difflib import SequenceMatcher
-
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-from reportlab.pdfbase.pdfmetrics import stringWidth
 # =========================
 # Config
 # =========================
 # Get script directory and build paths from there
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
-DB_PATH = PROJECT_ROOT / "data" / "recipes.db"
-OUTPUT_PDF = "weekmenu.pdf"
 
 TARGET_SERVINGS = 4  # 👈 standaard aantal personen
 
@@ -31,54 +41,41 @@ DAYS = [
     "Donderdag", "Vrijdag", "Zaterdag", "Zondag"
 ]
 
-PANTRY_PATH = PROJECT_ROOT / "data" / "pantry.json"
-
-DEFAULT_PANTRY = [
-    "peper", "zwarte peper", "peper en zout", "peper & zout",
-    "peper en zout (naar smaak)",
-    "zout",
-    "olijfolie", "extra vierge olijfolie", "olijfolie*",
-    "zonnebloemolie", "zonnebloemolie*",
-    "boter", "[plantaardige] boter", "plantaardige boter", "roomboter",
-    "sesamolie",
-    "water",
-]
-
-
-# =========================
-# Pantry helpers
-# =========================
-def load_pantry() -> set:
-    if PANTRY_PATH.exists():
-        try:
-            with open(PANTRY_PATH, "r", encoding="utf-8") as f:
-                items = json.load(f)
-            return {item.lower().strip() for item in items}
-        except (json.JSONDecodeError, TypeError):
-            pass
-    # Eerste keer of corrupt bestand: schrijf defaults weg
-    save_pantry(DEFAULT_PANTRY)
-    return {item.lower().strip() for item in DEFAULT_PANTRY}
+# PDF-export zit in menu_pdf.py (reportlab); pas laden bij eerste gebruik
+_PDF_NAMES = {
+    "OUTPUT_PDF", "PDF_MARGIN", "draw_wrapped_text", "menu_blocks", "shopping_blocks",
+    "recipe_blocks", "generate_weekmenu_pdf", "render_weekmenu_pdf",
+}
 
 
-def save_pantry(items: list):
-    PANTRY_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(PANTRY_PATH, "w", encoding="utf-8") as f:
-        json.dump(sorted(items), f, ensure_ascii=False, indent=2)
+def __getattr__(name):
+    if name in _PDF_NAMES:
+        import menu_pdf
+        return getattr(menu_pdf, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
+# =========================
+# Ingrediëntnamen
+# =========================
+@metrics.timed("db.get_all_ingredient_names")
 def get_all_ingredient_names() -> list:
-    with contextlib.closing(get_connection()) as conn:
+    """Canonieke namen die in minstens één recept voorkomen"""
+    with reader() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT DISTINCT lower(name) FROM ingredients ORDER BY lower(name)")
-        return [row[0].strip() for row in cur.fetchall()]
+        cur.execute("""
+            SELECT name FROM ingredient_names
+            WHERE id IN (SELECT name_id FROM ingredients)
+            ORDER BY name
+        """)
+        return [row[0] for row in cur.fetchall()]
 
 
-# =========================
-# Database helpers
-# =========================
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+def pantry_name_ids(items=None):
+    """Canonieke id's van de voorraadkast (of van `items`)"""
+    items = load_pantry() if items is None else items
+    with reader() as conn:
+        return frozenset(lookup_name_ids(conn.cursor(), items))
 
 
 # =========================
@@ -148,42 +145,99 @@ def parse_quantity(qty):
 # =========================
 # Fetch recipes
 # =========================
-def get_all_recipes():
-    with contextlib.closing(get_connection()) as conn:
+# Voorberekende kenmerken (zie features.py); ingredient_count eerst: NULL = nog niet berekend
+RECIPE_FEATURES = ("ingredient_count", "cooking_method", "carb_type", "vegetable_ratio", "main_protein",
+                   "pasta_count")
+
+
+@metrics.timed("db.get_all_recipes")
+def get_all_recipes(recipe_ids=None):
+    """
+    Alle recepten, of enkel de opgegeven id's (één query via json_each,
+    ongeacht het aantal id's). Uit de memory-mapped snapshot als die
+    actueel is (zie snapshot.py).
+    """
+    snap = snapshot.current()
+    if snap is not None:
+        return snap.recipe_dicts(recipe_ids)
+
+    with reader() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT id, title, servings FROM recipes")
+        columns = "id, title, servings, " + ", ".join(RECIPE_FEATURES)
+        if recipe_ids is None:
+            cur.execute(f"SELECT {columns} FROM recipes")
+        else:
+            cur.execute(
+                f"SELECT {columns} FROM recipes WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(recipe_ids)),),
+            )
         rows = cur.fetchall()
 
     return [
         {
             "id": r[0],
             "title": r[1],
-            "servings": parse_servings(r[2])
+            "servings": parse_servings(r[2]),
+            "features": dict(zip(RECIPE_FEATURES, r[3:])) if r[3] is not None else None,
         }
         for r in rows
     ]
 
 
+def get_recipe_titles(recipe_ids):
+    """{recipe_id: title} voor de opgegeven id's, in één query"""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return {}
+    placeholders = ",".join("?" for _ in recipe_ids)
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT id, title FROM recipes WHERE id IN ({placeholders})", recipe_ids)
+        return dict(cur.fetchall())
+
+
+@metrics.timed("db.get_ingredients")
 def get_ingredients_for_recipe(recipe_id):
-    with contextlib.closing(get_connection()) as conn:
+    with reader() as conn:
         cur = conn.cursor()
         cur.execute("""
-            SELECT name, quantity
-            FROM ingredients
-            WHERE recipe_id = ?
+            SELECT n.name, i.quantity
+            FROM ingredients i
+            JOIN ingredient_names n ON n.id = i.name_id
+            WHERE i.recipe_id = ?
         """, (recipe_id,))
         rows = cur.fetchall()
 
-    return {
-        name.lower().strip(): parse_quantity(qty)
-        for name, qty in rows
-    }
+    return {name: parse_quantity(qty) for name, qty in rows}
+
+
+@metrics.timed("db.get_ingredients_bulk")
+def get_ingredients_for_recipes(recipe_ids):
+    """{recipe_id: {naam: hoeveelheid}} voor alle opgegeven recepten, in één query"""
+    result = {recipe_id: {} for recipe_id in recipe_ids}
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT i.recipe_id, n.name, i.quantity
+            FROM ingredients i
+            JOIN ingredient_names n ON n.id = i.name_id
+            WHERE i.recipe_id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(list(result)),))
+        for recipe_id, name, qty in cur.fetchall():
+            result[recipe_id][name] = parse_quantity(qty)
+    return result
 
 
 def get_scaled_ingredients(recipe):
     """
     Geeft ingrediënten per persoon (servings-aware)
     """
+    snap = snapshot.active()
+    if snap is not None:
+        scaled = snap.scaled_ingredients(recipe["id"])
+        if scaled is not None:
+            return scaled
+
     raw = get_ingredients_for_recipe(recipe["id"])
     servings = recipe.get("servings") or TARGET_SERVINGS
     if servings < 1:
@@ -196,235 +250,148 @@ def get_scaled_ingredients(recipe):
 
 
 # =========================
-# Title similarity helpers
+# Vegetable variety tracking
 # =========================
-DUTCH_STOPWORDS = {"met", "en", "van", "in", "de", "het", "een", "voor", "op", "aan"}
-
-def normalize_title(title):
-    """Normalize title: lowercase, remove stopwords, sort words"""
-    words = title.lower().split()
-    filtered = [w for w in words if w not in DUTCH_STOPWORDS]
-    return " ".join(sorted(filtered))
-
-
-def title_similarity(a, b):
-    # Compare both original and normalized versions
-    orig_score = SequenceMatcher(None, a.lower(), b.lower()).ratio()
-    norm_score = SequenceMatcher(None, normalize_title(a), normalize_title(b)).ratio()
-    return max(orig_score, norm_score)
-
-
-def is_similar_title(title, used_titles, threshold=0.75):
-    return any(
-        title_similarity(title, used) >= threshold
-        for used in used_titles
-    )
+def count_unique_vegetables(menu):
+    """Count unique vegetables across all recipes in menu (popcount of the OR'ed bitmasks, see variety.py)"""
+    masks = get_vegetable_masks()
+    union = masks.union(menu)
+    return popcount(union), masks.names_of(union)
 
 
 # =========================
-# Ingredient similarity
+# Weekmenu generator
 # =========================
-INGREDIENT_CATEGORIES = {
-    # Proteins (5x weight)
-    "kip": 5.0, "kipfilet": 5.0, "kippendij": 5.0, "kippenbouten": 5.0,
-    "rund": 5.0, "rundvlees": 5.0, "rundergehakt": 5.0, "biefstuk": 5.0,
-    "varken": 5.0, "varkenshaas": 5.0, "spek": 5.0, "bacon": 5.0,
-    "vis": 5.0, "zalm": 5.0, "tonijn": 5.0, "kabeljauw": 5.0,
-    "garnalen": 5.0, "garnaal": 5.0, "ei": 5.0, "eieren": 5.0,
-
-    # Vegetables (3x weight)
-    "tomaat": 3.0, "tomaten": 3.0, "ui": 3.0, "uien": 3.0,
-    "paprika": 3.0, "courgette": 3.0, "aubergine": 3.0,
-    "wortel": 3.0, "wortelen": 3.0, "broccoli": 3.0, "bloemkool": 3.0,
-    "prei": 3.0, "champignons": 3.0, "champignon": 3.0,
-    "spinazie": 3.0, "sla": 3.0, "kool": 3.0,
-
-    # Spices/pantry (0.5x weight)
-    "zout": 0.5, "peper": 0.5, "zwarte peper": 0.5,
-    "olijfolie": 0.5, "olie": 0.5, "boter": 0.5, "water": 0.5,
-    "knoflook": 0.5, "knoflookteen": 0.5,
-}
+ON_HAND_START_POOL = 10  # startgerecht uit de top-N recepten qua dekking
+ON_HAND_BONUS = 10.0     # bonus bij 100% dekking met ingrediënten in huis
 
-def get_ingredient_weight(ingredient_name):
-    """Get category weight for an ingredient (default 1.0)"""
-    name_lower = ingredient_name.lower()
-    for key, weight in INGREDIENT_CATEGORIES.items():
-        if key in name_lower:
-            return weight
-    return 1.0
+# greedy: dag per dag het beste recept tegen de vorige dag
+# dpp:    de hele week in één keer, zo divers mogelijk (zie dpp.py)
+SELECTION_MODES = ("greedy", "dpp")
 
 
-def is_vegetable(ingredient_name):
-    """Check if an ingredient is a vegetable (weight = 3.0)"""
-    weight = get_ingredient_weight(ingredient_name)
-    return weight == 3.0
+def report_vegetable_variety(menu, target=MIN_VEGETABLE_VARIETY, swaps=0):
+    veg_count, vegetables = count_unique_vegetables(menu)
+    repaired = f" (na {swaps} ruil{'en' if swaps != 1 else ''})" if swaps else ""
+    if veg_count < target:
+        print(f"⚠️  Groentevariëteit laag: {veg_count}/{target} unieke groenten{repaired}")
+    else:
+        print(f"✅ Goede groentevariëteit: {veg_count} unieke groenten{repaired}")
 
 
-def calculate_vegetable_ratio(ingredients):
+@metrics.timed("menu.generate")
+def generate_week_menu(on_hand=None, constraints=None,
+                       history_weeks=HISTORY_WEEKS, profile=DEFAULT_PROFILE, mode="greedy",
+                       min_vegetables=MIN_VEGETABLE_VARIETY):
     """
-    Calculate vegetable ratio for a recipe.
-    ingredients: dict of {name: quantity} or list of names
-    Returns: float between 0.0 and 1.0
+    on_hand: optionele lijst ingrediënten die je al in huis hebt. Het
+    startgerecht komt dan uit de recepten met de beste dekking en elke
+    volgende keuze krijgt een bonus naar rato van die dekking.
+    constraints: optionele voorwaarden (zie constraints.py), vooraf
+    omgezet naar kandidaat-id's zodat enkel die recepten geladen worden.
+    history_weeks: recepten die de laatste N weken (voor dit profiel) op
+    het menu stonden worden overgeslagen (zie history.py); 0 = uit.
+    mode: "greedy" (standaard) of "dpp" (zie SELECTION_MODES).
+    min_vegetables: doel voor unieke groenten (bitmaskers, zie variety.py);
+    telt mee bij elke keuze en wordt achteraf met ruilen hersteld. 0 = uit.
     """
-    if isinstance(ingredients, dict):
-        ingredient_names = list(ingredients.keys())
+    if mode not in SELECTION_MODES:
+        raise ValueError(f"Onbekende selectiemodus: {mode}")
+    apply_learned_weights()
+
+    pools = None
+    unmet = []
+    if has_constraints(constraints):
+        pools = resolve_constraints(constraints)
+        recipes = get_all_recipes(pools["base"])
+        unmet = [name for name, ids in pools["must_use"].items() if ids]
+        for name in pools["unmatched"]:
+            print(f"⚠️ Geen recept met '{name}' binnen de voorwaarden")
     else:
-        ingredient_names = ingredients
-
-    if not ingredient_names:
-        return 0.0
+        recipes = get_all_recipes()
 
-    vegetable_count = sum(1 for name in ingredient_names if is_vegetable(name))
-    return vegetable_count / len(ingredient_names)
-
-
-COOKING_METHODS = {
-    "curry": ["curry", "kerrie"],
-    "pasta": ["pasta", "spaghetti", "fusilli", "penne", "tagliatelle"],
-    "stir_fry": ["wok", "roerbak"],
-    "oven": ["oven", "ovenschotel"],
-    "grill": ["grill", "bbq", "barbecue"],
-    "soup": ["soep"],
-    "salad": ["salade"],
-    "risotto": ["risotto"],
-    "burger": ["burger"],
-}
-
-def detect_cooking_method(title):
-    """Detect cooking method from recipe title"""
-    title_lower = title.lower()
-    for method, keywords in COOKING_METHODS.items():
-        if any(kw in title_lower for kw in keywords):
-            return method
-    return None
-
-
-def fuzzy_ingredient_matches(ing1, ing2, threshold=0.85):
-    """Find fuzzy matches between two ingredient lists"""
-    matches = []
-    used_ing2 = set()
-
-    for name1 in ing1.keys():
-        for name2 in ing2.keys():
-            if name2 in used_ing2:
-                continue
-            similarity = SequenceMatcher(None, name1, name2).ratio()
-            if similarity >= threshold:
-                matches.append((name1, name2, similarity))
-                used_ing2.add(name2)
-                break
-    return matches
-
-
-def calculate_complexity(ingredient_count, step_count=0):
-    """Calculate recipe complexity score"""
-    return ingredient_count + step_count
-
-
-def similarity_score(ing1, ing2, title1=None, title2=None):
-    score = 0
-
-    # Recipe complexity penalty (similar complexity = more similar feel)
-    complexity1 = calculate_complexity(len(ing1))
-    complexity2 = calculate_complexity(len(ing2))
-    complexity_diff = abs(complexity1 - complexity2)
-
-    # If both are complex (>12) or both simple (<6), penalize
-    if (complexity1 > 12 and complexity2 > 12) or (complexity1 < 6 and complexity2 < 6):
-        if complexity_diff < 3:
-            score -= 5  # Penalty for similar complexity level
-
-    # Exact matches with category weighting
-    shared = set(ing1.keys()) & set(ing2.keys())
-    for ing in shared:
-        weight = get_ingredient_weight(ing)
-        score += 2 * weight
-
-        q1, q2 = ing1[ing], ing2[ing]
-        if q1 > 0 and q2 > 0:
-            score += (min(q1, q2) / max(q1, q2)) * 2 * weight
-
-        # Bonus for common flavor ingredients
-        if ing in ["peterselie", "koriander", "room", "citroen"]:
-            score += 3 * weight
-
-    # Fuzzy matches with category weighting
-    remaining1 = {k: v for k, v in ing1.items() if k not in shared}
-    remaining2 = {k: v for k, v in ing2.items() if k not in shared}
-    fuzzy_matches = fuzzy_ingredient_matches(remaining1, remaining2)
-
-    for name1, name2, sim in fuzzy_matches:
-        weight = max(get_ingredient_weight(name1), get_ingredient_weight(name2))
-        score += 1.5 * sim * weight
-        q1, q2 = remaining1[name1], remaining2[name2]
-        if q1 > 0 and q2 > 0:
-            score += (min(q1, q2) / max(q1, q2)) * 1.5 * sim * weight
-
-    # Carb penalty
-    for carb in ["pasta", "spaghetti", "fusilli", "tagliatelle"]:
-        if carb in ing1:
-            score -= 1
-        if carb in ing2:
-            score -= 1
-
-    # Cooking method penalty
-    if title1 and title2:
-        method1 = detect_cooking_method(title1)
-        method2 = detect_cooking_method(title2)
-        if method1 and method2 and method1 == method2:
-            score -= 8  # Heavy penalty for same cooking method
-
-    # Vegetable-poor recipe pair penalty
-    veg_ratio1 = calculate_vegetable_ratio(ing1)
-    veg_ratio2 = calculate_vegetable_ratio(ing2)
-    LOW_VEG_THRESHOLD = 0.25  # Less than 25% vegetables
-    if veg_ratio1 < LOW_VEG_THRESHOLD and veg_ratio2 < LOW_VEG_THRESHOLD:
-        score -= 6  # Penalty for both recipes being low in vegetables
+    if len(recipes) < 7:
+        raise Exception("❗ Minder dan 7 recepten in database")
 
-    return score
+    coverage = {}
+    if on_hand:
+        from ingredient_index import on_hand_coverage
+        coverage = on_hand_coverage(on_hand)
 
+    recent = recent_recipe_ids(history_weeks, profile)
 
-# =========================
-# Vegetable variety tracking
-# =========================
-def count_unique_vegetables(menu):
-    """Count unique vegetables across all recipes in menu"""
-    unique_vegetables = set()
+    def candidates_for(day_index, remaining):
+        if pools is None:
+            return exclude_recent(remaining, recent)
+        candidates = day_candidates(pools, constraints, day_index, remaining, unmet)
+        if not candidates:
+            raise Exception(f"❗ Geen recepten voor {DAYS[day_index]} die aan de voorwaarden voldoen")
+        return exclude_recent(candidates, recent)
 
-    for recipe in menu:
-        ingredients = get_ingredients_for_recipe(recipe["id"])
-        for ingredient_name in ingredients.keys():
-            if is_vegetable(ingredient_name):
-                unique_vegetables.add(ingredient_name.lower())
+    def mark_used(recipe):
+        if unmet:
+            unmet[:] = [name for name in unmet if recipe["id"] not in pools["must_use"][name]]
 
-    return len(unique_vegetables), unique_vegetables
+    veg = get_vegetable_masks()
 
+    def finish(chosen):
+        """Groentedoel herstellen door dagen te ruilen (must-use dagen blijven staan)"""
+        swaps = 0
+        if min_vegetables and popcount(veg.union(chosen)) < min_vegetables:
+            must_use_ids = set().union(*pools["must_use"].values()) if pools else set()
+            locked = {day for day, r in enumerate(chosen) if r["id"] in must_use_ids}
 
-# =========================
-# Weekmenu generator
-# =========================
-def generate_week_menu():
-    recipes = get_all_recipes()
-    if len(recipes) < 7:
-        raise Exception("❗ Minder dan 7 recepten in database")
-
-    start = random.choice(recipes)
+            chosen, swaps = repair_variety(
+                chosen, lambda day_index: candidates_for(day_index, recipes), veg, min_vegetables, locked
+            )
+        report_vegetable_variety(chosen, min_vegetables or MIN_VEGETABLE_VARIETY, swaps)
+        return chosen
+
+    if mode == "dpp":
+        from dpp import WEEK, select_week
+        pool = exclude_recent(recipes, recent)
+        chosen = select_week(pool if len(pool) >= WEEK else recipes, coverage, pools, constraints)
+        print(f"🎯 DPP-selectie uit {len(pool)} recepten")
+        for recipe in chosen:
+            mark_used(recipe)
+        return finish(chosen)
+
+    first = candidates_for(0, recipes)
+    covered_first = [r for r in first if r["id"] in coverage]
+    if covered_first:
+        covered_first.sort(key=lambda r: (-coverage[r["id"]][0], coverage[r["id"]][1]))
+        start = random.choice(covered_first[:ON_HAND_START_POOL])
+    else:
+        start = random.choice(first)
     chosen = [start]
     used_titles = [start["title"]]
+    union = veg.mask(start["id"])
+    mark_used(start)
 
     remaining = recipes.copy()
     remaining.remove(start)
 
     print(f"🎯 Startgerecht: {start['title']}")
 
-    for _ in range(6):
+    for day_index in range(1, 7):
         last_ing = get_scaled_ingredients(chosen[-1])
         last_title = chosen[-1]["title"]
 
+        candidates = candidates_for(day_index, remaining)
+        if min_vegetables:
+            candidates = feasible(candidates, veg, union, 6 - day_index, min_vegetables)
+
         scored = []
-        for r in remaining:
+        for r in candidates:
             cand_ing = get_scaled_ingredients(r)
-            score = similarity_score(last_ing, cand_ing, last_title, r["title"])
+            score = similarity_score(
+                last_ing, cand_ing, last_title, r["title"],
+                chosen[-1].get("features"), r.get("features"),
+            )
+            if r["id"] in coverage:
+                score += ON_HAND_BONUS * coverage[r["id"]][0]
+            if min_vegetables:
+                score += variety_bonus(veg, r["id"], union, min_vegetables)
             scored.append((score, r))
 
         scored.sort(key=lambda x: x[0], reverse=True)
@@ -440,22 +407,17 @@ def generate_week_menu():
 
         chosen.append(best)
         used_titles.append(best["title"])
+        union |= veg.mask(best["id"])
+        mark_used(best)
         remaining.remove(best)
 
-    # Check vegetable variety
-    veg_count, vegetables = count_unique_vegetables(chosen)
-    MIN_VEGETABLE_VARIETY = 15
-    if veg_count < MIN_VEGETABLE_VARIETY:
-        print(f"⚠️  Groentevariëteit laag: {veg_count}/{MIN_VEGETABLE_VARIETY} unieke groenten")
-    else:
-        print(f"✅ Goede groentevariëteit: {veg_count} unieke groenten")
-
-    return chosen
+    return finish(chosen)
 
 
 # =========================
 # Shopping list (with units)
 # =========================
+@metrics.timed("menu.shopping_list")
 def build_shopping_list(menu, exclude_pantry=True):
     """
     Resultaat:
@@ -464,35 +426,46 @@ def build_shopping_list(menu, exclude_pantry=True):
         unit: hoeveelheid
       }
     }
-    exclude_pantry=True filtert voorraadkast-items uit.
+    exclude_pantry=True filtert voorraadkast-items uit (op canonieke id).
     """
-    pantry_items = load_pantry() if exclude_pantry else set()
-    shopping = defaultdict(lambda: defaultdict(float))
+    pantry_ids = pantry_name_ids() if exclude_pantry else frozenset()
+    scale_by_id = shopping_scales(menu)
 
-    # Bouw scale-factor per recipe_id
+    # Eén query voor alle ingrediënten; voorraadkast als anti-join op name_id
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT i.recipe_id, i.name_id, n.name, i.quantity, i.unit
+            FROM ingredients i
+            JOIN ingredient_names n ON n.id = i.name_id
+            WHERE i.recipe_id IN (SELECT value FROM json_each(?))
+              AND i.name_id NOT IN (SELECT value FROM json_each(?))
+        """, (json.dumps(list(scale_by_id)), json.dumps(sorted(pantry_ids))))
+        rows = cur.fetchall()
+
+    return aggregate_shopping(rows, scale_by_id)
+
+
+def shopping_scales(menu):
+    """Scale-factor per recipe_id naar TARGET_SERVINGS"""
     scale_by_id = {}
-    recipe_ids = []
     for r in menu:
         servings = r.get("servings") or TARGET_SERVINGS
         if servings < 1:
             servings = TARGET_SERVINGS
         scale_by_id[r["id"]] = TARGET_SERVINGS / servings
-        recipe_ids.append(r["id"])
+    return scale_by_id
 
-    # Eén query voor alle ingrediënten
-    placeholders = ",".join("?" for _ in recipe_ids)
-    with contextlib.closing(get_connection()) as conn:
-        cur = conn.cursor()
-        cur.execute(f"""
-            SELECT recipe_id, name, quantity, unit
-            FROM ingredients
-            WHERE recipe_id IN ({placeholders})
-        """, recipe_ids)
-        rows = cur.fetchall()
 
-    for recipe_id, name, qty, unit in rows:
-        name = name.lower().strip()
-        if pantry_items and name in pantry_items:
+def aggregate_shopping(rows, scale_by_id, pantry_ids=frozenset()):
+    """
+    Telt ingrediëntrijen (recipe_id, name_id, canonieke naam, quantity, unit)
+    op per ingrediënt en eenheid; pantry_ids worden overgeslagen.
+    """
+    shopping = defaultdict(lambda: defaultdict(float))
+
+    for recipe_id, name_id, name, qty, unit in rows:
+        if name_id in pantry_ids:
             continue
         unit = (unit or "st").lower().strip()
 
@@ -503,91 +476,243 @@ def build_shopping_list(menu, exclude_pantry=True):
 
 
 # =========================
-# Debug run
+# Replace single day (VARIATIE!)
 # =========================
-if __name__ == "__main__":
-    menu = generate_week_menu()
+REROLL_POOL = 20  # top-K kandidaten per dag, berekend tegen de huidige buren
+SIMILAR_POOL = 20  # kandidaten voor "iets helemaal anders" (minst gelijkend)
 
-    print("\n📅 Weekmenu:")
-    for i, r in enumerate(menu, start=1):
-        print(f"{i}. {r['title']} ({r['servings']} pers)")
+# Per dag: {"key", "queue", "seen", "titles", "refill"}. De key bevat de buren, voorwaarden,
+# geschiedenis-instellingen, database, corpusversie en geschiedenisversie; verandert er één
+# (een buur, een import, een bewaard menu, een nieuwe dag), dan wordt de lijst herbouwd.
+_reroll_cache = {}
+_reroll_lock = threading.Lock()
 
-    pantry = load_pantry()
-    print(f"\n🏠 Voorraadkast: {len(pantry)} items uitgesloten")
 
-    print("\n🛒 Boodschappenlijst:")
-    shopping = build_shopping_list(menu)
-    for ing, units in shopping.items():
-        for unit, qty in units.items():
-            print(f"- {ing}: {round(qty, 2)} {unit}")
+def _neighbors(day_index, menu):
+    neighbors = []
+    if day_index > 0 and menu[day_index - 1]:
+        neighbors.append(menu[day_index - 1])
+    if day_index < 6 and menu[day_index + 1]:
+        neighbors.append(menu[day_index + 1])
+    return neighbors
 
-# =========================
-# Replace single day (VARIATIE!)
-# =========================
-def replace_day(day_index, current_menu, top_n=5):
-    all_recipes = get_all_recipes()
+
+@metrics.timed("menu.rank_day")
+def rank_day_candidates(day_index, current_menu, limit=REROLL_POOL, exclude_ids=frozenset(),
+                        constraints=None, history_weeks=HISTORY_WEEKS, profile=DEFAULT_PROFILE):
+    """
+    Top-`limit` kandidaten voor één dag, gescoord tegen de buren.
+    Ingrediënten van buren en kandidaten komen uit één bulk-query.
+    Resultaat: lijst recepten, beste eerst.
+    """
+    if has_constraints(constraints):
+        pools = resolve_constraints(constraints)
+        all_recipes = day_candidates(pools, constraints, day_index, get_all_recipes(pools["base"]))
+    else:
+        all_recipes = get_all_recipes()
+    all_recipes = exclude_recent(all_recipes, recent_recipe_ids(history_weeks, profile))
 
     used_titles = {
         r["title"].lower()
         for r in current_menu
         if r is not None
     }
+    all_recipes = [
+        r for r in all_recipes
+        if r["id"] not in exclude_ids and r["title"].lower() not in used_titles
+    ]
+    if not all_recipes:
+        return []
 
-    neighbors = []
-    if day_index > 0 and current_menu[day_index - 1]:
-        neighbors.append(current_menu[day_index - 1])
-    if day_index < 6 and current_menu[day_index + 1]:
-        neighbors.append(current_menu[day_index + 1])
+    neighbors = _neighbors(day_index, current_menu)
+    if not neighbors:
+        return random.sample(all_recipes, min(limit, len(all_recipes)))
+    apply_learned_weights()
 
-    candidates = []
+    ingredients = get_ingredients_for_recipes(
+        [n["id"] for n in neighbors] + [r["id"] for r in all_recipes]
+    )
 
-    for r in all_recipes:
-        if r["title"].lower() in used_titles:
-            continue
+    def score(r):
+        return sum(
+            similarity_score(
+                ingredients[n["id"]], ingredients[r["id"]], n["title"], r["title"],
+                n.get("features"), r.get("features"),
+            )
+            for n in neighbors
+        )
 
-        score = 0
-        for n in neighbors:
-            ing1 = get_ingredients_for_recipe(n["id"])
-            ing2 = get_ingredients_for_recipe(r["id"])
-            score += similarity_score(ing1, ing2, n["title"], r["title"])
+    return heapq.nlargest(limit, all_recipes, key=score)
+
+
+def _shuffled_batches(ranked, top_n):
+    """Willekeurige volgorde binnen elke groep van top_n, groepen blijven op rangorde"""
+    order = []
+    for i in range(0, len(ranked), top_n):
+        batch = ranked[i:i + top_n]
+        random.shuffle(batch)
+        order.extend(batch)
+    return order
+
+
+def _refill(entry, day_index, menu, top_n, options):
+    # seen/titles worden gedeeld met andere callers: enkel onder het lock lezen of wijzigen
+    with _reroll_lock:
+        seen = frozenset(entry["seen"])
+    ranked = rank_day_candidates(day_index, menu, exclude_ids=seen, **options)
+    if not ranked and seen:
+        # Alles al eens getoond: opnieuw van voor af aan
+        with _reroll_lock:
+            entry["seen"].clear()
+            entry["titles"].clear()
+        ranked = rank_day_candidates(day_index, menu, **options)
+    with _reroll_lock:
+        entry["seen"].update(r["id"] for r in ranked)
+        fresh = []
+        for r in ranked:
+            title = r["title"].lower()
+            if title not in entry["titles"]:
+                entry["titles"].add(title)
+                fresh.append(r)
+        entry["queue"].extend(_shuffled_batches(fresh, top_n))
+        entry["refill"] = None
+
+
+def _start_refill(entry, day_index, menu, top_n, options):
+    thread = threading.Thread(
+        target=_refill, args=(entry, day_index, menu, top_n, options), daemon=True
+    )
+    entry["refill"] = thread
+    thread.start()
 
-        candidates.append((score, r))
 
-    if not candidates:
-        return current_menu
+@metrics.timed("menu.replace_day")
+def replace_day(day_index, current_menu, top_n=5, constraints=None,
+                history_weeks=HISTORY_WEEKS, profile=DEFAULT_PROFILE, cache=None):
+    """
+    Vervangt één dag door een van de best passende recepten t.o.v. de buren.
 
-    candidates.sort(key=lambda x: x[0], reverse=True)
-    _, chosen = random.choice(candidates[:top_n])
+    De gerangschikte top-REROLL_POOL per dag wordt bewaard in `cache`
+    (standaard gedeeld op moduleniveau; de app geeft per sessie een eigen
+    dict mee). Herhaald klikken haalt telkens het volgende recept uit die
+    lijst (O(1), geen herhalingen); raakt hij bijna leeg, dan wordt de
+    volgende top-K in de achtergrond berekend.
+    """
+    cache = _reroll_cache if cache is None else cache
+    options = {"constraints": constraints, "history_weeks": history_weeks, "profile": profile}
+    with reader() as conn:
+        versions = (str(db.DB_PATH), db.corpus_version(conn), history_version(conn))
+    key = (
+        tuple(n["id"] for n in _neighbors(day_index, current_menu)),
+        json.dumps(constraints, sort_keys=True) if has_constraints(constraints) else None,
+        history_weeks,
+        profile,
+        date.today(),
+        versions,
+    )
+
+    entry = cache.get(day_index)
+    if entry is None or entry["key"] != key:
+        metrics.count("menu.reroll_cache.miss")
+        entry = {"key": key, "queue": deque(), "seen": set(), "titles": set(), "refill": None}
+        cache[day_index] = entry
+        _refill(entry, day_index, current_menu, top_n, options)
+    else:
+        metrics.count("menu.reroll_cache.hit")
+
+    used_titles = {
+        r["title"].lower()
+        for r in current_menu
+        if r is not None
+    }
+
+    chosen = None
+    while chosen is None:
+        with _reroll_lock:
+            refill = entry["refill"]
+            if entry["queue"]:
+                candidate = entry["queue"].popleft()
+                if candidate["title"].lower() not in used_titles:
+                    chosen = candidate
+                continue
+        if refill is not None:
+            refill.join()
+        else:
+            with _reroll_lock:
+                before = len(entry["seen"])
+            _refill(entry, day_index, current_menu, top_n, options)
+            with _reroll_lock:
+                exhausted = not entry["queue"] and len(entry["seen"]) <= before
+            if exhausted:
+                break
+
+    with _reroll_lock:
+        if len(entry["queue"]) < top_n and entry["refill"] is None:
+            _start_refill(entry, day_index, current_menu, top_n, options)
+
+    if chosen is None:
+        return current_menu
 
     new_menu = current_menu.copy()
     new_menu[day_index] = chosen
     return new_menu
 
-# =========================
-# PDF helpers
-# =========================
-def draw_wrapped_text(c, text, x, y, max_width, line_height, font="Helvetica", font_size=11):
-    c.setFont(font, font_size)
-    words = text.split(" ")
-    line = ""
-
-    for word in words:
-        test_line = line + word + " "
-        if stringWidth(test_line, font, font_size) <= max_width:
-            line = test_line
-        else:
-            c.drawString(x, y, line)
-            y -= line_height
-            line = word + " "
 
-    if line:
-        c.drawString(x, y, line)
-        y -= line_height
+@metrics.timed("menu.replace_similar")
+def replace_similar(day_index, current_menu, different=False, constraints=None,
+                    history_weeks=HISTORY_WEEKS, profile=DEFAULT_PROFILE, seen=None):
+    """
+    Vervangt één dag door het recept dat het meest lijkt op het huidige
+    recept van die dag ("meer zoals dit"), of met different=True door een
+    willekeurig recept uit de SIMILAR_POOL minst gelijkende ("iets helemaal
+    anders"), volgens de TF-IDF-index (tfidf_index.py). Voorwaarden en
+    geschiedenis gelden zoals bij replace_day.
+    seen: set met de id's die voor deze dag al voorbijkwamen (wordt
+    bijgewerkt), zodat herhaald klikken niet tussen twee recepten heen en weer springt.
+    """
+    current = current_menu[day_index]
+    if current is None:
+        return replace_day(day_index, current_menu, constraints=constraints,
+                           history_weeks=history_weeks, profile=profile)
+
+    allowed = None
+    if has_constraints(constraints):
+        pools = resolve_constraints(constraints)
+        allowed = {
+            r["id"] for r in day_candidates(pools, constraints, day_index, get_all_recipes(pools["base"]))
+        }
+    seen = set() if seen is None else seen
+    seen.add(current["id"])
+    exclude = (
+        recent_recipe_ids(history_weeks, profile)
+        | {r["id"] for r in current_menu if r is not None}
+        | seen
+    )
+
+    hits = get_tfidf_index().nearest(
+        current["id"], SIMILAR_POOL, farthest=different, exclude=exclude, allowed=allowed
+    )
+    titles = get_recipe_titles([recipe_id for recipe_id, _ in hits])
+    used_titles = {r["title"].lower() for r in current_menu if r is not None}
+    options = [
+        recipe_id for recipe_id, _ in hits
+        if recipe_id in titles and titles[recipe_id].lower() not in used_titles
+    ]
+    if not options:
+        return current_menu
 
-    return y
+    chosen_id = random.choice(options) if different else options[0]
+    seen.add(chosen_id)
+    new_menu = current_menu.copy()
+    new_menu[day_index] = get_all_recipes([chosen_id])[0]
+    return new_menu
 
+# =========================
+# Volledig recept
+# =========================
+@metrics.timed("db.get_full_recipe")
 def get_full_recipe(recipe_id):
-    with contextlib.closing(get_connection()) as conn:
+    with reader() as conn:
         cur = conn.cursor()
 
         cur.execute("SELECT title, servings FROM recipes WHERE id = ?", (recipe_id,))
@@ -621,91 +746,44 @@ def get_full_recipe(recipe_id):
 
 
 # =========================
-# PDF generation
+# Debug run
 # =========================
-def generate_weekmenu_pdf(menu, filename=OUTPUT_PDF):
-    c = canvas.Canvas(filename, pagesize=A4)
-    width, height = A4
-    margin_x = 2 * cm
-    margin_y = 2 * cm
-    max_width = width - 2 * margin_x
-
-    # Page 1
-    c.setFont("Helvetica-Bold", 18)
-    c.drawString(margin_x, height - margin_y, "Weekmenu")
-
-    y = height - margin_y - 2 * cm
-    for day, recipe in zip(DAYS, menu):
-        y = draw_wrapped_text(
-            c, f"{day} – {recipe['title']}",
-            margin_x, y, max_width, 0.9 * cm, font_size=12
-        )
-    c.showPage()
+def main(args):
+    menu = generate_week_menu(history_weeks=args.history_weeks, profile=args.history_profile, mode=args.mode,
+                              min_vegetables=args.min_vegetables)
 
-    # Page 2
-    shopping = build_shopping_list(menu)
-    c.setFont("Helvetica-Bold", 18)
-    c.drawString(margin_x, height - margin_y, "Boodschappenlijst")
+    print("\n📅 Weekmenu:")
+    for i, r in enumerate(menu, start=1):
+        print(f"{i}. {r['title']} ({r['servings']} pers)")
+
+    pantry = load_pantry()
+    print(f"\n🏠 Voorraadkast: {len(pantry)} items uitgesloten")
 
-    y = height - margin_y - 2 * cm
-    for ing, units in sorted(shopping.items()):
+    print("\n🛒 Boodschappenlijst:")
+    shopping = build_shopping_list(menu)
+    for ing, units in shopping.items():
         for unit, qty in units.items():
-            line = f"{ing}: {round(qty, 2)} {unit}"
-            y = draw_wrapped_text(
-                c,
-                line,
-                margin_x,
-                y,
-                max_width,
-                0.7 * cm
-            )
+            print(f"- {ing}: {round(qty, 2)} {unit}")
 
-            if y < margin_y:
-                c.showPage()
-                y = height - margin_y
-
-    c.showPage()
-
-    # Recipes
-    for recipe in menu:
-        full = get_full_recipe(recipe["id"])
-
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(margin_x, height - margin_y, f"{full['title']} ({TARGET_SERVINGS} pers.)")
-
-        y = height - margin_y - 2 * cm
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(margin_x, y, "Ingrediënten")
-        y -= 1 * cm
-
-        scale = TARGET_SERVINGS / full["servings"]
-        for name, qty, unit in full["ingredients"]:
-            if qty:
-                try:
-                    qty = round(float(qty) * scale, 2)
-                except (ValueError, TypeError):
-                    pass
-            line = f"- {name}: {qty} {unit or ''}"
-            y = draw_wrapped_text(c, line, margin_x, y, max_width, 0.6 * cm)
-            if y < margin_y:
-                c.showPage()
-                y = height - margin_y
-
-        y -= 0.5 * cm
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(margin_x, y, "Bereiding")
-        y -= 0.8 * cm
-
-        for nr, text in full["steps"]:
-            y = draw_wrapped_text(
-                c, f"{nr}. {text}",
-                margin_x, y, max_width, 0.65 * cm
-            )
-            if y < margin_y:
-                c.showPage()
-                y = height - margin_y
+    if args.save:
+        menu_id = save_menu(menu, profile=args.history_profile)
+        print(f"\n💾 Bewaard in geschiedenis (menu {menu_id}, profiel {args.history_profile})")
 
-        c.showPage()
 
-    c.save()
-    print(f"📄 PDF gegenereerd: {filename}")
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Genereer een weekmenu")
+    # --profile is al van metrics (cProfile-uitvoer)
+    parser.add_argument("--history-profile", dest="history_profile", default=DEFAULT_PROFILE,
+                        help="profiel voor de menugeschiedenis")
+    parser.add_argument("--history-weeks", type=int, default=HISTORY_WEEKS,
+                        help="recepten van de laatste N weken niet herhalen (0 = uit)")
+    parser.add_argument("--mode", choices=SELECTION_MODES, default="greedy",
+                        help="greedy: dag per dag; dpp: de hele week zo divers mogelijk")
+    parser.add_argument("--min-vegetables", type=int, default=MIN_VEGETABLE_VARIETY,
+                        help=f"doel voor unieke groenten per week (standaard {MIN_VEGETABLE_VARIETY}, 0 = uit)")
+    parser.add_argument("--save", action="store_true", help="bewaar het menu in de geschiedenis")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+    metrics.run_cli(lambda: main(args), args)
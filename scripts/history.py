@@ -0,0 +1,123 @@
+# scripts/history.py
+"""
+Menugeschiedenis: welke recepten wanneer op het menu stonden, per profiel.
+
+generate_week_menu en replace_day laden met recent_recipe_ids() één keer de
+recepten van de laatste HISTORY_WEEKS weken (één query over de index
+(profile, served_on, recipe_id)) en sluiten die uit. De kost van het scoren
+hangt zo niet af van hoe lang de geschiedenis is.
+
+    python history.py              # laatste menu's tonen
+"""
+import sys
+from datetime import date, timedelta
+
+from db import reader, transaction
+
+HISTORY_WEEKS = 3        # recepten van de laatste N weken niet herhalen
+DEFAULT_PROFILE = "default"
+
+
+def week_start(day=None):
+    """Maandag van de week waarin day valt (standaard: vandaag)"""
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+
+# =========================
+# Schrijven
+# =========================
+def save_menu(menu, start=None, profile=DEFAULT_PROFILE):
+    """
+    Bewaart een weekmenu vanaf start (standaard: maandag van deze week).
+    Lege dagen (None) worden overgeslagen. Resultaat: menu_id.
+    """
+    start = start or week_start()
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT coalesce(max(menu_id), 0) + 1 FROM menu_history")
+        menu_id = cur.fetchone()[0]
+        cur.executemany("""
+            INSERT INTO menu_history (menu_id, profile, served_on, day_index, recipe_id)
+            VALUES (?,?,?,?,?)
+        """, [
+            (menu_id, profile, (start + timedelta(days=i)).isoformat(), i, recipe["id"])
+            for i, recipe in enumerate(menu)
+            if recipe is not None
+        ])
+    return menu_id
+
+
+# =========================
+# Lezen
+# =========================
+def recent_recipe_ids(weeks=HISTORY_WEEKS, profile=DEFAULT_PROFILE, today=None):
+    """
+    Set recept-id's die in de laatste `weeks` weken op het menu stonden,
+    inclusief al geplande dagen (een menu voor deze week telt volledig mee).
+    """
+    if not weeks:
+        return set()
+    today = today or date.today()
+    since = today - timedelta(weeks=weeks)
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT DISTINCT recipe_id FROM menu_history
+            WHERE profile = ? AND served_on > ?
+        """, (profile, since.isoformat()))
+        return {row[0] for row in cur.fetchall()}
+
+
+def history_version(conn):
+    """(hoogste menu_id, aantal rijen): verandert bij elke save_menu"""
+    cur = conn.cursor()
+    cur.execute("SELECT coalesce(max(menu_id), 0), count(*) FROM menu_history")
+    return tuple(cur.fetchone())
+
+
+def exclude_recent(candidates, recent):
+    """
+    Laat recent geserveerde recepten weg, tenzij er dan niets overblijft
+    (bv. een strenge vegetarische dag in een kleine database).
+    """
+    if not recent:
+        return candidates
+    fresh = [r for r in candidates if r["id"] not in recent]
+    return fresh or candidates
+
+
+def get_history(profile=DEFAULT_PROFILE, limit=10):
+    """
+    Laatste `limit` menu's, nieuwste eerst.
+    Resultaat: lijst van {"menu_id", "start", "days": [(served_on, title), ...]}
+    """
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT h.menu_id, h.served_on, r.title
+            FROM menu_history h
+            JOIN recipes r ON r.id = h.recipe_id
+            WHERE h.menu_id IN (
+                SELECT DISTINCT menu_id FROM menu_history
+                WHERE profile = ?
+                ORDER BY menu_id DESC
+                LIMIT ?
+            )
+            ORDER BY h.menu_id DESC, h.served_on
+        """, (profile, limit))
+        rows = cur.fetchall()
+
+    menus = {}
+    for menu_id, served_on, title in rows:
+        menu = menus.setdefault(menu_id, {"menu_id": menu_id, "start": served_on, "days": []})
+        menu["days"].append((served_on, title))
+    return list(menus.values())
+
+
+if __name__ == "__main__":
+    profile = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROFILE
+    for menu in get_history(profile):
+        print(f"\n📅 Week van {menu['start']}")
+        for served_on, title in menu["days"]:
+            print(f"- {served_on}: {title}")
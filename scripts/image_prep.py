@@ -0,0 +1,186 @@
+# scripts/image_prep.py
+"""
+Voorbewerking van scans vóór Gemini-OCR:
+
+- verkleinen tot MAX_SIDE pixels (langste zijde) en opnieuw comprimeren als JPEG;
+- optioneel witte/egale randen wegknippen (crop_margins);
+- een perceptuele hash (pHash, 256 bit) zodat dezelfde kaart die twee keer
+  gescand of gefotografeerd werd, herkend wordt (NearDuplicateIndex).
+
+Pillow en NumPy worden pas bij gebruik geladen.
+
+    python image_prep.py ../scans            # besparing + duplicaten tonen
+    python image_prep.py ../scans --max-side 1200 --crop
+"""
+import argparse
+import io
+from pathlib import Path
+
+MAX_SIDE = 1600        # langste zijde in pixels na verkleinen
+JPEG_QUALITY = 80
+CROP_THRESHOLD = 40    # verschil (0-255) met de randkleur dat als inhoud telt
+CROP_PADDING = 0.02    # marge rond de inhoud, fractie van de afmeting
+MAX_DISTANCE = 36      # Hamming-afstand (van 256 bits) voor "zelfde scan"
+
+
+# =========================
+# Verkleinen + bijsnijden
+# =========================
+def crop_margins(image, threshold=CROP_THRESHOLD, padding=CROP_PADDING):
+    """
+    Knipt een egale rand weg (kleur van de linkerbovenhoek). Laat het beeld
+    ongemoeid als de gevonden inhoud onwaarschijnlijk klein is.
+    """
+    from PIL import Image, ImageChops
+
+    gray = image.convert("L")
+    background = Image.new("L", gray.size, gray.getpixel((0, 0)))
+    mask = ImageChops.difference(gray, background).point(lambda p: 255 if p > threshold else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return image
+
+    left, top, right, bottom = bbox
+    width, height = image.size
+    if (right - left) * (bottom - top) < 0.25 * width * height:
+        return image
+
+    pad_x, pad_y = int(width * padding), int(height * padding)
+    return image.crop((
+        max(0, left - pad_x),
+        max(0, top - pad_y),
+        min(width, right + pad_x),
+        min(height, bottom + pad_y),
+    ))
+
+
+def prepare_image(path, max_side=MAX_SIDE, quality=JPEG_QUALITY, crop=False):
+    """
+    Leest een scan en geeft de verkleinde JPEG terug plus zijn pHash.
+    Resultaat: {"data", "mime_type", "original_bytes", "bytes", "size", "phash"}
+    """
+    from PIL import Image, ImageOps
+
+    path = Path(path)
+    original_bytes = path.stat().st_size
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        if crop:
+            image = crop_margins(image)
+        if max_side and max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        phash = perceptual_hash(image)
+
+    data = buffer.getvalue()
+    if len(data) >= original_bytes and path.suffix.lower() in (".jpg", ".jpeg"):
+        # Al klein genoeg: het origineel sturen is goedkoper
+        data = path.read_bytes()
+
+    return {
+        "data": data,
+        "mime_type": "image/jpeg",
+        "original_bytes": original_bytes,
+        "bytes": len(data),
+        "size": image.size,
+        "phash": phash,
+    }
+
+
+# =========================
+# Perceptuele hash
+# =========================
+def _dct_matrix(n):
+    import numpy as np
+
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def perceptual_hash(image, size=64, bits=16):
+    """
+    pHash: grijswaarden 64×64, 2D-DCT, de 16×16 laagste frequenties vergeleken
+    met hun mediaan → 256-bit int. Bestand tegen schaal, compressie en licht.
+    Receptkaarten hebben allemaal dezelfde layout; de klassieke 64-bit pHash
+    (32×32, 8×8) onderscheidt ze niet.
+    """
+    import numpy as np
+    from PIL import Image
+
+    pixels = np.asarray(image.convert("L").resize((size, size), Image.LANCZOS), dtype=np.float64)
+    dct = _dct_matrix(size)
+    low = (dct @ pixels @ dct.T)[:bits, :bits].ravel()
+    # DC-term niet meetellen voor de mediaan (overheerst de rest)
+    median = np.median(low[1:])
+    value = 0
+    for bit in (low > median).tolist():
+        value = (value << 1) | bit
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    pHash → waarde (bv. een OCR-resultaat of bestandsnaam). find() geeft de
+    dichtste bekende hash binnen max_distance, lineair gezocht (honderden scans).
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.entries = []
+
+    def add(self, phash, value):
+        self.entries.append((phash, value))
+
+    def find(self, phash):
+        best = None
+        for known, value in self.entries:
+            distance = hamming(phash, known)
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, value)
+        return best
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verklein scans en zoek dubbele scans")
+    parser.add_argument("folder", help="map met .jpeg/.jpg/.png scans")
+    parser.add_argument("--max-side", type=int, default=MAX_SIDE)
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY)
+    parser.add_argument("--crop", action="store_true", help="egale randen wegknippen")
+    parser.add_argument("--max-distance", type=int, default=MAX_DISTANCE)
+    args = parser.parse_args()
+
+    folder = Path(args.folder)
+    images = sorted(p for p in folder.iterdir() if p.suffix.lower() in (".jpeg", ".jpg", ".png"))
+    index = NearDuplicateIndex(args.max_distance)
+    original = sent = duplicates = 0
+
+    for path in images:
+        prepared = prepare_image(path, args.max_side, args.quality, args.crop)
+        original += prepared["original_bytes"]
+        sent += prepared["bytes"]
+        match = index.find(prepared["phash"])
+        if match:
+            duplicates += 1
+            print(f"🔁 {path.name} ≈ {match[1]} (afstand {match[0]})")
+        else:
+            index.add(prepared["phash"], path.name)
+
+    print(f"📉 {len(images)} scans: {original / 2**20:.1f} MB → {sent / 2**20:.1f} MB "
+          f"({1 - sent / max(original, 1):.0%} minder), {duplicates} duplicaten")
+
+
+if __name__ == "__main__":
+    main()
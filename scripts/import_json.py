@@ -1,8 +1,14 @@
 import os
+import re
 import json
+import hashlib
 from pathlib import Path
 
+import metrics
 from db import get_connection, ensure_tables_exist, insert_recipe as db_insert_recipe
+from recipe_schema import clean_recipe
+from snapshot import refresh_snapshot
+from tfidf_index import refresh_after_import as refresh_tfidf_index
 
 # =========================
 # Config
@@ -10,6 +16,7 @@ from db import get_connection, ensure_tables_exist, insert_recipe as db_insert_r
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 JSON_DIR = str(PROJECT_ROOT / "ocr")  # map met .json bestanden
+CHUNK_SIZE = 1 << 16  # tekens per read bij het streamend parsen / bytes bij het hashen
 
 
 # =========================
@@ -21,16 +28,202 @@ def get_db():
     return conn
 
 
+# =========================
+# Manifest (import_manifest)
+# =========================
+# Per bronbestand: grootte, mtime en sha256 bij de laatste geslaagde import.
+# Zelfde grootte + mtime: overslaan zonder te lezen. Anders wordt de inhoud
+# gehasht; zelfde hash (bv. na een kopie of touch): enkel de stat bijwerken.
+def manifest_key(path):
+    """Pad relatief t.o.v. het project (zo blijft het manifest geldig na verhuizen)"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(PROJECT_ROOT.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def check_manifest(cur, path):
+    """
+    (status, sha256, stat) met status "new", "changed", "unchanged" of
+    "touched" (andere stat, zelfde inhoud). sha256 is None als de stat klopt.
+    """
+    stat = os.stat(path)
+    cur.execute("SELECT size, mtime, sha256 FROM import_manifest WHERE path = ?", (manifest_key(path),))
+    row = cur.fetchone()
+    if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+        return "unchanged", None, stat
+
+    sha = file_sha256(path)
+    if row is None:
+        return "new", sha, stat
+    return ("touched" if row[2] == sha else "changed"), sha, stat
+
+
+def record_manifest(cur, path, stat, sha, recipes=None, imported=None):
+    """recipes/imported None: tellingen van de vorige import behouden (touched)"""
+    cur.execute("""
+        INSERT INTO import_manifest (path, size, mtime, sha256, recipes, imported)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+            size = excluded.size,
+            mtime = excluded.mtime,
+            sha256 = excluded.sha256,
+            recipes = coalesce(?, recipes),
+            imported = coalesce(?, imported),
+            imported_at = CURRENT_TIMESTAMP
+    """, (
+        manifest_key(path), stat.st_size, stat.st_mtime, sha,
+        recipes or 0, imported or 0, recipes, imported,
+    ))
+
+
+# =========================
+# Streaming JSON
+# =========================
+# Een {"recipes": [...]}-bestand wordt recept per recept gedecodeerd
+# (json.JSONDecoder.raw_decode op een buffer die aangevuld wordt), zodat het
+# geheugen begrensd blijft door het grootste recept i.p.v. door het bestand.
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Leest bij; minstens zoveel als al gebufferd is, zodat lange waarden lineair blijven."""
+        if self.eof:
+            return False
+        chunk = self.f.read(max(CHUNK_SIZE, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Volgend teken na witruimte ("" aan het einde)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"verwacht {' of '.join(chars)}, kreeg {char or 'einde van bestand'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Een getal aan het einde van de buffer kan nog doorlopen
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_recipes(f):
+    """
+    Recepten uit een open tekstbestand:
+    - {"recipes": [...]}: elk element, streamend
+    - [...]: elk element, streamend
+    - een ander object: dat object zelf (1 recept per file)
+    """
+    stream = _JsonStream(f)
+    first = stream.peek()
+    if first == "[":
+        yield from stream.array()
+        return
+    if first != "{":
+        yield stream.value()
+        return
+
+    stream.pos += 1
+    rest, streamed = {}, False
+    if stream.peek() == "}":
+        stream.pos += 1
+    else:
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "recipes" and stream.peek() == "[":
+                streamed = True
+                yield from stream.array()
+            else:
+                rest[key] = stream.value()
+            if stream.expect(",}") == "}":
+                break
+    if stream.peek():
+        raise ValueError("extra data na het JSON-object")
+    if not streamed:
+        yield rest
+
+
 # =========================
 # JSON import
 # =========================
-def load_json_file(path):
+def import_file(conn, path, filename):
+    """(recepten gelezen, nieuw geïmporteerd); gooit een exception als de JSON stuk is"""
+    seen = imported = 0
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        for recipe in iter_recipes(f):
+            seen += 1
+            recipe, _, errors = clean_recipe(recipe)
+            if errors:
+                print(f"⚠️ Onvolledig recept – overslaan ({'; '.join(errors)})")
+                continue
+
+            result = db_insert_recipe(conn, recipe, source=f"json:{filename}")
+            if result:
+                imported += 1
+                print(f"✅ Recept geïmporteerd: {recipe['title']}")
+            else:
+                print(f"⏭️  Duplicate overgeslagen: {recipe['title']}")
+    return seen, imported
 
 
-def process_all_jsons():
+def process_all_jsons(force=False):
+    """
+    Importeert enkel nieuwe of gewijzigde bestanden (zie import_manifest);
+    force=True: alles opnieuw lezen (dedupe op fingerprint blijft gelden).
+    """
     conn = get_db()
+    cur = conn.cursor()
 
     files = sorted(
         f for f in os.listdir(JSON_DIR)
@@ -41,40 +234,53 @@ def process_all_jsons():
         print("⚠️ Geen JSON-bestanden gevonden")
         return
 
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "touched": 0, "failed": 0}
     for filename in files:
         path = os.path.join(JSON_DIR, filename)
-        print(f"\n📄 Verwerken: {filename}")
 
+        status, sha, stat = check_manifest(cur, path)
+        if force and status in ("unchanged", "touched"):
+            sha = sha or file_sha256(path)
+            status = "changed"
+        if status == "touched":
+            record_manifest(cur, path, stat, sha)
+            conn.commit()
+        if status in ("unchanged", "touched"):
+            counts[status] += 1
+            metrics.count("import.files_skipped")
+            continue
+
+        print(f"\n📄 Verwerken: {filename}")
         try:
-            data = load_json_file(path)
+            with metrics.span("import.json_file"):
+                seen, imported = import_file(conn, path, filename)
         except Exception as e:
+            # Niet in het manifest: volgende keer opnieuw (al geïmporteerde recepten zijn dedupe)
+            counts["failed"] += 1
             print(f"❌ Kan JSON niet lezen ({filename}): {e}")
             continue
 
-        # Ondersteun zowel:
-        # - 1 recept per file
-        # - {"recipes": [...]}
-        if isinstance(data, dict) and "recipes" in data:
-            recipes = data["recipes"]
-        else:
-            recipes = [data]
-
-        for recipe in recipes:
-            if not recipe.get("title") or not recipe.get("ingredients") or not recipe.get("steps"):
-                print("⚠️ Onvolledig recept – overslaan")
-                continue
-
-            result = db_insert_recipe(conn, recipe, source=f"json:{filename}")
-            if result:
-                print(f"✅ Recept geïmporteerd: {recipe['title']}")
-            else:
-                print(f"⏭️  Duplicate overgeslagen: {recipe['title']}")
+        record_manifest(cur, path, stat, sha, seen, imported)
+        conn.commit()
+        counts[status] += 1
 
     conn.close()
-    print("\n🎉 Alle JSON-bestanden geïmporteerd (met dedupe)")
+    refresh_snapshot()
+    refresh_tfidf_index()
+    print(
+        f"\n🎉 JSON-import klaar: {counts['new']} nieuw, {counts['changed']} gewijzigd, "
+        f"{counts['unchanged'] + counts['touched']} ongewijzigd overgeslagen, {counts['failed']} mislukt"
+    )
 
 # =========================
 # Main
 # =========================
 if __name__ == "__main__":
-    process_all_jsons()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importeer recepten uit JSON-bestanden")
+    parser.add_argument("--force", action="store_true",
+                        help="ook ongewijzigde bestanden opnieuw lezen (negeert het manifest)")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+    metrics.run_cli(lambda: process_all_jsons(args.force), args)
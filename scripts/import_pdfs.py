@@ -1,12 +1,18 @@
 import os
-import json
-import hashlib
-import fitz  # PyMuPDF
-import google.generativeai as genai
+import tempfile
 from typing import List
 from pathlib import Path
 
+import metrics
 from db import get_connection, ensure_tables_exist, insert_recipe as db_insert_recipe
+from extract_cache import MAX_MB, content_hash, get_cache, prompt_version, report as report_cache
+from gemini_batch import (
+    MAX_IMAGES, MAX_TOKENS, make_page, batch_prompt, image_label, run_batches, report,
+)
+from gemini_extract import MODEL_NAME, require_api_key
+from recipe_schema import clean_recipe_list, extract_with_retry, parse_recipes, report_stats
+from snapshot import refresh_snapshot
+from tfidf_index import refresh_after_import as refresh_tfidf_index
 
 # =========================
 # Config
@@ -14,18 +20,20 @@ from db import get_connection, ensure_tables_exist, insert_recipe as db_insert_r
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 PDF_DIR = str(PROJECT_ROOT / "pdf")
-TMP_IMG_DIR = str(SCRIPT_DIR / "_tmp_pages")
-CACHE_DIR = str(SCRIPT_DIR / "_cache")
-
-os.makedirs(TMP_IMG_DIR, exist_ok=True)
-os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Gemini-model, pas bij de eerste call aangemaakt (zie get_model).
 # API key via env var: export GEMINI_API_KEY="..."
-_api_key = os.environ.get("GEMINI_API_KEY")
-if not _api_key:
-    raise RuntimeError("GEMINI_API_KEY omgevingsvariabele is niet gezet. Gebruik: export GEMINI_API_KEY='...'")
-genai.configure(api_key=_api_key)
-MODEL = genai.GenerativeModel("gemini-2.5-flash")
+MODEL = None
+
+
+def get_model():
+    global MODEL
+    if MODEL is None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=require_api_key())
+        MODEL = genai.GenerativeModel(MODEL_NAME)
+    return MODEL
 
 PROMPT = """
 Je ziet een HelloFresh recept-pagina (PDF).
@@ -59,6 +67,7 @@ REGELS:
 - Alleen geldig JSON
 - Als iets ontbreekt: null
 """
+PROMPT_VERSION = prompt_version(PROMPT)
 
 def get_db():
     conn = get_connection()
@@ -81,7 +90,10 @@ def page_has_recipe_text(page) -> bool:
     )
 
 
-def pdf_to_images(pdf_path: str) -> List[str]:
+def pdf_to_images(pdf_path: str, out_dir: str) -> List[str]:
+    """Receptpagina's als PNG in out_dir (een tijdelijke map, zie process_all_pdfs)"""
+    import fitz  # PyMuPDF
+
     doc = fitz.open(pdf_path)
     images = []
 
@@ -91,7 +103,7 @@ def pdf_to_images(pdf_path: str) -> List[str]:
 
         pix = page.get_pixmap(dpi=200)
         img_path = os.path.join(
-            TMP_IMG_DIR,
+            out_dir,
             f"{os.path.basename(pdf_path)}_page_{i+1}.png"
         )
         pix.save(img_path)
@@ -102,54 +114,130 @@ def pdf_to_images(pdf_path: str) -> List[str]:
 # =========================
 # Gemini + caching
 # =========================
+# Gedeelde extractiecache (extract_cache): sleutel = sha256 van de PNG +
+# PROMPT_VERSION + MODEL_NAME
 def cache_key_for_image(image_path: str) -> str:
     with open(image_path, "rb") as f:
-        return hashlib.sha1(f.read()).hexdigest()
+        return content_hash(f.read())
+
+
+def load_cached(cache_key: str):
+    data = get_cache().get(cache_key, PROMPT_VERSION, MODEL_NAME)
+    if data is None:
+        return None
+    metrics.count("gemini.cache_hits")
+    return data.get("recipes", [])
+
+
+def save_cached(cache_key: str, data: dict):
+    get_cache().put(cache_key, PROMPT_VERSION, MODEL_NAME, data)
+
+
+def _image_part(image_bytes: bytes) -> dict:
+    return {"mime_type": "image/png", "data": image_bytes}
 
 
 def extract_recipes_from_image(image_path: str) -> List[dict]:
     cache_key = cache_key_for_image(image_path)
-    cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
+    cached = load_cached(cache_key)
+    if cached is not None:
+        return cached
+    recipes = _extract_uncached(image_path, cache_key)
+    return recipes or []
 
-    if os.path.exists(cache_file):
-        with open(cache_file, "r", encoding="utf-8") as f:
-            return json.load(f).get("recipes", [])
 
+def _extract_uncached(image_path: str, cache_key: str):
+    """Recepten van één pagina via Gemini (en cachen), of None bij een API-fout"""
     with open(image_path, "rb") as f:
         image_bytes = f.read()
 
+    def send(prompt):
+        metrics.count("gemini.calls")
+        with metrics.span("gemini.generate_content"):
+            response = get_model().generate_content(
+                [prompt, _image_part(image_bytes)],
+                generation_config={"temperature": 0}
+            )
+        return response.text
+
     try:
-        response = MODEL.generate_content(
-            [
-                PROMPT,
-                {
-                    "mime_type": "image/png",
-                    "data": image_bytes
-                }
-            ],
-            generation_config={"temperature": 0}
-        )
+        recipes, errors = extract_with_retry(send, parse_recipes, PROMPT)
     except Exception as e:
         print(f"❌ Gemini API fout ({image_path}): {e}")
-        return []
+        return None
 
-    try:
-        data = json.loads(response.text)
-    except Exception:
-        print(f"❌ JSON parse fout ({image_path})")
-        return []
+    recipes = recipes or []
+    data = {"recipes": recipes}
+    if errors:
+        # Ook na reparatie + herhaalprompt ongeldig: de geldige recepten houden
+        # en het resultaat cachen, zodat een volgende run niet opnieuw betaalt
+        print(f"⚠️ Onvolledig antwoord ({image_path}): {'; '.join(errors)}")
+        data["errors"] = errors
 
     # cache resultaat
-    with open(cache_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    save_cached(cache_key, data)
+
+    return recipes
 
-    return data.get("recipes", [])
+
+def extract_recipes_from_images(image_paths: List[str], max_images: int = MAX_IMAGES,
+                                max_tokens: int = MAX_TOKENS) -> dict:
+    """
+    Zoals extract_recipes_from_image, maar bundelt de niet-gecachete pagina's
+    in batches (gemini_batch). Resultaat: {pad: [recepten]}; elke geslaagde
+    pagina wordt meteen gecachet.
+    """
+    from PIL import Image
+
+    results = {}
+    keys = {}
+    pages = []
+    for path in image_paths:
+        keys[path] = cache_key_for_image(path)
+        cached = load_cached(keys[path])
+        if cached is not None:
+            results[path] = cached
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        with Image.open(path) as image:
+            size = image.size
+        pages.append(make_page(path, data, "image/png", size))
+
+    if not pages:
+        return results
+
+    def send_batch(batch):
+        parts = [batch_prompt(PROMPT, len(batch), "recipes")]
+        for number, page in enumerate(batch, start=1):
+            parts += [image_label(number), _image_part(page["data"])]
+        metrics.count("gemini.calls")
+        with metrics.span("gemini.generate_content"):
+            response = get_model().generate_content(parts, generation_config={"temperature": 0})
+        return response.text
+
+    def send_single(page):
+        return _extract_uncached(page["key"], keys[page["key"]])
+
+    def on_result(path, recipes):
+        save_cached(keys[path], {"recipes": recipes})
+        results[path] = recipes
+
+    report(run_batches(pages, send_batch, send_single, on_result, "recipes", clean_recipe_list,
+                       max_images, max_tokens))
+    return results
 
 # =========================
 # Main
 # =========================
-def process_all_pdfs():
+def process_all_pdfs(max_images=MAX_IMAGES, max_tokens=MAX_TOKENS, cache_mb=MAX_MB):
+    """
+    max_images=1: elke pagina apart (zonder batching).
+    Paginabeelden staan alleen tijdens de verwerking van hun PDF in een
+    tijdelijke map; resultaten gaan naar de extractiecache (max. cache_mb).
+    """
     conn = get_db()
+    get_cache(cache_mb)
 
     for pdf in sorted(os.listdir(PDF_DIR)):
         if not pdf.lower().endswith(".pdf"):
@@ -158,17 +246,19 @@ def process_all_pdfs():
         print(f"\n📄 Verwerken: {pdf}")
         pdf_path = os.path.join(PDF_DIR, pdf)
 
-        images = pdf_to_images(pdf_path)
+        with tempfile.TemporaryDirectory(prefix="weekmenu_pages_") as tmp_dir:
+            with metrics.span("import.pdf_to_images"):
+                images = pdf_to_images(pdf_path, tmp_dir)
 
-        if not images:
-            print("⚠️ Geen receptpagina’s gevonden")
-            continue
+            if not images:
+                print("⚠️ Geen receptpagina’s gevonden")
+                continue
 
-        for img in images:
-            print(f"🤖 Analyse: {img}")
-            recipes = extract_recipes_from_image(img)
+            print(f"🤖 Analyse: {len(images)} pagina's")
+            per_page = extract_recipes_from_images(images, max_images, max_tokens)
 
-            for r in recipes:
+        for img in images:
+            for r in per_page.get(img, []):
                 if not r.get("ingredients") or not r.get("steps"):
                     continue
                 result = db_insert_recipe(conn, r, source="pdf-gemini")
@@ -176,8 +266,23 @@ def process_all_pdfs():
                     print(f"✅ Recept opgeslagen: {r['title']}")
 
     conn.close()
+    refresh_snapshot()
+    refresh_tfidf_index()
+    report_stats()
+    report_cache()
     print("\n🎉 Import voltooid (met caching + dedupe)")
 
 
 if __name__ == "__main__":
-    process_all_pdfs()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importeer recepten uit PDF's via Gemini")
+    parser.add_argument("--batch-images", type=int, default=MAX_IMAGES,
+                        help=f"max. pagina's per Gemini-request (standaard {MAX_IMAGES}, 1 = geen batching)")
+    parser.add_argument("--batch-tokens", type=int, default=MAX_TOKENS,
+                        help=f"max. geschatte beeld-tokens per request (standaard {MAX_TOKENS})")
+    parser.add_argument("--cache-mb", type=float, default=MAX_MB,
+                        help=f"max. grootte van de extractiecache (standaard {MAX_MB} MB, LRU)")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+    metrics.run_cli(lambda: process_all_pdfs(args.batch_images, args.batch_tokens, args.cache_mb), args)
@@ -0,0 +1,167 @@
+# scripts/ingredient_index.py
+"""
+Inverted index van ingrediënt naar recepten, voor "koken met wat je hebt".
+
+Per canoniek ingrediënt (ingredient_names.id) een posting-lijst
+{recipe_id: gewicht}, met het gewicht uit get_ingredient_weight. Per recept het totale gewicht en aantal
+ingrediënten (voorraadkast-items niet meegeteld). Een zoekopdracht loopt
+enkel de posting-lijsten van de opgegeven ingrediënten af, dus de kosten
+schalen met de query en niet met de grootte van de database.
+
+    python ingredient_index.py kipfilet paprika rijst
+"""
+import heapq
+import sys
+from collections import defaultdict
+
+import metrics
+from db import reader, corpus_version, lookup_name_ids
+from features import get_ingredient_weight
+from ingredient_weights import apply_learned_weights
+from ingredient_names import canonical_name
+from pantry import load_pantry
+
+_index_cache = {}
+
+
+# =========================
+# Index opbouwen
+# =========================
+@metrics.timed("index.ingredients.build")
+def build_ingredient_index(pantry=frozenset()):
+    """
+    Eén bulk-query over alle ingrediënten; pantry is een set name_id's.
+    Resultaat: dict met
+      postings:      {name_id: {recipe_id: gewicht}}
+      names:         {name_id: canonieke naam}
+      tokens:        {woord: {name_id, ...}}  (om "paprika" op "rode paprika" te laten matchen)
+      recipe_weight: {recipe_id: totaal gewicht}
+      recipe_count:  {recipe_id: aantal verschillende ingrediënten}
+    """
+    with reader() as conn:
+        cur = conn.cursor()
+        version = corpus_version(conn)
+        cur.execute("""
+            SELECT i.recipe_id, i.name_id, n.name
+            FROM ingredients i
+            JOIN ingredient_names n ON n.id = i.name_id
+        """)
+        rows = cur.fetchall()
+
+    postings = defaultdict(dict)
+    names = {}
+    weights = {}
+    for recipe_id, name_id, name in rows:
+        if name_id in pantry:
+            continue
+        weight = weights.get(name_id)
+        if weight is None:
+            weight = weights[name_id] = get_ingredient_weight(name)
+            names[name_id] = name
+        postings[name_id][recipe_id] = weight
+
+    recipe_weight = defaultdict(float)
+    recipe_count = defaultdict(int)
+    tokens = defaultdict(set)
+    for name_id, posting in postings.items():
+        for recipe_id, weight in posting.items():
+            recipe_weight[recipe_id] += weight
+            recipe_count[recipe_id] += 1
+        for token in names[name_id].split():
+            tokens[token].add(name_id)
+
+    return {
+        "version": version,
+        "postings": dict(postings),
+        "names": names,
+        "tokens": dict(tokens),
+        "recipe_weight": dict(recipe_weight),
+        "recipe_count": dict(recipe_count),
+    }
+
+
+def get_ingredient_index(exclude_pantry=True):
+    """
+    Gecachte index; wordt herbouwd als de corpusversie (import, backfill,
+    alias) of de gewichtenversie (ingredient_weights.py) verandert.
+    """
+    weights = apply_learned_weights()
+    with reader() as conn:
+        pantry = frozenset(lookup_name_ids(conn.cursor(), load_pantry())) if exclude_pantry else frozenset()
+        version = corpus_version(conn)
+
+    index = _index_cache.get(pantry)
+    if index is None or index["version"] != version or index["weights"] != weights:
+        index = build_ingredient_index(pantry)
+        index["weights"] = weights
+        _index_cache.clear()
+        _index_cache[pantry] = index
+    return index
+
+
+# =========================
+# Query
+# =========================
+def resolve_names(index, on_hand):
+    """
+    Zet vrije invoer om naar canonieke name_id's uit de index: via de
+    alias-tabel, anders alle namen die het woord bevatten.
+    """
+    ids = set()
+    with reader() as conn:
+        cur = conn.cursor()
+        for item in on_hand:
+            known = {i for i in lookup_name_ids(cur, [item]) if i in index["postings"]}
+            ids |= known or index["tokens"].get(canonical_name(item), set())
+    return ids
+
+
+@metrics.timed("index.ingredients.query")
+def on_hand_coverage(on_hand, index=None):
+    """
+    Resultaat: {recipe_id: (coverage, missing)} voor elk recept dat minstens
+    één van de ingrediënten bevat.
+    coverage = gewogen aandeel van het recept dat je al hebt (0..1)
+    missing  = aantal ingrediënten dat je nog moet kopen
+    """
+    index = index or get_ingredient_index()
+    covered = defaultdict(float)
+    matched = defaultdict(int)
+
+    for name_id in resolve_names(index, on_hand):
+        for recipe_id, weight in index["postings"][name_id].items():
+            covered[recipe_id] += weight
+            matched[recipe_id] += 1
+
+    recipe_weight = index["recipe_weight"]
+    recipe_count = index["recipe_count"]
+    return {
+        recipe_id: (
+            weight / recipe_weight[recipe_id],
+            recipe_count[recipe_id] - matched[recipe_id],
+        )
+        for recipe_id, weight in covered.items()
+    }
+
+
+def rank_by_on_hand(on_hand, limit=20, index=None):
+    """
+    Beste recepten voor de opgegeven ingrediënten: hoogste gewogen dekking,
+    bij gelijkstand het minst aantal ontbrekende ingrediënten.
+    Resultaat: lijst van {"id", "coverage", "missing"}
+    """
+    coverage = on_hand_coverage(on_hand, index)
+    best = heapq.nsmallest(
+        limit,
+        coverage.items(),
+        key=lambda kv: (-kv[1][0], kv[1][1], kv[0]),
+    )
+    return [
+        {"id": recipe_id, "coverage": cov, "missing": missing}
+        for recipe_id, (cov, missing) in best
+    ]
+
+
+if __name__ == "__main__":
+    for hit in rank_by_on_hand(sys.argv[1:], limit=10):
+        print(f"{hit['id']:>6}  {hit['coverage']:.0%} gedekt, {hit['missing']} ontbrekend")
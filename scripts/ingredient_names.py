@@ -0,0 +1,119 @@
+# scripts/ingredient_names.py
+"""
+Canonieke ingrediëntnamen.
+
+Elke ruwe naam uit een recept ("Knoflookteen", "olijfolie*", "[plantaardige]
+boter", "peper & zout") krijgt een alias_key (lowercase, spaties
+genormaliseerd) en wordt via canonical_name teruggebracht tot één naam per
+echt ingrediënt. In de database staat dat als ingredient_names (id, naam)
++ ingredient_aliases (alias_key → id); ingredients.name_id verwijst ernaar
+(zie db.resolve_name_id).
+
+Geen database-imports hier: db.py gebruikt deze functies bij het importeren.
+
+    python ingredient_names.py                           # vocabulaire-rapport
+    python ingredient_names.py --alias "oosters gekruid rundergehakt" rundergehakt
+"""
+import argparse
+import re
+
+# Tikfouten en schrijfwijzen die na het opschonen nog verschillen
+# (ruwe alias_key of opgeschoonde naam → canonieke naam)
+SEED_ALIASES = {
+    "knoflookteen": "knoflook",
+    "knoflookteeen": "knoflook",
+    "knoflookteentjes": "knoflook",
+    "culinair room": "culinaire room",
+    "culinare room": "culinaire room",
+    "culiniare room": "culinaire room",
+    "jasmirijst": "jasmijnrijst",
+    "sojasas": "sojasaus",
+    "pecannnoten": "pecannoten",
+    "parelgelrst": "parelgerst",
+    "parelgert": "parelgerst",
+    "volkoeren noedels": "volkoren noedels",
+    "worcestersaus": "worcestershiresaus",
+    "wittewijnazijn": "witte wijnazijn",
+    "pruimtomaten": "pruimtomaat",
+    "mais": "maïs",
+    "vers basilicum": "verse basilicum",
+    "boter/sla": "botersla",
+    "bimi broccoli": "bimi broccolini",
+    "grana padano vlokken dop": "grana padanovlokken dop",
+    "peper & zout": "peper en zout",
+}
+
+
+def alias_key(raw):
+    """Sleutel in ingredient_aliases: lowercase, zonder overtollige spaties"""
+    return re.sub(r"\s+", " ", (raw or "").lower()).strip()
+
+
+def canonical_name(raw):
+    """
+    Eén naam per ingrediënt: '*'-voetnoten, notities tussen (haakjes) en
+    optionele varianten tussen [vierkante haakjes] vallen weg, daarna de
+    vaste correcties uit SEED_ALIASES.
+    """
+    name = alias_key(raw)
+    if name in SEED_ALIASES:
+        return SEED_ALIASES[name]
+
+    name = name.replace("*", " ")
+    name = re.sub(r"\([^)]*\)|\[[^\]]*\]", " ", name)
+    name = re.sub(r"\s+", " ", name).strip(" ,")
+    name = SEED_ALIASES.get(name, name)
+    # Alleen notities of voetnoten: dan de ruwe naam houden
+    return name or alias_key(raw)
+
+
+# =========================
+# CLI
+# =========================
+def report(conn):
+    """Ruwe vs. canonieke vocabulaire + de grootste samenvoegingen"""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT count(DISTINCT lower(trim(i.name))), count(DISTINCT i.name_id)
+        FROM ingredients i
+    """)
+    raw, canonical = cur.fetchone()
+    print(f"🧂 {raw} ruwe namen → {canonical} canonieke ingrediënten")
+
+    cur.execute("""
+        SELECT n.name, count(DISTINCT lower(trim(i.name))) AS variants, count(*)
+        FROM ingredients i
+        JOIN ingredient_names n ON n.id = i.name_id
+        GROUP BY n.id
+        HAVING variants > 1
+        ORDER BY variants DESC, n.name
+        LIMIT 15
+    """)
+    for name, variants, rows in cur.fetchall():
+        print(f"- {name}: {variants} schrijfwijzen, {rows} keer gebruikt")
+
+
+def main():
+    import db
+
+    parser = argparse.ArgumentParser(description="Canonieke ingrediëntnamen beheren")
+    parser.add_argument("--alias", nargs=2, metavar=("RUWE_NAAM", "CANONIEK"),
+                        help="laat een ruwe naam voortaan naar een canonieke naam wijzen")
+    parser.add_argument("--backfill", action="store_true",
+                        help="alle ingrediënten opnieuw aan een canonieke naam koppelen")
+    args = parser.parse_args()
+
+    conn = db.get_connection()
+    try:
+        if args.alias:
+            changed = db.add_ingredient_alias(conn, *args.alias)
+            print(f"🔗 '{args.alias[0]}' → '{args.alias[1]}' ({changed} ingrediëntrijen)")
+        if args.backfill:
+            print(f"🔄 {db.backfill_ingredient_names(conn)} ingrediëntrijen gekoppeld")
+        report(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# scripts/ingredient_weights.py
+"""
+Ingrediëntgewichten uit de corpusstatistiek.
+
+INGREDIENT_CATEGORIES geeft een 60-tal substrings een vast gewicht; al de
+rest weegt 1.0, dus een zeldzaam, bepalend ingrediënt telt even zwaar als
+zout of ui. Deze offline job leest alle (recept, ingrediënt)-paren in één
+query en berekent met NumPy:
+- df per canoniek ingrediënt en idf = ln((1+n)/(1+df)) + 1 (zoals tfidf_index);
+- het corpusgewicht: idf gedeeld door de gemiddelde idf per voorkomen (een
+  gemiddeld ingrediënt weegt dus 1.0, net als de standaardcategorie),
+  begrensd tot [MIN_WEIGHT, MAX_WEIGHT];
+- een ijle co-occurrence-matrix (paren per recept, np.unique op paarcodes)
+  met NPMI per paar.
+
+Het eindgewicht mengt beide geometrisch: categorie^(1-blend) · corpus^blend
+(blend 0 = enkel de categorieën, 1 = enkel het corpus). Ingrediënten met
+df < MIN_DF houden hun categorie. Alles komt in ingredient_weights en
+ingredient_pairs, met in meta een eigen versie, de corpusversie waarop het
+berekend is en de blend. features.get_ingredient_weight (en dus
+similarity_score, dpp en ingredient_index) gebruikt de tabel zodra
+apply_learned_weights hem geladen heeft.
+
+    python ingredient_weights.py               # berekenen + rapport
+    python ingredient_weights.py --blend 1     # enkel corpusgewichten
+    python ingredient_weights.py --report      # rapport van de opgeslagen tabel
+    python ingredient_weights.py --clear       # terug naar de vaste categorieën
+"""
+import argparse
+
+import db
+import metrics
+from db import reader, transaction
+from features import get_category_weight, use_learned_weights
+
+BLEND = 0.5
+MIN_DF = 3            # minder recepten: idf te onbetrouwbaar, categorie blijft
+MIN_WEIGHT = 0.25
+MAX_WEIGHT = 5.0
+MIN_PAIR_COUNT = 3    # paren die minder vaak samen voorkomen worden niet bewaard
+REPORT_LIMIT = 15
+
+_applied = {}
+
+
+# =========================
+# Statistiek (NumPy)
+# =========================
+def read_occurrences(cur):
+    """(recept-id's, name_id's) als arrays, uniek en gesorteerd per recept"""
+    import numpy as np
+
+    cur.execute("""
+        SELECT DISTINCT recipe_id, name_id FROM ingredients
+        WHERE name_id IS NOT NULL
+        ORDER BY recipe_id, name_id
+    """)
+    rows = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 2)
+    return rows[:, 0].copy(), rows[:, 1].copy()
+
+
+def cooccurrence(recipe_ids, name_ids):
+    """
+    Ijle co-occurrence als (a, b, aantal) met a < b. Per afstand k wordt
+    element i aan i+k gekoppeld als beide in hetzelfde recept zitten: zoveel
+    vectorstappen als het langste recept ingrediënten heeft, geen lus per recept.
+    """
+    import numpy as np
+
+    size = int(name_ids.max()) + 1 if len(name_ids) else 1
+    codes = []
+    k = 1
+    while k < len(recipe_ids):
+        same = recipe_ids[:-k] == recipe_ids[k:]
+        if not same.any():
+            break
+        # Gesorteerd per recept op name_id, dus links < rechts
+        codes.append(name_ids[:-k][same] * size + name_ids[k:][same])
+        k += 1
+
+    if not codes:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    pairs, counts = np.unique(np.concatenate(codes), return_counts=True)
+    return pairs // size, pairs % size, counts
+
+
+@metrics.timed("weights.compute")
+def compute_ingredient_stats(blend=BLEND):
+    """
+    Dict met arrays per ingrediënt (name_id, df, idf, corpus, category,
+    weight) en per paar (a, b, count, npmi), plus n (aantal recepten met
+    ingrediënten) en names {name_id: naam}.
+    """
+    import numpy as np
+
+    with reader() as conn:
+        cur = conn.cursor()
+        version = db.corpus_version(conn)
+        recipe_ids, name_ids = read_occurrences(cur)
+        names = dict(cur.execute("SELECT id, name FROM ingredient_names").fetchall())
+
+    n = len(np.unique(recipe_ids))
+    counts = np.bincount(name_ids) if len(name_ids) else np.zeros(0, dtype=np.int64)
+    present = np.flatnonzero(counts)
+    df = counts[present]
+
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+    reference = (df * idf).sum() / df.sum() if len(df) else 1.0
+    corpus = np.clip(idf / reference, MIN_WEIGHT, MAX_WEIGHT)
+    category = np.array([get_category_weight(names[int(i)]) for i in present], dtype=np.float64)
+    weight = np.where(df >= MIN_DF, category ** (1.0 - blend) * corpus ** blend, category)
+
+    a, b, pair_counts = cooccurrence(recipe_ids, name_ids)
+    keep = pair_counts >= MIN_PAIR_COUNT
+    a, b, pair_counts = a[keep], b[keep], pair_counts[keep]
+    # NPMI: 1 = komen enkel samen voor, 0 = onafhankelijk
+    p_ab = pair_counts / max(n, 1)
+    pmi = np.log(pair_counts * float(n) / (counts[a] * counts[b].astype(np.float64)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        npmi = np.where(p_ab < 1.0, pmi / -np.log(p_ab), 1.0)
+
+    return {
+        "corpus_version": version,
+        "blend": blend,
+        "n": n,
+        "names": names,
+        "name_id": present,
+        "df": df,
+        "idf": idf,
+        "corpus": corpus,
+        "category": category,
+        "weight": weight,
+        "a": a,
+        "b": b,
+        "count": pair_counts,
+        "npmi": npmi,
+    }
+
+
+# =========================
+# Opslaan / laden
+# =========================
+def _set_meta(cur, key, value):
+    cur.execute("""
+        INSERT INTO meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (key, value))
+
+
+def _bump_version(cur):
+    cur.execute("""
+        INSERT INTO meta (key, value) VALUES ('ingredient_weights_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    """)
+
+
+def save_ingredient_stats(stats):
+    """Vervangt de tabellen en verhoogt de gewichtenversie"""
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM ingredient_weights")
+        cur.execute("DELETE FROM ingredient_pairs")
+        cur.executemany("""
+            INSERT INTO ingredient_weights (name_id, df, idf, corpus_weight, category_weight, weight)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, zip(*(stats[key].tolist() for key in ("name_id", "df", "idf", "corpus", "category", "weight"))))
+        cur.executemany(
+            "INSERT INTO ingredient_pairs (a, b, count, npmi) VALUES (?, ?, ?, ?)",
+            zip(*(stats[key].tolist() for key in ("a", "b", "count", "npmi"))),
+        )
+        _set_meta(cur, "ingredient_weights_corpus", stats["corpus_version"][0])
+        _set_meta(cur, "ingredient_weights_blend", round(stats["blend"] * 100))
+        _bump_version(cur)
+
+
+def clear_ingredient_stats():
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM ingredient_weights")
+        cur.execute("DELETE FROM ingredient_pairs")
+        _bump_version(cur)
+
+
+def weights_info(conn):
+    """{"version", "corpus", "blend"} uit meta (version 0 = nooit berekend)"""
+    rows = dict(conn.execute("""
+        SELECT key, value FROM meta
+        WHERE key IN ('ingredient_weights_version', 'ingredient_weights_corpus', 'ingredient_weights_blend')
+    """).fetchall())
+    return {
+        "version": rows.get("ingredient_weights_version", 0),
+        "corpus": rows.get("ingredient_weights_corpus"),
+        "blend": rows.get("ingredient_weights_blend", 0) / 100,
+    }
+
+
+def apply_learned_weights():
+    """
+    Laadt de gewichtentabel in features (één keer per database en
+    gewichtenversie). Resultaat: sleutel voor caches die van de gewichten
+    afhangen.
+    """
+    with reader() as conn:
+        key = (str(db.DB_PATH), weights_info(conn)["version"])
+        if _applied.get("key") != key:
+            weights = {}
+            if key[1]:
+                weights = dict(conn.execute("""
+                    SELECT n.name, w.weight
+                    FROM ingredient_weights w
+                    JOIN ingredient_names n ON n.id = w.name_id
+                """).fetchall())
+            use_learned_weights(weights)
+            _applied["key"] = key
+            metrics.count("weights.loaded")
+    return key
+
+
+# =========================
+# Rapport
+# =========================
+def report(limit=REPORT_LIMIT):
+    with reader() as conn:
+        info = weights_info(conn)
+        if not conn.execute("SELECT 1 FROM ingredient_weights LIMIT 1").fetchone():
+            print("⚠️ Geen corpusgewichten: enkel de vaste categorieën worden gebruikt")
+            return
+        current = db.corpus_version(conn)
+        n = conn.execute("SELECT count(DISTINCT recipe_id) FROM ingredients").fetchone()[0]
+
+        columns = "n.name, w.df, w.weight, w.category_weight"
+        common = conn.execute(f"""
+            SELECT {columns} FROM ingredient_weights w
+            JOIN ingredient_names n ON n.id = w.name_id
+            ORDER BY w.df DESC, n.name LIMIT ?
+        """, (limit,)).fetchall()
+        distinctive = conn.execute(f"""
+            SELECT {columns}, w.name_id FROM ingredient_weights w
+            JOIN ingredient_names n ON n.id = w.name_id
+            WHERE w.df >= ?
+            ORDER BY w.idf DESC, w.df DESC, n.name LIMIT ?
+        """, (MIN_DF, limit)).fetchall()
+        pairs = conn.execute("""
+            SELECT na.name, nb.name, p.count, p.npmi FROM ingredient_pairs p
+            JOIN ingredient_names na ON na.id = p.a
+            JOIN ingredient_names nb ON nb.id = p.b
+            ORDER BY p.npmi DESC, p.count DESC LIMIT ?
+        """, (limit,)).fetchall()
+
+        def partner(name_id):
+            row = conn.execute("""
+                SELECT n.name, p.npmi FROM ingredient_pairs p
+                JOIN ingredient_names n ON n.id = CASE WHEN p.a = ? THEN p.b ELSE p.a END
+                WHERE p.a = ? OR p.b = ?
+                ORDER BY p.npmi DESC LIMIT 1
+            """, (name_id, name_id, name_id)).fetchone()
+            return f"  ↔ {row[0]} ({row[1]:.2f})" if row else ""
+
+        distinctive = [(*row[:4], partner(row[4])) for row in distinctive]
+
+    stale = "" if info["corpus"] == current[0] else " – ⚠️ corpus intussen gewijzigd, opnieuw berekenen"
+    print(f"⚖️  Corpusgewichten v{info['version']} (blend {info['blend']:.2f}, {n} recepten){stale}")
+
+    print("\n🔝 Meest voorkomend")
+    for name, df, weight, category in common:
+        print(f"   {name:<28} {df / max(n, 1):>6.1%}  gewicht {weight:.2f} (categorie {category:.1f})")
+
+    print(f"\n💎 Meest onderscheidend (min. {MIN_DF} recepten)")
+    for name, df, weight, category, partner_text in distinctive:
+        print(f"   {name:<28} {df:>6}×  gewicht {weight:.2f} (categorie {category:.1f}){partner_text}")
+
+    print("\n🔗 Sterkste combinaties (NPMI)")
+    for name_a, name_b, count, npmi in pairs:
+        print(f"   {name_a} + {name_b}: {count}× samen, {npmi:.2f}")
+
+
+# =========================
+# CLI
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="Ingrediëntgewichten uit de corpusstatistiek")
+    parser.add_argument("--blend", type=float, default=BLEND,
+                        help="0 = enkel categorieën, 1 = enkel corpusgewichten")
+    parser.add_argument("--report", action="store_true", help="niet herberekenen, enkel rapporteren")
+    parser.add_argument("--clear", action="store_true", help="corpusgewichten verwijderen")
+    parser.add_argument("--limit", type=int, default=REPORT_LIMIT)
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+    if not 0.0 <= args.blend <= 1.0:
+        parser.error("--blend moet tussen 0 en 1 liggen")
+
+    def run():
+        if args.clear:
+            clear_ingredient_stats()
+            print("🧹 Corpusgewichten verwijderd: terug naar de vaste categorieën")
+            return
+        if not args.report:
+            stats = compute_ingredient_stats(args.blend)
+            save_ingredient_stats(stats)
+            print(
+                f"✅ {len(stats['name_id'])} ingrediënten en {len(stats['a'])} paren "
+                f"uit {stats['n']} recepten opgeslagen"
+            )
+        report(args.limit)
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# scripts/menu_pdf.py
+"""
+PDF-export van het weekmenu (reportlab). Apart gehouden zodat het laden van
+de menu-engine reportlab niet importeert; enkel wie een PDF maakt betaalt
+die opstartkost.
+"""
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import cm
+
+import metrics
+from generate_menu import DAYS, TARGET_SERVINGS, get_full_recipe, build_shopping_list
+from pdf_layout import block, break_lines, layout_section, draw_pages
+
+OUTPUT_PDF = "weekmenu.pdf"
+
+
+# =========================
+# PDF helpers
+# =========================
+def draw_wrapped_text(c, text, x, y, max_width, line_height, font="Helvetica", font_size=11):
+    c.setFont(font, font_size)
+    for line in break_lines(text, max_width, font, font_size):
+        c.drawString(x, y, line)
+        y -= line_height
+
+    return y
+
+
+# =========================
+# PDF layout
+# =========================
+def menu_blocks(menu):
+    blocks = [block("Weekmenu", "Helvetica-Bold", 18, 2 * cm)]
+    for day, recipe in zip(DAYS, menu):
+        blocks.append(block(f"{day} – {recipe['title']}", font_size=12, line_height=0.9 * cm))
+    return blocks
+
+
+def shopping_blocks(shopping):
+    blocks = [block("Boodschappenlijst", "Helvetica-Bold", 18, 2 * cm)]
+    for ing, units in sorted(shopping.items()):
+        for unit, qty in units.items():
+            blocks.append(block(f"{ing}: {round(qty, 2)} {unit}", line_height=0.7 * cm))
+    return blocks
+
+
+def recipe_blocks(full):
+    blocks = [
+        block(f"{full['title']} ({TARGET_SERVINGS} pers.)", "Helvetica-Bold", 16, 2 * cm),
+        block("Ingrediënten", "Helvetica-Bold", 12, 1 * cm),
+    ]
+
+    scale = TARGET_SERVINGS / full["servings"]
+    for name, qty, unit in full["ingredients"]:
+        if qty:
+            try:
+                qty = round(float(qty) * scale, 2)
+            except (ValueError, TypeError):
+                pass
+        blocks.append(block(f"- {name}: {qty} {unit or ''}", line_height=0.6 * cm))
+
+    blocks.append(block("Bereiding", "Helvetica-Bold", 12, 0.8 * cm, space_before=0.5 * cm))
+    for nr, text in full["steps"]:
+        blocks.append(block(f"{nr}. {text}", line_height=0.65 * cm))
+
+    return blocks
+
+
+# =========================
+# PDF generation
+# =========================
+PDF_MARGIN = 2 * cm
+
+
+def generate_weekmenu_pdf(menu, filename=OUTPUT_PDF):
+    full_recipes = [get_full_recipe(recipe["id"]) for recipe in menu]
+    render_weekmenu_pdf(menu, filename, full_recipes, build_shopping_list(menu))
+    print(f"📄 PDF gegenereerd: {filename}")
+
+
+@metrics.timed("pdf.render")
+def render_weekmenu_pdf(menu, output, full_recipes, shopping):
+    """
+    Tekent het weekmenu zonder database-toegang.
+    output: bestandsnaam of file-object (bv. io.BytesIO)
+    """
+    c = canvas.Canvas(output, pagesize=A4)
+
+    def render(blocks):
+        draw_pages(c, layout_section(blocks, A4, PDF_MARGIN, PDF_MARGIN))
+
+    render(menu_blocks(menu))
+    render(shopping_blocks(shopping))
+
+    for full in full_recipes:
+        render(recipe_blocks(full))
+
+    c.save()
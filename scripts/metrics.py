@@ -0,0 +1,198 @@
+# scripts/metrics.py
+"""
+Lichte instrumentatie: timing-spans en tellers rond de hot paths
+(DB-queries, similarity scoring, fuzzy matching, PDF-rendering, Gemini-calls).
+
+Standaard uit. Als het uit staat kost een span één attribuut-lookup en een
+gedeelde no-op context manager; @timed-functies worden dan direct aangeroepen.
+
+    import metrics
+    metrics.enable()
+    with metrics.span("db.query"):
+        ...
+    metrics.count("cache.hit")
+    print(metrics.to_json())
+"""
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_enabled = False
+_lock = threading.Lock()
+
+# naam -> [aantal, totaal_s, max_s]
+_spans = {}
+# naam -> aantal
+_counters = {}
+
+_NULL_SPAN = nullcontext()
+
+
+# =========================
+# Aan / uit
+# =========================
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+# =========================
+# Registratie
+# =========================
+def record(name, seconds):
+    with _lock:
+        entry = _spans.get(name)
+        if entry is None:
+            _spans[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+
+def count(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+@contextmanager
+def _span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def span(name):
+    """Context manager die de duur van het blok onder `name` registreert."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _span(name)
+
+
+def timed(name):
+    """Decorator-variant van span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# =========================
+# Export
+# =========================
+def snapshot():
+    """
+    {"spans": {naam: {"count", "total_ms", "mean_ms", "max_ms"}}, "counters": {naam: n}}
+    """
+    with _lock:
+        spans = {
+            name: {
+                "count": n,
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / n,
+                "max_ms": worst * 1000,
+            }
+            for name, (n, total, worst) in _spans.items()
+        }
+        counters = dict(_counters)
+    return {"spans": spans, "counters": counters}
+
+
+def to_json(indent=2):
+    return json.dumps(snapshot(), indent=indent, sort_keys=True)
+
+
+def _prom_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def to_prometheus(prefix="weekmenu"):
+    """Prometheus text exposition format."""
+    data = snapshot()
+    lines = [
+        f"# TYPE {prefix}_span_seconds_total counter",
+        f"# TYPE {prefix}_span_calls_total counter",
+        f"# TYPE {prefix}_span_max_seconds gauge",
+    ]
+    for name, s in sorted(data["spans"].items()):
+        label = f'{{span="{name}"}}'
+        lines.append(f"{prefix}_span_seconds_total{label} {s['total_ms'] / 1000:.9f}")
+        lines.append(f"{prefix}_span_calls_total{label} {s['count']}")
+        lines.append(f"{prefix}_span_max_seconds{label} {s['max_ms'] / 1000:.9f}")
+    for name, n in sorted(data["counters"].items()):
+        metric = f"{prefix}_{_prom_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {n}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """Schrijft metrics naar .json of (anders) Prometheus-tekstformaat."""
+    text = to_json() if str(path).endswith(".json") else to_prometheus()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+# =========================
+# CLI-helpers
+# =========================
+def add_cli_arguments(parser):
+    parser.add_argument("--profile", metavar="PSTATS", help="schrijf cProfile-output naar dit bestand")
+    parser.add_argument("--metrics", metavar="PAD", help="schrijf spans/tellers naar .json of .prom")
+
+
+def run_cli(main, args):
+    """
+    Draait main() met de profiling-opties uit add_cli_arguments().
+    --profile schrijft pstats-output (te lezen met `python -m pstats PAD`).
+    """
+    if args.metrics:
+        enable()
+
+    if args.profile:
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(main)
+        finally:
+            profiler.dump_stats(args.profile)
+            pstats.Stats(args.profile).sort_stats("cumulative").print_stats(15)
+            print(f"🔬 Profiel geschreven: {args.profile}")
+    else:
+        main()
+
+    if args.metrics:
+        write(args.metrics)
+        print(f"📈 Metrics geschreven: {args.metrics}")
@@ -0,0 +1,43 @@
+# scripts/pantry.py
+"""
+Voorraadkast: ingrediënten die je altijd in huis hebt en die niet op de
+boodschappenlijst komen (data/pantry.json). Geen database, geen zware imports.
+"""
+import json
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+PANTRY_PATH = PROJECT_ROOT / "data" / "pantry.json"
+
+# Canonieke namen (zie ingredient_names.py): "olijfolie" dekt ook "olijfolie*",
+# "peper en zout" ook "peper & zout" en "boter" ook "[plantaardige] boter"
+DEFAULT_PANTRY = [
+    "peper", "zwarte peper", "peper en zout",
+    "zout",
+    "olijfolie", "extra vierge olijfolie",
+    "zonnebloemolie",
+    "boter", "plantaardige boter", "roomboter",
+    "sesamolie",
+    "water",
+]
+
+# =========================
+# Pantry helpers
+# =========================
+def load_pantry() -> set:
+    if PANTRY_PATH.exists():
+        try:
+            with open(PANTRY_PATH, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            return {item.lower().strip() for item in items}
+        except (json.JSONDecodeError, TypeError):
+            pass
+    # Eerste keer of corrupt bestand: schrijf defaults weg
+    save_pantry(DEFAULT_PANTRY)
+    return {item.lower().strip() for item in DEFAULT_PANTRY}
+
+
+def save_pantry(items: list):
+    PANTRY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(PANTRY_PATH, "w", encoding="utf-8") as f:
+        json.dump(sorted(items), f, ensure_ascii=False, indent=2)
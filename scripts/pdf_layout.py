@@ -0,0 +1,96 @@
+# scripts/pdf_layout.py
+"""
+Tekst-layout voor de weekmenu-PDF.
+
+Woordbreedtes worden per (woord, font, grootte) gememoiseerd, regels worden
+in één lineaire pass afgebroken en paginagrenzen worden per regel bepaald.
+Een sectie (bv. één recept) wordt volledig opgemaakt vóór er getekend wordt.
+"""
+from functools import lru_cache
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+# =========================
+# Breedtes (gecached)
+# =========================
+@lru_cache(maxsize=65536)
+def word_width(word, font, font_size):
+    return stringWidth(word, font, font_size)
+
+
+def break_lines(text, max_width, font="Helvetica", font_size=11):
+    """
+    Breekt tekst af in regels die binnen max_width passen.
+    Eén pass over de woorden; elk woord wordt hoogstens één keer gemeten.
+    Een woord dat op zich al te breed is, krijgt een eigen regel.
+    """
+    space = word_width(" ", font, font_size)
+    lines = []
+    current = []
+    current_width = 0.0
+
+    for word in text.split():
+        w = word_width(word, font, font_size)
+        if current and current_width + space + w > max_width:
+            lines.append(" ".join(current))
+            current = [word]
+            current_width = w
+        elif current:
+            current.append(word)
+            current_width += space + w
+        else:
+            current = [word]
+            current_width = w
+
+    if current:
+        lines.append(" ".join(current))
+
+    return lines
+
+
+# =========================
+# Blokken
+# =========================
+def block(text, font="Helvetica", font_size=11, line_height=14, space_before=0.0):
+    """Eén alinea: tekst + opmaak + verticale ruimte vóór de alinea."""
+    return (text, font, font_size, line_height, space_before)
+
+
+def layout_section(blocks, page_size, margin_x, margin_y):
+    """
+    Maakt een sectie op in pagina's.
+    Resultaat: lijst pagina's, elke pagina een lijst (x, y, font, size, tekst).
+    Een nieuwe pagina begint zodra de volgende regel onder de marge zou vallen.
+    """
+    width, height = page_size
+    max_width = width - 2 * margin_x
+    top = height - margin_y
+
+    pages = [[]]
+    y = top
+
+    for text, font, font_size, line_height, space_before in blocks:
+        if pages[-1]:
+            y -= space_before
+
+        for line in break_lines(text, max_width, font, font_size):
+            if y < margin_y:
+                pages.append([])
+                y = top
+            pages[-1].append((margin_x, y, font, font_size, line))
+            y -= line_height
+
+    return pages
+
+
+def draw_pages(c, pages):
+    """Tekent opgemaakte pagina's; elke pagina wordt afgesloten met showPage."""
+    for page in pages:
+        current_font = None
+        for x, y, font, font_size, text in page:
+            if (font, font_size) != current_font:
+                c.setFont(font, font_size)
+                current_font = (font, font_size)
+            c.drawString(x, y, text)
+        c.showPage()
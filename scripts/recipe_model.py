@@ -0,0 +1,295 @@
+# scripts/recipe_model.py
+"""
+Compact in-memory model van recepten.
+
+- Recipe is een __slots__-object (geen __dict__ per recept).
+- Ingrediëntnamen worden één keer geïnterneerd naar een int-id (Vocabulary).
+- Per recept: gesorteerde array('i') met ingrediënt-id's en een parallelle
+  array('d') met hoeveelheden per persoon.
+
+Recipe ondersteunt recipe["id"] en recipe.get("features"), dus de bestaande
+functies in generate_menu.py werken er ongewijzigd op. ingredient_dict()
+en to_dict() zetten terug om naar de dict-vorm.
+
+    python recipe_model.py --report          # geheugen per 10k recepten
+    python recipe_model.py --report --db ../benchmarks/corpora/synth_10000_42.db
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from array import array
+from pathlib import Path
+
+import db
+from db import reader
+from generate_menu import parse_servings, parse_quantity, RECIPE_FEATURES, TARGET_SERVINGS
+
+
+# =========================
+# Ingrediënt-vocabulaire
+# =========================
+class Vocabulary:
+    """Naam ↔ int-id; elke naam wordt één keer bewaard (sys.intern)."""
+
+    __slots__ = ("ids", "names")
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        name = name.lower().strip()
+        ingredient_id = self.ids.get(name)
+        if ingredient_id is None:
+            name = sys.intern(name)
+            ingredient_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return ingredient_id
+
+    def lookup(self, name):
+        return self.ids.get(name.lower().strip())
+
+    def __len__(self):
+        return len(self.names)
+
+
+VOCAB = Vocabulary()
+
+
+# =========================
+# Recipe
+# =========================
+class Recipe:
+    __slots__ = ("id", "title", "servings", "_features", "ingredient_ids", "quantities")
+
+    _FIELDS = frozenset(("id", "title", "servings", "features", "ingredient_ids", "quantities"))
+
+    def __init__(self, recipe_id, title, servings, features=None,
+                 ingredient_ids=None, quantities=None):
+        self.id = recipe_id
+        self.title = title
+        self.servings = servings
+        self._features = tuple(features[k] for k in RECIPE_FEATURES) if features else None
+        self.ingredient_ids = ingredient_ids if ingredient_ids is not None else array("i")
+        self.quantities = quantities if quantities is not None else array("d")
+
+    @property
+    def features(self):
+        if self._features is None:
+            return None
+        return dict(zip(RECIPE_FEATURES, self._features))
+
+    # Dict-compatibel, zodat recipe["title"] / recipe.get("features") blijven werken
+    def __getitem__(self, key):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self._FIELDS:
+            return default
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"Recipe({self.id}, {self.title!r}, {len(self.ingredient_ids)} ingrediënten)"
+
+
+def pack_ingredients(ingredients, vocab=VOCAB):
+    """{naam: hoeveelheid} → (gesorteerde array('i') id's, parallelle array('d'))"""
+    pairs = {}
+    for name, qty in ingredients.items():
+        pairs[vocab.intern(name)] = qty
+    ids = sorted(pairs)
+    return array("i", ids), array("d", (pairs[i] for i in ids))
+
+
+# =========================
+# Conversie
+# =========================
+def from_dict(recipe, ingredients, vocab=VOCAB):
+    """
+    recipe: dict uit get_all_recipes()
+    ingredients: {naam: hoeveelheid per persoon}, bv. get_scaled_ingredients(recipe)
+    """
+    ids, quantities = pack_ingredients(ingredients, vocab)
+    return Recipe(recipe["id"], recipe["title"], recipe.get("servings"),
+                  recipe.get("features"), ids, quantities)
+
+
+def to_dict(recipe):
+    return {
+        "id": recipe.id,
+        "title": recipe.title,
+        "servings": recipe.servings,
+        "features": recipe.features,
+    }
+
+
+def ingredient_dict(recipe, vocab=VOCAB):
+    """{naam: hoeveelheid per persoon}, zoals get_scaled_ingredients()"""
+    names = vocab.names
+    return {names[i]: q for i, q in zip(recipe.ingredient_ids, recipe.quantities)}
+
+
+def shared_ingredients(a, b):
+    """
+    Gedeelde ingrediënten van twee recepten via een merge over de gesorteerde
+    id-arrays (geen string-hashing). Resultaat: lijst (id, hoeveelheid_a, hoeveelheid_b).
+    """
+    ids_a, ids_b = a.ingredient_ids, b.ingredient_ids
+    i = j = 0
+    shared = []
+    while i < len(ids_a) and j < len(ids_b):
+        x, y = ids_a[i], ids_b[j]
+        if x == y:
+            shared.append((x, a.quantities[i], b.quantities[j]))
+            i += 1
+            j += 1
+        elif x < y:
+            i += 1
+        else:
+            j += 1
+    return shared
+
+
+# =========================
+# Laden
+# =========================
+def _fetch_rows(recipe_ids=None):
+    columns = "id, title, servings, " + ", ".join(RECIPE_FEATURES)
+    with reader() as conn:
+        cur = conn.cursor()
+        if recipe_ids is None:
+            cur.execute(f"SELECT {columns} FROM recipes")
+            recipe_rows = cur.fetchall()
+            cur.execute("""
+                SELECT i.recipe_id, n.name, i.quantity FROM ingredients i
+                JOIN ingredient_names n ON n.id = i.name_id
+            """)
+        else:
+            ids = (json.dumps(list(recipe_ids)),)
+            cur.execute(f"SELECT {columns} FROM recipes WHERE id IN (SELECT value FROM json_each(?))", ids)
+            recipe_rows = cur.fetchall()
+            cur.execute("""
+                SELECT i.recipe_id, n.name, i.quantity FROM ingredients i
+                JOIN ingredient_names n ON n.id = i.name_id
+                WHERE i.recipe_id IN (SELECT value FROM json_each(?))
+            """, ids)
+        ingredient_rows = cur.fetchall()
+    return recipe_rows, ingredient_rows
+
+
+def build_recipes(recipe_rows, ingredient_rows, vocab=VOCAB):
+    """Bouwt Recipe-objecten uit ruwe rijen (recipes + ingredients)."""
+    per_recipe = {}
+    for recipe_id, name, qty in ingredient_rows:
+        per_recipe.setdefault(recipe_id, {})[name.lower().strip()] = parse_quantity(qty)
+
+    recipes = []
+    for row in recipe_rows:
+        recipe_id, title, servings = row[0], row[1], parse_servings(row[2])
+        divisor = servings if servings and servings >= 1 else TARGET_SERVINGS
+        ingredients = {
+            name: qty / divisor
+            for name, qty in per_recipe.get(recipe_id, {}).items()
+        }
+        ids, quantities = pack_ingredients(ingredients, vocab)
+        features = dict(zip(RECIPE_FEATURES, row[3:])) if row[3] is not None else None
+        recipes.append(Recipe(recipe_id, title, servings, features, ids, quantities))
+    return recipes
+
+
+def load_recipes(recipe_ids=None, vocab=VOCAB):
+    """Alle recepten (of de opgegeven id's) als Recipe-objecten, met twee bulk-queries."""
+    return build_recipes(*_fetch_rows(recipe_ids), vocab=vocab)
+
+
+# =========================
+# Geheugenrapport
+# =========================
+def _dict_model(recipe_rows, ingredient_rows):
+    """De huidige vorm: recept-dicts + {naam: hoeveelheid}-dicts per recept."""
+    per_recipe = {}
+    for recipe_id, name, qty in ingredient_rows:
+        per_recipe.setdefault(recipe_id, {})[name.lower().strip()] = parse_quantity(qty)
+
+    recipes = []
+    ingredients = {}
+    for row in recipe_rows:
+        servings = parse_servings(row[2])
+        divisor = servings if servings and servings >= 1 else TARGET_SERVINGS
+        recipes.append({
+            "id": row[0],
+            "title": row[1],
+            "servings": servings,
+            "features": dict(zip(RECIPE_FEATURES, row[3:])) if row[3] is not None else None,
+        })
+        ingredients[row[0]] = {
+            name: qty / divisor
+            for name, qty in per_recipe.get(row[0], {}).items()
+        }
+    return recipes, ingredients
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def memory_report(recipe_ids=None):
+    """
+    Meet het geheugen van beide modellen voor dezelfde rijen (tracemalloc).
+    Resultaat: {"recipes", "dict_bytes", "compact_bytes", "per_10k": {...}}
+    """
+    recipe_rows, ingredient_rows = _fetch_rows(recipe_ids)
+    n = len(recipe_rows) or 1
+
+    _, dict_bytes = _measure(lambda: _dict_model(recipe_rows, ingredient_rows))
+    def compact():
+        # De vocabulaire hoort bij het compacte model (namen); Recipe verwijst er niet naar
+        vocab = Vocabulary()
+        return build_recipes(recipe_rows, ingredient_rows, vocab), vocab
+
+    _, compact_bytes = _measure(compact)
+
+    return {
+        "recipes": len(recipe_rows),
+        "dict_bytes": dict_bytes,
+        "compact_bytes": compact_bytes,
+        "per_10k": {
+            "dict_mb": dict_bytes / n * 10_000 / 2**20,
+            "compact_mb": compact_bytes / n * 10_000 / 2**20,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact receptmodel")
+    parser.add_argument("--report", action="store_true", help="geheugen per 10k recepten")
+    parser.add_argument("--db", help="andere database (bv. een synthetisch corpus)")
+    args = parser.parse_args()
+
+    if args.db:
+        db.DB_PATH = Path(args.db)
+
+    if args.report:
+        report = memory_report()
+        per_10k = report["per_10k"]
+        print(f"📊 {report['recipes']} recepten")
+        print(f"- dicts:   {per_10k['dict_mb']:.1f} MB per 10k recepten")
+        print(f"- compact: {per_10k['compact_mb']:.1f} MB per 10k recepten "
+              f"({1 - report['compact_bytes'] / report['dict_bytes']:.0%} minder)")
+    else:
+        recipes = load_recipes()
+        print(f"✅ {len(recipes)} recepten, {len(VOCAB)} unieke ingrediënten")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+# scripts/recipe_schema.py
+"""
+Strikt schema voor geëxtraheerde recepten + lokale reparatie van
+modeloutput, zodat een bijna-goed antwoord geen nieuwe Gemini-call kost.
+
+Reparaties (repair_json / normalize_recipe):
+- code fences en tekst rond de JSON;
+- komma's vóór } of ];
+- afgekapte output (open strings, arrays en objecten worden gesloten,
+  het laatste onvolledige element valt weg);
+- placeholders uit het prompt-schema ("string", "Stap 1 ...") → ontbrekend;
+- getallen als string ("250", "1,5", "1/2") → getal.
+
+Wat daarna nog niet aan het schema voldoet (validate_recipe) wordt met een
+gerichte prompt opnieuw gevraagd (retry_prompt). STATS houdt bij hoe vaak
+een antwoord meteen goed was, gerepareerd of opnieuw gevraagd werd.
+"""
+import json
+import re
+
+import metrics
+
+PLACEHOLDERS = {"string", "string | null", "stap 1 ...", "stap 2 ...", "..."}
+
+MAX_TRUNCATION_CUTS = 200
+
+STATS = {"responses": 0, "clean": 0, "repaired": 0, "retried": 0, "failed": 0}
+
+
+# =========================
+# JSON-reparatie
+# =========================
+def _strip_wrapping(raw):
+    """Code fences en tekst vóór/na de JSON weg."""
+    text = raw.strip()
+    fence = re.match(r"^```[a-zA-Z]*\s*(.*?)\s*(```)?$", text, re.S)
+    if fence:
+        text = fence.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text
+    text = text[min(starts):]
+    end = max(text.rfind("}"), text.rfind("]"))
+    # Afgekapte output heeft geen sluitend haakje op het einde: dan alles houden
+    if end >= 0 and not _scan(text)[0]:
+        text = text[:end + 1]
+    return text
+
+
+def _scan(text):
+    """
+    Loopt één keer door de tekst (string-bewust).
+    Resultaat: (open haakjes-stack, in_string, komma's buiten strings,
+    posities net na een afgesloten waarde).
+    """
+    stack = []
+    in_string = escaped = False
+    commas = []
+    closes = []
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            closes.append(i + 1)
+        elif ch == ",":
+            commas.append(i)
+    return stack, in_string, commas, closes
+
+
+def _remove_trailing_commas(text):
+    out = []
+    in_string = escaped = False
+    pending_comma = None
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if pending_comma is not None:
+            if ch.isspace():
+                pending_comma.append(ch)
+                continue
+            if ch not in "}]":
+                out.append(",")
+            out.extend(pending_comma)
+            pending_comma = None
+        if ch == ",":
+            pending_comma = []
+            continue
+        if ch == '"':
+            in_string = True
+        out.append(ch)
+    if pending_comma is not None:
+        out.extend(pending_comma)
+    return "".join(out)
+
+
+def _close(text):
+    """Sluit open strings/haakjes op het einde van (afgekapte) tekst."""
+    stack, in_string, _, _ = _scan(text)
+    if in_string:
+        text += '"'
+    closing = {"{": "}", "[": "]"}
+    return _remove_trailing_commas(text + "".join(closing[c] for c in reversed(stack)))
+
+
+def _repair_truncated(text):
+    """
+    Knipt terug tot na het laatste volledige element en sluit alles af;
+    probeert de knippunten van achter naar voor.
+    """
+    _, _, commas, closes = _scan(text)
+    cuts = sorted(set(commas) | set(closes), reverse=True)[:MAX_TRUNCATION_CUTS]
+    for cut in cuts:
+        try:
+            return json.loads(_close(text[:cut]))
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("afgekapte JSON niet te herstellen")
+
+
+def repair_json(raw):
+    """
+    Parse modeloutput; herstelt wat lokaal kan.
+    Resultaat: (data, lijst toegepaste reparaties). Gooit ValueError als het niet lukt.
+    """
+    repairs = []
+    try:
+        return json.loads(raw), repairs
+    except (json.JSONDecodeError, TypeError):
+        pass
+    if not isinstance(raw, str):
+        raise ValueError("leeg antwoord")
+
+    text = _strip_wrapping(raw)
+    if text != raw.strip():
+        repairs.append("omhulling")
+    try:
+        return json.loads(text), repairs
+    except json.JSONDecodeError:
+        pass
+
+    fixed = _remove_trailing_commas(text)
+    if fixed != text:
+        repairs.append("trailing komma's")
+        try:
+            return json.loads(fixed), repairs
+        except json.JSONDecodeError:
+            pass
+
+    stack, in_string, _, _ = _scan(fixed)
+    if stack or in_string:
+        repairs.append("afgekapt")
+        return _repair_truncated(fixed), repairs
+
+    raise ValueError("ongeldige JSON")
+
+
+# =========================
+# Normaliseren
+# =========================
+def _is_placeholder(value):
+    return isinstance(value, str) and value.strip().lower() in PLACEHOLDERS
+
+
+def parse_number(value):
+    """'250' → 250, '1,5' → 1.5, '1/2' → 0.5; anders None"""
+    if not isinstance(value, str):
+        return None
+    text = value.strip().replace(",", ".")
+    if re.fullmatch(r"\d+", text):
+        return int(text)
+    if re.fullmatch(r"\d*\.\d+", text):
+        return float(text)
+    fraction = re.fullmatch(r"(\d+)\s*/\s*(\d+)", text)
+    if fraction and int(fraction.group(2)):
+        return int(fraction.group(1)) / int(fraction.group(2))
+    return None
+
+
+def normalize_recipe(recipe):
+    """
+    Herstelt placeholders en getallen-als-string (in place).
+    Resultaat: lijst toegepaste reparaties.
+    """
+    repairs = []
+    if not isinstance(recipe, dict):
+        return repairs
+
+    for key in ("title", "subtitle"):
+        if _is_placeholder(recipe.get(key)):
+            recipe[key] = None
+            repairs.append(f"placeholder {key}")
+
+    servings = recipe.get("servings")
+    if _is_placeholder(servings):
+        recipe["servings"] = None
+        repairs.append("placeholder servings")
+    elif parse_number(servings) is not None:
+        recipe["servings"] = parse_number(servings)
+        repairs.append("servings als string")
+
+    ingredients = recipe.get("ingredients")
+    if isinstance(ingredients, list):
+        kept = []
+        for ing in ingredients:
+            if not isinstance(ing, dict) or _is_placeholder(ing.get("name")):
+                repairs.append("placeholder ingrediënt")
+                continue
+            if _is_placeholder(ing.get("unit")):
+                ing["unit"] = None
+            quantity = ing.get("quantity")
+            if _is_placeholder(quantity):
+                ing["quantity"] = None
+            elif parse_number(quantity) is not None:
+                ing["quantity"] = parse_number(quantity)
+                repairs.append("hoeveelheid als string")
+            kept.append(ing)
+        recipe["ingredients"] = kept
+
+    steps = recipe.get("steps")
+    if isinstance(steps, list):
+        kept = [s.strip() for s in steps if isinstance(s, str) and s.strip() and not _is_placeholder(s)]
+        if len(kept) != len(steps):
+            repairs.append("placeholder stappen")
+        recipe["steps"] = kept
+
+    return repairs
+
+
+# =========================
+# Schema
+# =========================
+def validate_recipe(recipe):
+    """Lijst schemafouten (leeg = geldig)."""
+    if not isinstance(recipe, dict):
+        return ["recept is geen object"]
+
+    errors = []
+    title = recipe.get("title")
+    if not isinstance(title, str) or not title.strip():
+        errors.append("titel ontbreekt")
+
+    servings = recipe.get("servings")
+    if servings is not None and not isinstance(servings, (int, float, str)):
+        errors.append("servings heeft een ongeldig type")
+
+    ingredients = recipe.get("ingredients")
+    if not isinstance(ingredients, list) or not ingredients:
+        errors.append("ingrediënten ontbreken")
+    else:
+        for i, ing in enumerate(ingredients, start=1):
+            if not isinstance(ing, dict):
+                errors.append(f"ingrediënt {i} is geen object")
+                continue
+            if not isinstance(ing.get("name"), str) or not ing["name"].strip():
+                errors.append(f"ingrediënt {i} heeft geen naam")
+            if ing.get("quantity") is not None and not isinstance(ing["quantity"], (int, float, str)):
+                errors.append(f"ingrediënt {i} heeft een ongeldige hoeveelheid")
+            if ing.get("unit") is not None and not isinstance(ing["unit"], str):
+                errors.append(f"ingrediënt {i} heeft een ongeldige eenheid")
+
+    steps = recipe.get("steps")
+    if not isinstance(steps, list) or not steps:
+        errors.append("bereidingsstappen ontbreken")
+
+    return errors
+
+
+def clean_recipe(recipe):
+    """normalize_recipe + validate_recipe → (recept, reparaties, fouten)"""
+    repairs = normalize_recipe(recipe)
+    return recipe, repairs, validate_recipe(recipe)
+
+
+def clean_recipe_list(recipes):
+    """
+    Voor {"recipes": [...]}-antwoorden: een lege lijst is geldig (pagina
+    zonder recept). Resultaat: (geldige recepten, reparaties, fouten).
+    """
+    if not isinstance(recipes, list):
+        return [], [], ["'recipes' is geen lijst"]
+    valid, repairs, errors = [], [], []
+    for i, recipe in enumerate(recipes, start=1):
+        recipe, fixed, problems = clean_recipe(recipe)
+        repairs += fixed
+        if problems:
+            errors += [f"recept {i}: {p}" for p in problems]
+        else:
+            valid.append(recipe)
+    return valid, repairs, errors
+
+
+def parse_recipe(raw):
+    """Eén recept als antwoord → (recept, reparaties, fouten); ValueError bij onherstelbare JSON."""
+    data, repairs = repair_json(raw)
+    recipe, fixed, errors = clean_recipe(data)
+    return recipe, repairs + fixed, errors
+
+
+def parse_recipes(raw):
+    """{"recipes": [...]} als antwoord → (geldige recepten, reparaties, fouten)"""
+    data, repairs = repair_json(raw)
+    if isinstance(data, list):
+        data = {"recipes": data}
+        repairs.append("lijst zonder 'recipes'")
+    recipes = data.get("recipes") if isinstance(data, dict) else None
+    valid, fixed, errors = clean_recipe_list(recipes)
+    return valid, repairs + fixed, errors
+
+
+# =========================
+# Opnieuw vragen + statistiek
+# =========================
+def extract_with_retry(send, parse, prompt):
+    """
+    send(prompt) → ruwe tekst; parse(ruw) → (resultaat, reparaties, fouten).
+    Eerst lokaal repareren; enkel bij resterende fouten één gerichte
+    herhaalprompt. Resultaat: (resultaat, fouten); fouten leeg = geldig.
+    """
+    def attempt(text):
+        try:
+            return parse(send(text))
+        except ValueError as e:
+            return None, [], [f"geen geldige JSON ({e})"]
+
+    result, repairs, errors = attempt(prompt)
+    if not errors:
+        record("repaired" if repairs else "clean")
+        return result, []
+
+    retried, _, retry_errors = attempt(retry_prompt(prompt, errors))
+    if not retry_errors:
+        record("retried")
+        return retried, []
+
+    record("failed")
+    return (retried if retried is not None else result), retry_errors
+
+
+def retry_prompt(prompt, errors):
+    """Gerichte herhaalprompt: het originele schema + wat er mis was."""
+    problems = "\n".join(f"- {e}" for e in errors)
+    return f"""{prompt}
+
+Je vorige antwoord op deze afbeelding was onbruikbaar:
+{problems}
+
+Los ENKEL deze problemen op en geef het volledige antwoord opnieuw als geldig JSON.
+Gebruik de echte waarden van de afbeelding, nooit de voorbeeldwaarden uit het schema
+(zoals "string").
+"""
+
+
+def record(outcome):
+    """outcome: 'clean', 'repaired', 'retried' of 'failed' (per antwoord)"""
+    STATS["responses"] += 1
+    STATS[outcome] += 1
+    metrics.count(f"extract.{outcome}")
+
+
+def report_stats(stats=None):
+    stats = stats or STATS
+    n = stats["responses"]
+    if not n:
+        return
+    print(
+        f"🧩 {n} antwoorden: {stats['clean'] / n:.0%} meteen geldig, "
+        f"{stats['repaired'] / n:.0%} lokaal gerepareerd, "
+        f"{stats['retried'] / n:.0%} opnieuw gevraagd, {stats['failed'] / n:.0%} mislukt"
+    )
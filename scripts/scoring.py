@@ -0,0 +1,145 @@
+# scripts/scoring.py
+"""
+Gelijkenis tussen recepten: titels (SequenceMatcher) en ingrediënten met
+categoriegewichten, kookmethode, pasta en groenteaandeel. Pure functies
+zonder database-toegang.
+"""
+from difflib import SequenceMatcher
+
+import metrics
+from features import (
+    get_ingredient_weight,
+    calculate_vegetable_ratio,
+    detect_cooking_method,
+    calculate_complexity,
+    count_pasta,
+)
+
+
+# =========================
+# Title similarity helpers
+# =========================
+DUTCH_STOPWORDS = {"met", "en", "van", "in", "de", "het", "een", "voor", "op", "aan"}
+
+def normalize_title(title):
+    """Normalize title: lowercase, remove stopwords, sort words"""
+    words = title.lower().split()
+    filtered = [w for w in words if w not in DUTCH_STOPWORDS]
+    return " ".join(sorted(filtered))
+
+
+def title_similarity(a, b):
+    # Compare both original and normalized versions
+    orig_score = SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    norm_score = SequenceMatcher(None, normalize_title(a), normalize_title(b)).ratio()
+    return max(orig_score, norm_score)
+
+
+def is_similar_title(title, used_titles, threshold=0.75):
+    return any(
+        title_similarity(title, used) >= threshold
+        for used in used_titles
+    )
+
+
+# =========================
+# Ingredient similarity
+# =========================
+@metrics.timed("score.fuzzy_match")
+def fuzzy_ingredient_matches(ing1, ing2, threshold=0.85):
+    """Find fuzzy matches between two ingredient lists"""
+    matches = []
+    used_ing2 = set()
+
+    for name1 in ing1.keys():
+        for name2 in ing2.keys():
+            if name2 in used_ing2:
+                continue
+            similarity = SequenceMatcher(None, name1, name2).ratio()
+            if similarity >= threshold:
+                matches.append((name1, name2, similarity))
+                used_ing2.add(name2)
+                break
+    return matches
+
+
+@metrics.timed("score.similarity")
+def similarity_score(ing1, ing2, title1=None, title2=None, features1=None, features2=None):
+    """
+    features1/features2: optionele voorberekende kenmerken (recipe["features"]);
+    anders worden kookmethode, pasta, groenteaandeel en complexiteit hier
+    afgeleid.
+    """
+    score = 0
+    features1 = features1 or {}
+    features2 = features2 or {}
+
+    # Recipe complexity penalty (similar complexity = more similar feel)
+    complexity1 = calculate_complexity(features1.get("ingredient_count", len(ing1)))
+    complexity2 = calculate_complexity(features2.get("ingredient_count", len(ing2)))
+    complexity_diff = abs(complexity1 - complexity2)
+
+    # If both are complex (>12) or both simple (<6), penalize
+    if (complexity1 > 12 and complexity2 > 12) or (complexity1 < 6 and complexity2 < 6):
+        if complexity_diff < 3:
+            score -= 5  # Penalty for similar complexity level
+
+    # Exact matches with category weighting
+    shared = set(ing1.keys()) & set(ing2.keys())
+    for ing in shared:
+        weight = get_ingredient_weight(ing)
+        score += 2 * weight
+
+        q1, q2 = ing1[ing], ing2[ing]
+        if q1 > 0 and q2 > 0:
+            score += (min(q1, q2) / max(q1, q2)) * 2 * weight
+
+        # Bonus for common flavor ingredients
+        if ing in ["peterselie", "koriander", "room", "citroen"]:
+            score += 3 * weight
+
+    # Fuzzy matches with category weighting
+    remaining1 = {k: v for k, v in ing1.items() if k not in shared}
+    remaining2 = {k: v for k, v in ing2.items() if k not in shared}
+    fuzzy_matches = fuzzy_ingredient_matches(remaining1, remaining2)
+
+    for name1, name2, sim in fuzzy_matches:
+        weight = max(get_ingredient_weight(name1), get_ingredient_weight(name2))
+        score += 1.5 * sim * weight
+        q1, q2 = remaining1[name1], remaining2[name2]
+        if q1 > 0 and q2 > 0:
+            score += (min(q1, q2) / max(q1, q2)) * 1.5 * sim * weight
+
+    # Carb penalty
+    pasta1 = features1.get("pasta_count")
+    if pasta1 is None:
+        pasta1 = count_pasta(ing1)
+    pasta2 = features2.get("pasta_count")
+    if pasta2 is None:
+        pasta2 = count_pasta(ing2)
+    score -= pasta1 + pasta2
+
+    # Cooking method penalty
+    if "cooking_method" in features1:
+        method1 = features1["cooking_method"]
+    else:
+        method1 = detect_cooking_method(title1) if title1 else None
+    if "cooking_method" in features2:
+        method2 = features2["cooking_method"]
+    else:
+        method2 = detect_cooking_method(title2) if title2 else None
+    if method1 and method2 and method1 == method2:
+        score -= 8  # Heavy penalty for same cooking method
+
+    # Vegetable-poor recipe pair penalty
+    veg_ratio1 = features1.get("vegetable_ratio")
+    if veg_ratio1 is None:
+        veg_ratio1 = calculate_vegetable_ratio(ing1)
+    veg_ratio2 = features2.get("vegetable_ratio")
+    if veg_ratio2 is None:
+        veg_ratio2 = calculate_vegetable_ratio(ing2)
+    LOW_VEG_THRESHOLD = 0.25  # Less than 25% vegetables
+    if veg_ratio1 < LOW_VEG_THRESHOLD and veg_ratio2 < LOW_VEG_THRESHOLD:
+        score -= 6  # Penalty for both recipes being low in vegetables
+
+    return score
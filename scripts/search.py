@@ -0,0 +1,113 @@
+# scripts/search.py
+"""
+Full-text zoeken in recepten (titel, ondertitel, ingrediënten, stappen)
+via de FTS5-tabel recipe_search. Resultaten zijn gerangschikt met bm25,
+waarbij een treffer in de titel zwaarder weegt dan een treffer in de stappen.
+
+bm25 kost per treffer, dus er worden nooit meer dan CANDIDATES treffers
+gerangschikt:
+  - tot CANDIDATES treffers: exacte rangschikking over alle treffers;
+  - brede termen ("oven", "kip"): eerst de titeltreffers (de nieuwste
+    CANDIDATES daarvan), aangevuld met de nieuwste CANDIDATES treffers in
+    alle kolommen. De grens is een rowid-bereik, dat FTS5 goedkoop afkapt.
+Woorden korter dan MIN_PREFIX worden exact gezocht, niet als prefix
+("ui" is niet ook "uitloopei").
+
+    python search.py kip curry
+"""
+import re
+import sys
+
+import metrics
+from db import reader
+from generate_menu import parse_servings
+
+# bm25-gewichten per kolom: title, subtitle, ingredients, steps
+COLUMN_WEIGHTS = (10.0, 3.0, 5.0, 1.0)
+RANK_SQL = f"bm25(recipe_search, {', '.join(str(w) for w in COLUMN_WEIGHTS)})"
+CANDIDATES = 1000  # maximaal aantal treffers dat bm25 rangschikt per query
+MIN_PREFIX = 3     # kortere woorden enkel exact
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query):
+    """
+    Zet vrije invoer om naar een veilige FTS5-query:
+    elk woord wordt een prefix-term (korter dan MIN_PREFIX: exact),
+    alle termen moeten voorkomen.
+    Losse letters worden genegeerd (die matchen bijna alles).
+    """
+    tokens = [t for t in _TOKEN_RE.findall(query.lower()) if len(t) >= 2]
+    return " ".join(f'"{t}"*' if len(t) >= MIN_PREFIX else f'"{t}"' for t in tokens)
+
+
+def _window_start(cur, match):
+    """Laagste rowid van de nieuwste CANDIDATES treffers (0: niet meer treffers dan dat)"""
+    cur.execute("""
+        SELECT rowid FROM recipe_search
+        WHERE recipe_search MATCH ?
+        ORDER BY rowid DESC
+        LIMIT 1 OFFSET ?
+    """, (match, CANDIDATES - 1))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def _ranked(cur, match, start, limit):
+    """Top-`limit` treffers met rowid >= start (bm25 als kolom: sneller dan rank MATCH)"""
+    cur.execute(f"""
+        SELECT r.id, r.title, r.servings, s.score
+        FROM (
+            SELECT rowid, {RANK_SQL} AS score
+            FROM recipe_search
+            WHERE recipe_search MATCH ? AND rowid >= ?
+            ORDER BY score
+            LIMIT ?
+        ) s
+        JOIN recipes r ON r.id = s.rowid
+        ORDER BY s.score
+    """, (match, start, limit))
+    return cur.fetchall()
+
+
+@metrics.timed("search.recipes")
+def search_recipes(query, limit=20):
+    """
+    Resultaat: lijst van {"id", "title", "servings", "score"},
+    beste treffer eerst (lagere bm25-score = betere treffer; bij brede
+    termen staan de titeltreffers vooraan).
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    with reader() as conn:
+        cur = conn.cursor()
+        start = _window_start(cur, match)
+        if not start:
+            rows = _ranked(cur, match, 0, limit)
+        else:
+            title_match = f"title : ({match})"
+            rows = _ranked(cur, title_match, _window_start(cur, title_match), limit)
+            if len(rows) < limit:
+                found = {row[0] for row in rows}
+                rows += [
+                    row for row in _ranked(cur, match, start, limit)
+                    if row[0] not in found
+                ][:limit - len(rows)]
+
+    return [
+        {
+            "id": recipe_id,
+            "title": title,
+            "servings": parse_servings(servings),
+            "score": score,
+        }
+        for recipe_id, title, servings, score in rows
+    ]
+
+
+if __name__ == "__main__":
+    for hit in search_recipes(" ".join(sys.argv[1:])):
+        print(f"{hit['id']:>6}  {hit['title']}  ({hit['score']:.2f})")
@@ -0,0 +1,349 @@
+# scripts/snapshot.py
+"""
+Binaire, memory-mapped snapshot van het scoring-corpus naast recipes.db
+(data/recipes.snapshot): id's, servings, titels, ingrediënt-id's met
+hoeveelheden per persoon (CSR-layout) en de kenmerk-kolommen.
+
+Laden kost één mmap + NumPy-views zonder kopie; geen rij-per-rij SQL en
+geen parse_servings/parse_quantity meer bij het opstarten. De snapshot
+bewaart de corpusversie (db.corpus_version); klopt die niet meer, dan
+geeft current() None en valt generate_menu terug op SQLite.
+
+Importers schrijven de snapshot opnieuw na een import (refresh_snapshot).
+
+    python snapshot.py           # (her)bouwen
+    python snapshot.py --check   # is de snapshot nog actueel?
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+
+import db
+import metrics
+from db import reader
+
+MAGIC = b"WMSNAP\0\0"
+SNAPSHOT_VERSION = 2
+ALIGN = 64
+
+_current = None
+
+
+def snapshot_path():
+    return db.DB_PATH.with_suffix(".snapshot")
+
+
+# =========================
+# Schrijven
+# =========================
+def _encode_strings(strings):
+    """Lijst strings → (UTF-8 blob, offsets[n+1])"""
+    import numpy as np
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _encode_categories(values):
+    """Lijst labels (of None) → (int16-codes, labels); None = -1"""
+    import numpy as np
+
+    labels = sorted({v for v in values if v is not None})
+    index = {label: i for i, label in enumerate(labels)}
+    codes = np.array([index.get(v, -1) for v in values], dtype=np.int16)
+    return codes, labels
+
+
+@metrics.timed("snapshot.write")
+def write_snapshot(path=None):
+    """
+    Bouwt de snapshot vanuit SQLite (via recipe_model) en schrijft hem
+    atomair weg. Resultaat: pad van de snapshot.
+    """
+    import numpy as np
+    from recipe_model import Vocabulary, load_recipes
+
+    path = path or snapshot_path()
+    with reader() as conn:
+        version = corpus_version_key(conn)
+
+    vocab = Vocabulary()
+    recipes = sorted(load_recipes(vocab=vocab), key=lambda r: r.id)
+
+    offsets = np.zeros(len(recipes) + 1, dtype=np.int64)
+    np.cumsum([len(r.ingredient_ids) for r in recipes], out=offsets[1:])
+    ingredient_ids = np.empty(offsets[-1], dtype=np.int32)
+    quantities = np.empty(offsets[-1], dtype=np.float64)
+    for i, r in enumerate(recipes):
+        ingredient_ids[offsets[i]:offsets[i + 1]] = r.ingredient_ids
+        quantities[offsets[i]:offsets[i + 1]] = r.quantities
+
+    features = [r.features or {} for r in recipes]
+    has_features = np.array([bool(f) for f in features], dtype=np.bool_)
+    cooking_method, cooking_labels = _encode_categories([f.get("cooking_method") for f in features])
+    carb_type, carb_labels = _encode_categories([f.get("carb_type") for f in features])
+    main_protein, protein_labels = _encode_categories([f.get("main_protein") for f in features])
+    title_blob, title_offsets = _encode_strings([r.title for r in recipes])
+    name_blob, name_offsets = _encode_strings(vocab.names)
+
+    arrays = {
+        "ids": np.array([r.id for r in recipes], dtype=np.int32),
+        "servings": np.array([r.servings for r in recipes], dtype=np.int32),
+        "ingredient_offsets": offsets,
+        "ingredient_ids": ingredient_ids,
+        "quantities": quantities,
+        "has_features": has_features,
+        "ingredient_count": np.array([f.get("ingredient_count") or 0 for f in features], dtype=np.int32),
+        "vegetable_ratio": np.array([f.get("vegetable_ratio") or 0.0 for f in features], dtype=np.float64),
+        "pasta_count": np.array([f.get("pasta_count") or 0 for f in features], dtype=np.int8),
+        "cooking_method": cooking_method,
+        "carb_type": carb_type,
+        "main_protein": main_protein,
+        "title_blob": title_blob,
+        "title_offsets": title_offsets,
+        "name_blob": name_blob,
+        "name_offsets": name_offsets,
+    }
+
+    layout = {}
+    position = 0
+    for name, arr in arrays.items():
+        position = -(-position // ALIGN) * ALIGN
+        layout[name] = [arr.dtype.str, position, len(arr)]
+        position += arr.nbytes
+
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "corpus_version": list(version),
+        "created": time.time(),
+        "labels": {
+            "cooking_method": cooking_labels,
+            "carb_type": carb_labels,
+            "main_protein": protein_labels,
+        },
+        "arrays": layout,
+    }).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGN) * ALIGN
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(data_start + layout[name][1])
+            f.write(arr.tobytes())
+        f.truncate(data_start + position)
+    os.replace(tmp, path)
+    return path
+
+
+def corpus_version_key(conn):
+    return [SNAPSHOT_VERSION, *db.corpus_version(conn)]
+
+
+# =========================
+# Laden
+# =========================
+class CorpusSnapshot:
+    """Read-only views op een memory-mapped snapshot-bestand."""
+
+    def __init__(self, path):
+        import numpy as np
+
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"geen snapshot: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[header_start:header_start + header_len])
+        data_start = -(-(header_start + header_len) // ALIGN) * ALIGN
+
+        for name, (dtype, offset, count) in self.header["arrays"].items():
+            view = np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=count,
+                                 offset=data_start + offset)
+            setattr(self, name, view)
+
+        self.labels = self.header["labels"]
+        self._rows = None
+        self._names = None
+        self._titles = None
+        self._features = None
+
+    @property
+    def corpus_version(self):
+        return self.header["corpus_version"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Strings worden pas bij gebruik gedecodeerd
+    def _strings(self, blob, offsets):
+        raw = blob.tobytes()
+        bounds = offsets.tolist()
+        return [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = self._strings(self.name_blob, self.name_offsets)
+        return self._names
+
+    @property
+    def titles(self):
+        if self._titles is None:
+            self._titles = self._strings(self.title_blob, self.title_offsets)
+        return self._titles
+
+    def row_of(self, recipe_id):
+        """Rij-index van een recept-id (of None)"""
+        if self._rows is None:
+            self._rows = {rid: i for i, rid in enumerate(self.ids.tolist())}
+        return self._rows.get(recipe_id)
+
+    def _feature_columns(self):
+        """Kenmerk-kolommen als Python-lijsten (één keer per snapshot)"""
+        if self._features is None:
+            def decode(column):
+                labels = self.labels[column]
+                return [labels[c] if c >= 0 else None for c in getattr(self, column).tolist()]
+
+            self._features = (
+                self.has_features.tolist(),
+                self.ingredient_count.tolist(),
+                decode("cooking_method"),
+                decode("carb_type"),
+                self.vegetable_ratio.tolist(),
+                decode("main_protein"),
+                self.pasta_count.tolist(),
+            )
+        return self._features
+
+    def features(self, row):
+        has, count, method, carb, veg, protein, pasta = self._feature_columns()
+        if not has[row]:
+            return None
+        return {
+            "ingredient_count": count[row],
+            "cooking_method": method[row],
+            "carb_type": carb[row],
+            "vegetable_ratio": veg[row],
+            "main_protein": protein[row],
+            "pasta_count": pasta[row],
+        }
+
+    def recipe_dicts(self, recipe_ids=None):
+        """Zelfde vorm als generate_menu.get_all_recipes()"""
+        titles = self.titles
+        servings = self.servings.tolist()
+        ids = self.ids.tolist()
+        if recipe_ids is None:
+            rows = range(len(self))
+        else:
+            rows = sorted(r for r in map(self.row_of, recipe_ids) if r is not None)
+        return [
+            {
+                "id": ids[row],
+                "title": titles[row],
+                "servings": servings[row],
+                "features": self.features(row),
+            }
+            for row in rows
+        ]
+
+    def scaled_ingredients(self, recipe_id):
+        """{naam: hoeveelheid per persoon}, of None als het recept niet in de snapshot zit"""
+        row = self.row_of(recipe_id)
+        if row is None:
+            return None
+        start, end = self.ingredient_offsets[row], self.ingredient_offsets[row + 1]
+        names = self.names
+        return dict(zip(
+            [names[i] for i in self.ingredient_ids[start:end].tolist()],
+            self.quantities[start:end].tolist(),
+        ))
+
+
+def load_snapshot(path=None):
+    """Memory-mapt de snapshot; None als hij ontbreekt of een ander formaat heeft."""
+    path = path or snapshot_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with metrics.span("snapshot.load"):
+            snap = CorpusSnapshot(path)
+    except (ValueError, OSError, ImportError):
+        return None
+    if snap.header.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snap
+
+
+def current():
+    """
+    De actuele snapshot voor db.DB_PATH, of None (ontbreekt of verouderd →
+    terugvallen op SQLite). Kost één kleine query om de corpusversie te vergelijken.
+    """
+    global _current
+    with reader() as conn:
+        version = corpus_version_key(conn)
+
+    path = snapshot_path()
+    if _current is None or _current.path != path or _current.corpus_version != version:
+        _current = load_snapshot(path)
+        if _current is not None and _current.corpus_version != version:
+            metrics.count("snapshot.stale")
+            _current = None
+    return _current
+
+
+def active():
+    """Laatst gevalideerde snapshot (zonder nieuwe versiecontrole), of None"""
+    if _current is not None and _current.path == snapshot_path():
+        return _current
+    return None
+
+
+def refresh_snapshot():
+    """Herbouwt de snapshot als hij ontbreekt of verouderd is (na een import)."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return None
+    if current() is None:
+        path = write_snapshot()
+        print(f"🗂️  Snapshot bijgewerkt: {path}")
+        return current()
+    return _current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binaire corpus-snapshot voor snelle opstart")
+    parser.add_argument("--check", action="store_true", help="enkel controleren of hij actueel is")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    def run():
+        if args.check:
+            snap = current()
+            print("✅ Snapshot is actueel" if snap else "⚠️  Snapshot ontbreekt of is verouderd")
+            return
+        start = time.perf_counter()
+        path = write_snapshot()
+        snap = current()
+        print(f"✅ {len(snap)} recepten → {path} ({os.path.getsize(path) / 2**20:.1f} MB, "
+              f"{time.perf_counter() - start:.2f} s)")
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# scripts/synth_corpus.py
+"""
+Synthetische receptendatabase voor benchmarks.
+
+Bouwt realistische (Nederlandstalige) recepten met ingrediënten, stappen en
+OCR-achtige ruis in namen, in hetzelfde schema als recipes.db.
+
+Gebruik:
+    python synth_corpus.py 10000 -o ../benchmarks/corpora/synth_10000.db
+    python synth_corpus.py 1000 --json-dir /tmp/ocr_synth   # JSON-bestanden voor import_json
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+import metrics
+from db import (
+    connect, ensure_tables_exist, rebuild_search_index, backfill_recipe_features,
+    backfill_ingredient_names, recipe_fingerprint,
+)
+
+# =========================
+# Vocabulaire
+# =========================
+PROTEINS = [
+    "kipfilet", "kippendijen", "rundergehakt", "biefstuk", "varkenshaas",
+    "spekblokjes", "zalmfilet", "kabeljauwfilet", "garnalen", "tonijn",
+    "eieren", "halloumi", "tofu", "kikkererwten", "linzen", "falafel",
+    "Oosters gekruid rundergehakt", "varkensboerengehakt", "kippengehakt",
+]
+VEGETABLES = [
+    "ui", "rode ui", "knoflookteen", "tomaten", "cherrytomaten", "paprika",
+    "rode puntpaprika", "courgette", "aubergine", "wortel", "broccoli",
+    "bloemkool", "prei", "champignons", "spinazie", "rucola", "sla",
+    "witte kool", "rode kool", "peultjes", "sperziebonen", "doperwten",
+    "komkommer", "venkel", "pompoen", "zoete aardappel", "maïs in blik",
+    "bosui", "radijs", "pak choi", "boerenkool", "knolselderij",
+]
+CARBS = [
+    "spaghetti", "penne", "fusilli", "tagliatelle", "basmatirijst",
+    "jasmijnrijst", "krieltjes", "aardappelen", "couscous", "bulgur",
+    "volkoren mini-tortilla", "naanbrood", "noedels", "gnocchi", "parelcouscous",
+]
+FLAVOURS = [
+    "citroen", "limoen", "peterselie", "koriander", "basilicum", "room",
+    "kookroom", "crème fraîche", "geraspte kaas", "feta", "mozzarella",
+    "sojasaus", "gemberpuree", "kerriepoeder", "paprikapoeder", "komijn",
+    "honing", "mosterd", "tomatenpuree", "kokosmelk", "groentebouillon",
+    "Zoete Aziatische saus", "Gezouten pinda's", "pesto",
+]
+PANTRY = ["olijfolie", "zout", "peper", "boter", "zonnebloemolie", "water"]
+
+UNITS = {
+    "g": ["g", "gram"],
+    "ml": ["ml"],
+    "st": ["stuk(s)", "stuks", "st"],
+    "el": ["el", "tl"],
+}
+
+DISHES = [
+    "ovenschotel", "curry", "wokgerecht", "salade", "soep", "pasta",
+    "risotto", "burger", "stoofpot", "traybake", "bowl", "wraps", "quiche",
+]
+CONNECTORS = ["met", "en", "uit de oven met", "op", "van"]
+
+SERVINGS_STYLES = [
+    "{n}", "{n} personen", "1-6 personen (ingrediënten hieronder zijn voor {n} personen)",
+]
+
+STEP_TEMPLATES = [
+    "Verwarm de oven voor op {temp} graden.",
+    "Snijd de {veg} in stukjes en de {veg2} in reepjes.",
+    "Verhit de {pantry} in een koekenpan en bak de {protein} in {min} minuten gaar.",
+    "Kook de {carb} volgens de aanwijzingen op de verpakking.",
+    "Meng de {flavour} met de {veg} en breng op smaak met peper en zout.",
+    "Voeg de {veg2} toe en bak nog {min} minuten mee.",
+    "Serveer de {carb} met de {protein} en garneer met {flavour}.",
+]
+
+# Typische OCR-fouten
+OCR_SUBSTITUTIONS = [
+    ("rn", "m"), ("m", "rn"), ("l", "1"), ("i", "l"), ("o", "0"),
+    ("e", "c"), ("ë", "e"), ("é", "e"), ("ï", "i"), ("cl", "d"),
+]
+
+
+# =========================
+# Ruis
+# =========================
+def ocr_noise(name, rng, rate):
+    """Past met kans `rate` één OCR-achtige fout toe op een naam."""
+    if rng.random() >= rate:
+        return name
+
+    kind = rng.random()
+    if kind < 0.5:
+        candidates = [(a, b) for a, b in OCR_SUBSTITUTIONS if a in name]
+        if candidates:
+            a, b = rng.choice(candidates)
+            return name.replace(a, b, 1)
+    if kind < 0.7:
+        return name.capitalize() if name.islower() else name.lower()
+    if kind < 0.85:
+        return name + rng.choice(["*", " ", "  "])
+    if len(name) > 4:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]
+    return name
+
+
+def quantity_for(unit, rng):
+    if unit == "g":
+        return str(rng.choice([50, 75, 100, 150, 200, 250, 300, 400, 500, 750]))
+    if unit == "ml":
+        return str(rng.choice([50, 100, 150, 200, 250, 400]))
+    if unit == "el":
+        return rng.choice(["½", "1", "1½", "2", "1,5", "3"])
+    return str(rng.choice([1, 1, 2, 3, 4]))
+
+
+# =========================
+# Recepten
+# =========================
+def synthetic_recipe(rng, noise=0.08):
+    protein = rng.choice(PROTEINS)
+    vegs = rng.sample(VEGETABLES, rng.randint(2, 6))
+    carb = rng.choice(CARBS)
+    flavours = rng.sample(FLAVOURS, rng.randint(1, 5))
+    pantry = rng.sample(PANTRY, rng.randint(0, 3))
+
+    title = (
+        f"{rng.choice(DISHES).capitalize()} {rng.choice(CONNECTORS)} {protein}, "
+        f"{vegs[0]} en {carb}"
+    )
+
+    ingredients = []
+    for name in [protein, carb] + vegs + flavours + pantry:
+        unit_key = rng.choice(list(UNITS))
+        ingredients.append({
+            "name": ocr_noise(name, rng, noise),
+            "quantity": quantity_for(unit_key, rng),
+            "unit": rng.choice(UNITS[unit_key]),
+        })
+
+    steps = []
+    for template in rng.sample(STEP_TEMPLATES, rng.randint(3, len(STEP_TEMPLATES))):
+        steps.append(template.format(
+            temp=rng.choice([180, 200, 220]),
+            veg=rng.choice(vegs), veg2=rng.choice(vegs),
+            pantry=pantry[0] if pantry else "olie",
+            protein=protein, carb=carb,
+            flavour=rng.choice(flavours),
+            min=rng.randint(3, 15),
+        ))
+
+    return {
+        "title": ocr_noise(title, rng, noise / 2),
+        "subtitle": None,
+        "servings": rng.choice(SERVINGS_STYLES).format(n=rng.choice([2, 3, 4])),
+        "ingredients": ingredients,
+        "steps": steps,
+    }
+
+
+def generate_recipes(n, seed=42, noise=0.08):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield synthetic_recipe(rng, noise)
+
+
+# =========================
+# Output
+# =========================
+def build_database(path, n, seed=42, noise=0.08, batch_size=1000):
+    """
+    Schrijft n synthetische recepten naar een nieuwe SQLite-database.
+    Gebruikt bulk-inserts (één transactie per batch) i.p.v. insert_recipe.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale in (path, path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")):
+        if stale.exists():
+            stale.unlink()
+
+    conn = connect(path)
+    ensure_tables_exist(conn)
+    cur = conn.cursor()
+
+    recipe_id = 0
+    batch = []
+
+    def flush():
+        recipes, ingredients, steps = [], [], []
+        nonlocal recipe_id
+        for recipe in batch:
+            recipe_id += 1
+            recipes.append((
+                recipe_id, recipe["title"], recipe["subtitle"], recipe["servings"],
+                "synthetic", f"{recipe_fingerprint(recipe)}:{recipe_id}",
+            ))
+            ingredients.extend(
+                (recipe_id, ing["name"], ing["quantity"], ing["unit"])
+                for ing in recipe["ingredients"]
+            )
+            steps.extend(
+                (recipe_id, nr, text)
+                for nr, text in enumerate(recipe["steps"], start=1)
+            )
+        cur.executemany(
+            "INSERT INTO recipes (id, title, subtitle, servings, source, fingerprint) VALUES (?,?,?,?,?,?)",
+            recipes,
+        )
+        cur.executemany(
+            "INSERT INTO ingredients (recipe_id, name, quantity, unit) VALUES (?,?,?,?)",
+            ingredients,
+        )
+        cur.executemany(
+            "INSERT INTO steps (recipe_id, step_number, text) VALUES (?,?,?)",
+            steps,
+        )
+        conn.commit()
+        batch.clear()
+
+    for recipe in generate_recipes(n, seed, noise):
+        batch.append(recipe)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    rebuild_search_index(conn)
+    backfill_ingredient_names(conn, only_missing=True)
+    backfill_recipe_features(conn)
+    conn.close()
+    return path
+
+
+def write_json_corpus(directory, n, seed=42, noise=0.08, per_file=1):
+    """Schrijft synthetische recepten als OCR-achtige JSON-bestanden."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    recipes = list(generate_recipes(n, seed, noise))
+    for i in range(0, len(recipes), per_file):
+        chunk = recipes[i:i + per_file]
+        data = chunk[0] if per_file == 1 else {"recipes": chunk}
+        (directory / f"Synth {i // per_file + 1}.json").write_text(
+            json.dumps(data, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+    return directory
+
+
+# =========================
+# Main
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="Genereer een synthetische receptendatabase")
+    parser.add_argument("n", type=int, help="aantal recepten")
+    parser.add_argument("-o", "--output", help="pad naar .db-bestand")
+    parser.add_argument("--json-dir", help="schrijf JSON-bestanden i.p.v. een database")
+    parser.add_argument("--per-file", type=int, default=1, help="recepten per JSON-bestand")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--noise", type=float, default=0.08, help="kans op OCR-fout per naam")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    def run():
+        start = time.perf_counter()
+        if args.json_dir:
+            write_json_corpus(args.json_dir, args.n, args.seed, args.noise, args.per_file)
+            target = args.json_dir
+        else:
+            target = build_database(args.output or f"synth_{args.n}.db", args.n, args.seed, args.noise)
+
+        print(f"✅ {args.n} synthetische recepten → {target} ({time.perf_counter() - start:.1f} s)")
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+# scripts/tfidf_index.py
+"""
+TF-IDF-index over canonieke ingrediënten en titelwoorden, voor "meer zoals
+dit" en "iets helemaal anders" (generate_menu.replace_similar).
+
+Elk recept is een ijle vector met termen "i:<name_id>" (canonieke
+ingrediënten, elk één keer) en "t:<woord>" (titelwoorden zonder stopwoorden,
+gewicht TITLE_WEIGHT); gewicht tf·idf met idf = ln((1+n)/(1+df)) + 1, per
+recept L2-genormaliseerd. Gelijkenis is dus cosinus; de scores van één
+recept tegen het hele corpus zijn één gather over de posting-lijsten van
+zijn termen (CSC) + np.bincount.
+
+Op schijf naast recipes.db (data/recipes.tfidf.npz): de ruwe
+termfrequenties per recept (CSR), df per term en de termlijst, plus de
+corpusversie en een controlesom van de geïndexeerde recepten. Na een import
+voegt refresh_tfidf_index enkel de nieuwe recepten toe (nieuwe termen
+achteraan, df bijgewerkt); idf en gewichten worden bij het laden
+gevectoriseerd herberekend. Zijn bestaande recepten gewijzigd (backfill van
+ingrediëntnamen, verwijderd recept), dan wordt de index volledig herbouwd.
+
+NumPy wordt pas bij gebruik geladen.
+
+    python tfidf_index.py               # bijwerken (incrementeel waar mogelijk)
+    python tfidf_index.py --rebuild
+    python tfidf_index.py --like 42     # meest gelijkende recepten
+    python tfidf_index.py --unlike 42   # meest verschillende recepten
+"""
+import argparse
+import json
+import os
+import re
+
+import db
+import metrics
+from db import reader
+from scoring import DUTCH_STOPWORDS
+
+FORMAT_VERSION = 1
+TITLE_WEIGHT = 0.5  # titelwoorden tellen half zo zwaar als een ingrediënt
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_cache = {}
+
+
+def index_path():
+    return db.DB_PATH.with_suffix(".tfidf.npz")
+
+
+def title_terms(title):
+    return {
+        f"t:{w}" for w in _TOKEN_RE.findall((title or "").lower())
+        if w not in DUTCH_STOPWORDS and len(w) > 2 and not w.isdigit()
+    }
+
+
+# =========================
+# Termen uit SQLite
+# =========================
+def _checksum(cur, max_id):
+    """Verandert als recepten t/m max_id of hun ingrediënten wijzigen"""
+    cur.execute("""
+        SELECT (SELECT count(*) FROM recipes WHERE id <= ?),
+               (SELECT total(length(title)) FROM recipes WHERE id <= ?),
+               count(*), total(name_id)
+        FROM ingredients WHERE recipe_id <= ?
+    """, (max_id, max_id, max_id))
+    return [float(v) for v in cur.fetchone()]
+
+
+def _read_terms(cur, after_id, vocab, term_ids):
+    """
+    Termen van de recepten met id > after_id. vocab/term_ids worden
+    aangevuld met nieuwe termen. Resultaat: (ids, offsets, terms, tf) als lijsten.
+    """
+    cur.execute("SELECT id, title FROM recipes WHERE id > ? ORDER BY id", (after_id,))
+    recipes = cur.fetchall()
+
+    cur.execute("""
+        SELECT DISTINCT recipe_id, name_id FROM ingredients
+        WHERE recipe_id > ? AND name_id IS NOT NULL
+    """, (after_id,))
+    by_recipe = {}
+    for recipe_id, name_id in cur.fetchall():
+        by_recipe.setdefault(recipe_id, []).append(f"i:{name_id}")
+
+    def term_id(term):
+        tid = term_ids.get(term)
+        if tid is None:
+            tid = term_ids[term] = len(vocab)
+            vocab.append(term)
+        return tid
+
+    ids, offsets, terms, tf = [], [0], [], []
+    for recipe_id, title in recipes:
+        for term in by_recipe.get(recipe_id, ()):
+            terms.append(term_id(term))
+            tf.append(1.0)
+        for term in sorted(title_terms(title)):
+            terms.append(term_id(term))
+            tf.append(TITLE_WEIGHT)
+        ids.append(recipe_id)
+        offsets.append(len(terms))
+    return ids, offsets, terms, tf
+
+
+# =========================
+# Index
+# =========================
+class TfidfIndex:
+    """
+    Ruwe tf per recept (CSR) + afgeleide tf·idf-gewichten in CSR en CSC.
+    ids zijn oplopend (recept-id's), rij i = ids[i].
+    """
+
+    def __init__(self, ids, offsets, terms, tf, vocab, meta):
+        import numpy as np
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.terms = np.asarray(terms, dtype=np.int32)
+        self.tf = np.asarray(tf, dtype=np.float32)
+        self.vocab = list(vocab)
+        self.meta = meta
+        self.n = len(self.ids)
+
+        self.df = np.bincount(self.terms, minlength=len(self.vocab)).astype(np.int32)
+        self.idf = (np.log((1.0 + self.n) / (1.0 + self.df)) + 1.0).astype(np.float32)
+
+        rows = np.repeat(np.arange(self.n, dtype=np.int32), np.diff(self.offsets))
+        weights = self.tf * self.idf[self.terms]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=self.n))
+        norms[norms == 0] = 1.0
+        self.weights = (weights / norms[rows]).astype(np.float32)
+
+        order = np.argsort(self.terms, kind="stable")
+        self.csc_rows = rows[order]
+        self.csc_weights = self.weights[order]
+        self.csc_offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(self.df, out=self.csc_offsets[1:])
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def corpus_version(self):
+        return self.meta["corpus_version"]
+
+    def row_of(self, recipe_id):
+        row = int(self.ids.searchsorted(recipe_id))
+        if row < self.n and self.ids[row] == recipe_id:
+            return row
+        return None
+
+    def rows_of(self, recipe_ids):
+        """Rij-indexen van de recept-id's die in de index zitten"""
+        import numpy as np
+
+        recipe_ids = np.fromiter(recipe_ids, dtype=np.int64)
+        if not self.n:
+            return recipe_ids[:0]
+        rows = np.minimum(self.ids.searchsorted(recipe_ids), self.n - 1)
+        return rows[self.ids[rows] == recipe_ids]
+
+    def scores(self, row):
+        """Cosinus-gelijkenis van recept `row` met alle recepten (array van n)"""
+        import numpy as np
+
+        start, end = self.offsets[row], self.offsets[row + 1]
+        q_terms, q_weights = self.terms[start:end], self.weights[start:end]
+        starts = self.csc_offsets[q_terms]
+        lengths = self.csc_offsets[q_terms + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(self.n, dtype=np.float64)
+
+        # Posting-lijsten van alle querytermen aan elkaar, zonder Python-lus
+        shift = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        postings = shift + np.arange(total)
+        contributions = self.csc_weights[postings] * np.repeat(q_weights, lengths)
+        return np.bincount(self.csc_rows[postings], weights=contributions, minlength=self.n)
+
+    @metrics.timed("tfidf.nearest")
+    def nearest(self, recipe_id, k=10, farthest=False, exclude=(), allowed=None):
+        """
+        [(recept-id, cosinus)] van de k meest gelijkende recepten (farthest:
+        de k minst gelijkende), het recept zelf en `exclude` niet meegerekend.
+        allowed: enkel deze recept-id's (bv. na voorwaarden), of None.
+        """
+        import numpy as np
+
+        row = self.row_of(recipe_id)
+        if row is None:
+            return []
+        scores = self.scores(row)
+
+        keep = np.ones(self.n, dtype=bool)
+        if allowed is not None:
+            keep[:] = False
+            keep[self.rows_of(allowed)] = True
+        if exclude:
+            keep[self.rows_of(exclude)] = False
+        keep[row] = False
+
+        candidates = np.flatnonzero(keep)
+        if not len(candidates):
+            return []
+        key = scores[candidates] if farthest else -scores[candidates]
+        k = min(k, len(candidates))
+        top = np.argpartition(key, k - 1)[:k]
+        top = top[np.argsort(key[top], kind="stable")]
+        chosen = candidates[top]
+        return list(zip(self.ids[chosen].tolist(), scores[chosen].tolist()))
+
+    def top_terms(self, recipe_id, limit=5):
+        """Zwaarste termen van een recept (voor uitleg/debug)"""
+        row = self.row_of(recipe_id)
+        if row is None:
+            return []
+        start, end = self.offsets[row], self.offsets[row + 1]
+        pairs = sorted(zip(self.weights[start:end].tolist(), self.terms[start:end].tolist()), reverse=True)
+        return [(self.vocab[t], w) for w, t in pairs[:limit]]
+
+
+# =========================
+# Opslaan / laden / bijwerken
+# =========================
+def save_index(index, path=None):
+    import numpy as np
+
+    path = path or index_path()
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            ids=index.ids,
+            offsets=index.offsets,
+            terms=index.terms,
+            tf=index.tf,
+            vocab=np.array(index.vocab, dtype=str),
+            meta=np.array(json.dumps(index.meta)),
+        )
+    os.replace(tmp, path)
+    return path
+
+
+def load_index(path=None):
+    """Index van schijf, of None als hij ontbreekt of een ander formaat heeft"""
+    import numpy as np
+
+    path = path or index_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with metrics.span("tfidf.load"), np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format") != FORMAT_VERSION:
+                return None
+            return TfidfIndex(data["ids"], data["offsets"], data["terms"], data["tf"],
+                              data["vocab"].tolist(), meta)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+@metrics.timed("tfidf.refresh")
+def refresh_tfidf_index(rebuild=False):
+    """
+    Brengt de index op schijf in lijn met de database en geeft hem terug.
+    Enkel nieuwe recepten erbij → incrementeel; anders volledig herbouwen.
+    """
+    import numpy as np
+
+    with reader() as conn:
+        cur = conn.cursor()
+        version = list(db.corpus_version(conn))
+
+        index = None if rebuild else load_index()
+        if index is not None and index.corpus_version == version:
+            return index
+
+        old = None
+        if index is not None:
+            max_id = int(index.ids[-1]) if index.n else 0
+            if _checksum(cur, max_id) == index.meta["checksum"]:
+                old, after_id, vocab = index, max_id, index.vocab
+                metrics.count("tfidf.incremental")
+            else:
+                metrics.count("tfidf.rebuild")
+        if old is None:
+            after_id, vocab = 0, []
+
+        term_ids = {term: i for i, term in enumerate(vocab)}
+        ids, offsets, terms, tf = _read_terms(cur, after_id, vocab, term_ids)
+        added = len(ids)
+        if old is not None:
+            ids = np.concatenate((old.ids, ids))
+            offsets = np.concatenate((old.offsets, old.offsets[-1] + np.asarray(offsets[1:], dtype=np.int64)))
+            terms = np.concatenate((old.terms, np.asarray(terms, dtype=np.int32)))
+            tf = np.concatenate((old.tf, np.asarray(tf, dtype=np.float32)))
+
+        max_id = int(ids[-1]) if len(ids) else 0
+        meta = {
+            "format": FORMAT_VERSION,
+            "corpus_version": version,
+            "checksum": _checksum(cur, max_id),
+            "added": added,
+        }
+
+    index = TfidfIndex(ids, offsets, terms, tf, vocab, meta)
+    save_index(index)
+    return index
+
+
+def get_tfidf_index():
+    """Gecachet per database en corpusversie; verouderd op schijf → eerst bijwerken"""
+    with reader() as conn:
+        key = (str(db.DB_PATH), tuple(db.corpus_version(conn)))
+    index = _cache.get(key)
+    if index is None:
+        index = refresh_tfidf_index()
+        _cache.clear()
+        _cache[key] = index
+    return index
+
+
+def refresh_after_import():
+    """Voor importers: index bijwerken als NumPy beschikbaar is"""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return None
+    index = refresh_tfidf_index()
+    print(f"🧭 TF-IDF-index bijgewerkt: {len(index)} recepten ({index.meta['added']} nieuw)")
+    return index
+
+
+# =========================
+# CLI
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="TF-IDF-index voor gelijkende recepten")
+    parser.add_argument("--rebuild", action="store_true", help="volledig herbouwen")
+    parser.add_argument("--like", type=int, metavar="RECEPT_ID", help="meest gelijkende recepten")
+    parser.add_argument("--unlike", type=int, metavar="RECEPT_ID", help="meest verschillende recepten")
+    parser.add_argument("-k", type=int, default=10)
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    def run():
+        from generate_menu import get_recipe_titles
+
+        index = refresh_tfidf_index(args.rebuild)
+        with reader() as conn:
+            names = dict(conn.execute("SELECT id, name FROM ingredient_names").fetchall())
+
+        def term_label(term):
+            kind, value = term.split(":", 1)
+            return names.get(int(value), term) if kind == "i" else f"'{value}'"
+
+        print(f"🧭 {len(index)} recepten, {len(index.vocab)} termen ({index.meta['added']} nieuw)")
+        for recipe_id, farthest in ((args.like, False), (args.unlike, True)):
+            if recipe_id is None:
+                continue
+            hits = index.nearest(recipe_id, args.k, farthest=farthest)
+            titles = get_recipe_titles([recipe_id] + [h for h, _ in hits])
+            label = "Minst gelijkend op" if farthest else "Meest gelijkend op"
+            print(f"\n{label}: {titles.get(recipe_id, recipe_id)}")
+            print("   " + ", ".join(f"{term_label(term)} ({w:.2f})" for term, w in index.top_terms(recipe_id)))
+            for hit, score in hits:
+                print(f"{hit:>6}  {score:.3f}  {titles.get(hit, hit)}")
+
+    metrics.run_cli(run, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# scripts/variety.py
+"""
+Groentevariëteit als bitmaskers.
+
+De groentevocabulaire is vast: alle canonieke ingrediëntnamen die een
+groente zijn (is_vocabulary_vegetable), in volgorde van ingredient_names.id
+(nieuwe namen krijgen dus nieuwe bits achteraan). Per recept één Python-int
+met een bit per groente, één keer per corpusversie opgebouwd met één query.
+
+Het aantal unieke groenten in een (gedeeltelijk) menu is dan de popcount
+van de OR van de maskers; wat een kandidaat toevoegt is
+popcount(masker & ~unie). generate_week_menu gebruikt dat bij elke keuze
+als scoreterm en als haalbaarheidsfilter, en repair_variety ruilt achteraf
+dagen om als het doel toch niet gehaald is.
+"""
+import re
+
+import db
+import metrics
+from db import reader
+from features import INGREDIENT_CATEGORIES
+from scoring import is_similar_title
+
+MIN_VEGETABLE_VARIETY = 15  # unieke groenten per week
+VEGETABLE_BONUS = 2.0       # score per nieuwe groente zolang het doel niet gehaald is
+MAX_REPAIR_SWAPS = 7
+
+VEGETABLE_KEYS = [key for key, weight in INGREDIENT_CATEGORIES.items() if weight == 3.0]
+
+_cache = {}
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:  # Python < 3.10
+    def popcount(mask):
+        return bin(mask).count("1")
+
+
+def is_vocabulary_vegetable(name):
+    """
+    Per woord i.p.v. als substring (features.is_vegetable telt ook "suiker"
+    en "kruidenmix" mee, want daarin zit "ui"): een woord is de groente,
+    eindigt erop ("botersla", "cherrytomaten") of begint ermee voor sleutels
+    vanaf 4 letters ("uienchutney", "wortelen").
+    """
+    for word in re.split(r"[^\w]+", name.lower()):
+        for key in VEGETABLE_KEYS:
+            if word == key or word.endswith(key) or (len(key) >= 4 and word.startswith(key)):
+                return True
+    return False
+
+
+class VegetableMasks:
+    """Vaste groentevocabulaire + {recipe_id: bitmasker}"""
+
+    __slots__ = ("names", "masks", "max_count")
+
+    def __init__(self, names, masks):
+        self.names = names
+        self.masks = masks
+        self.max_count = max(map(popcount, masks.values()), default=0)
+
+    def mask(self, recipe_id):
+        return self.masks.get(recipe_id, 0)
+
+    def union(self, menu):
+        union = 0
+        for recipe in menu:
+            if recipe:
+                union |= self.mask(recipe["id"])
+        return union
+
+    def gain(self, recipe_id, union):
+        """Aantal groenten dat dit recept aan de unie toevoegt"""
+        return popcount(self.mask(recipe_id) & ~union)
+
+    def names_of(self, mask):
+        return {name for bit, name in enumerate(self.names) if mask >> bit & 1}
+
+
+@metrics.timed("variety.build_masks")
+def build_vegetable_masks():
+    with reader() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, name FROM ingredient_names
+            WHERE id IN (SELECT name_id FROM ingredients)
+            ORDER BY id
+        """)
+        vocabulary = [(name_id, name) for name_id, name in cur.fetchall() if is_vocabulary_vegetable(name)]
+        bits = {name_id: bit for bit, (name_id, _) in enumerate(vocabulary)}
+
+        cur.execute("""
+            SELECT recipe_id, name_id FROM ingredients
+            WHERE name_id IN (SELECT value FROM json_each(?))
+        """, (f"[{','.join(map(str, bits))}]",))
+        masks = {}
+        for recipe_id, name_id in cur.fetchall():
+            masks[recipe_id] = masks.get(recipe_id, 0) | (1 << bits[name_id])
+
+    return VegetableMasks([name for _, name in vocabulary], masks)
+
+
+def get_vegetable_masks():
+    """Gecachet per database en corpusversie."""
+    with reader() as conn:
+        key = (str(db.DB_PATH), db.corpus_version(conn))
+    masks = _cache.get(key)
+    if masks is None:
+        masks = build_vegetable_masks()
+        _cache.clear()
+        _cache[key] = masks
+    return masks
+
+
+# =========================
+# Tijdens het genereren
+# =========================
+def variety_bonus(masks, recipe_id, union, target=MIN_VEGETABLE_VARIETY):
+    """Scoreterm: nieuwe groenten, tot het doel bereikt is"""
+    need = target - popcount(union)
+    if need <= 0:
+        return 0.0
+    return VEGETABLE_BONUS * min(masks.gain(recipe_id, union), need)
+
+
+def feasible(candidates, masks, union, days_after, target=MIN_VEGETABLE_VARIETY):
+    """
+    Harde voorwaarde: laat enkel kandidaten over waarna het doel nog haalbaar
+    is (bovengrens: elke volgende dag brengt max_count nieuwe groenten).
+    Haalt geen enkele kandidaat het, dan blijven ze allemaal over.
+    """
+    if popcount(union) >= target:
+        return candidates
+    reachable = target - days_after * masks.max_count
+    kept = [r for r in candidates if popcount(union | masks.mask(r["id"])) >= reachable]
+    return kept or candidates
+
+
+# =========================
+# Herstel achteraf
+# =========================
+@metrics.timed("variety.repair")
+def repair_variety(menu, pool_for_day, masks, target=MIN_VEGETABLE_VARIETY,
+                   locked=frozenset(), max_swaps=MAX_REPAIR_SWAPS):
+    """
+    Ruilt telkens de dag + kandidaat die het aantal unieke groenten het meest
+    verhoogt, tot het doel gehaald is of geen ruil nog helpt.
+    pool_for_day(dag) → toegelaten recepten voor die dag (voorwaarden,
+    geschiedenis); recepten die al op het menu staan worden overgeslagen.
+    locked: dagen die niet geruild mogen worden (bv. must-use).
+    Resultaat: (menu, aantal ruilen).
+    """
+    menu = list(menu)
+    swaps = 0
+    # Per dag: {masker: [recepten]}, één keer opgebouwd; kandidaten zonder groenten tellen niet
+    groups = {}
+
+    def by_mask(day):
+        if day not in groups:
+            grouped = {}
+            for candidate in pool_for_day(day):
+                mask = masks.mask(candidate["id"])
+                if mask:
+                    grouped.setdefault(mask, []).append(candidate)
+            groups[day] = grouped
+        return groups[day]
+
+    while swaps < max_swaps:
+        current = popcount(masks.union(menu))
+        if current >= target:
+            break
+
+        taken = {r["id"] for r in menu}
+        best = None
+        for day in range(len(menu)):
+            if day in locked:
+                continue
+            others = masks.union(menu[:day] + menu[day + 1:])
+            grouped = by_mask(day)
+            ranked = sorted(grouped, key=lambda m: popcount(others | m), reverse=True)
+
+            titles = [r["title"] for i, r in enumerate(menu) if i != day]
+            for mask in ranked:
+                count = popcount(others | mask)
+                if count <= current or (best and count <= best[0]):
+                    break
+                fresh = [
+                    c for c in grouped[mask][:10]
+                    if c["id"] not in taken and not is_similar_title(c["title"], titles)
+                ]
+                if fresh:
+                    best = (count, day, fresh[0])
+                    break
+
+        if best is None:
+            break
+        _, day, replacement = best
+        menu[day] = replacement
+        swaps += 1
+        metrics.count("variety.swaps")
+
+    return menu, swaps